@@ -3,13 +3,13 @@ import re
 import sys
 import json
 import time
+import functools
 import logging
 from PIL import Image
 from pydantic import ValidationError
-from pydantic_extra_types.pendulum_dt import Duration
 import requests
-import threading
 from typing import Dict, List
+from collections import Counter
 import datetime
 import shutil
 import logging.handlers  # 添加这一行导入日志handlers
@@ -98,7 +98,11 @@ from javsp.file import *
 from javsp.func import *
 from javsp.image import *
 from javsp.datatype import Movie, MovieInfo
-from javsp.web.base import download
+from javsp.pipeline import Pipeline, Stage
+from javsp.web.base import download, discard_partial, probe_images
+from javsp.web.runner import CrawlResult, get_runner
+from javsp.web.proxyfree import start_refresher
+from javsp.web.warmup import report_unreachable, start_warm_up
 from javsp.web.exceptions import *
 from javsp.web.translate import translate_movie_info
 from javsp.telegram_notify import notifier  # 导入 Telegram 通知模块
@@ -137,39 +141,9 @@ def import_crawlers():
         logger.warning('配置的抓取器无效: ' + ', '.join(unknown_mods))
 
 
-# 爬虫是IO密集型任务，可以通过多线程提升效率
-def parallel_crawler(movie: Movie, tqdm_bar=None):
-    """使用多线程抓取不同网站的数据"""
-    def wrapper(parser, info: MovieInfo, retry):
-        """对抓取器函数进行包装，便于更新提示信息和自动重试"""
-        crawler_name = threading.current_thread().name
-        task_info = f'Crawler: {crawler_name}: {info.dvdid}'
-        for cnt in range(retry):
-            try:
-                parser(info)
-                movie_id = info.dvdid or info.cid
-                logger.debug(f"🎬 {crawler_name}: 抓取成功 '{movie_id}' ✅")
-                logger.debug(f"🔗 {crawler_name}: 来源地址 '{info.url}'")
-                setattr(info, 'success', True)
-                if isinstance(tqdm_bar, tqdm):
-                    tqdm_bar.set_description(f'🎬 {crawler_name}: 抓取完成')
-                break
-            except MovieNotFoundError as e:
-                logger.debug(f"⚠️ {crawler_name}: 影片未找到 - {str(e)}")
-                break
-            except MovieDuplicateError as e:
-                logger.exception(f"⚠️ {crawler_name}: 重复影片 - {str(e)}")
-                break
-            except (SiteBlocked, SitePermissionError, CredentialError) as e:
-                logger.error(f"🚫 {crawler_name}: 站点访问受限 - {str(e)}")
-                break
-            except requests.exceptions.RequestException as e:
-                logger.debug(f'🔄 {crawler_name}: 网络错误，重试中 ({cnt+1}/{retry})\n  原因: {repr(e)}')
-                if isinstance(tqdm_bar, tqdm):
-                    tqdm_bar.set_description(f'🔄 {crawler_name}: 网络错误，重试中')
-            except Exception as e:
-                logger.exception(f"❌ {crawler_name}: 未知错误 - {str(e)}")
-
+# 爬虫是IO密集型任务，所有影片的抓取器都在同一个事件循环中并发运行
+def parallel_crawler(movie: Movie):
+    """并发抓取不同网站的数据"""
     # 根据影片的数据源获取对应的抓取器
     crawler_mods: List[CrawlerID] = Cfg().crawler.selection[movie.data_src]
 
@@ -181,23 +155,15 @@ def parallel_crawler(movie: Movie, tqdm_bar=None):
             i.dvdid = None
         for i in Cfg().crawler.selection.normal:
             all_info[i.value] = MovieInfo(movie.dvdid)
-    thread_pool = []
-    for mod_partial, info in all_info.items():
-        mod = f"javsp.web.{mod_partial}"
-        parser = getattr(sys.modules[mod], 'parse_data')
-        # 将all_info中的info实例传递给parser，parser抓取完成后，info实例的值已经完成更新
-        # TODO: 抓取器如果带有parse_data_raw，说明它已经自行进行了重试处理，此时将重试次数设置为1
-        if hasattr(sys.modules[mod], 'parse_data_raw'):
-            th = threading.Thread(target=wrapper, name=mod, args=(parser, info, 1))
-        else:
-            th = threading.Thread(target=wrapper, name=mod, args=(parser, info, Cfg().network.retry))
-        th.start()
-        thread_pool.append(th)
-    # 等待所有线程结束
+    # 将all_info中的info实例传递给parser，parser抓取完成后，info实例的值已经完成更新
+    jobs = {f"javsp.web.{name}": info for name, info in all_info.items()}
     timeout = Cfg().network.retry * Cfg().network.timeout.total_seconds()
-    for th in thread_pool:
-        th: threading.Thread
-        th.join(timeout=timeout)
+    settled = None
+    # 同时按cid和dvdid抓取时，需要所有抓取器的结果才能判断影片类型，因此不提前结束
+    if Cfg().crawler.early_completion and not (movie.data_src == 'cid' and movie.dvdid):
+        settled = functools.partial(is_summary_settled, list(jobs), by_dvdid=bool(movie.dvdid))
+    results = get_runner().run(jobs, timeout=timeout, settled=settled)
+    succeeded = {r.name[len('javsp.web.'):] for r in results.values() if r.success}
     # 根据抓取结果更新影片类型判定
     if movie.data_src == 'cid' and movie.dvdid:
         titles = [all_info[i].title for i in Cfg().crawler.selection[movie.data_src]]
@@ -210,14 +176,56 @@ def parallel_crawler(movie: Movie, tqdm_bar=None):
             movie.cid = None
             all_info = {k: v for k, v in all_info.items() if k not in Cfg().crawler.selection['cid']}
     # 删除抓取失败的站点对应的数据
-    all_info = {k:v for k,v in all_info.items() if hasattr(v, 'success')}
-    for info in all_info.values():
-        del info.success
-    # 删除all_info中键名中的'web.'
-    all_info = {k[4:]:v for k,v in all_info.items()}
+    all_info = {k:v for k,v in all_info.items() if k in succeeded}
     return all_info
 
 
+def is_summary_settled(priority: List[str], finished: Dict[str, CrawlResult], by_dvdid=True) -> bool:
+    """检查汇总时required_keys和wanted_keys中的字段是否都已经确定（不会再被优先级更高的抓取器的数据取代）
+
+    启用respect_site_avid时，还要求各站点番号的投票结果已经不会被尚未结束的抓取器改变。
+    封面(cover, big_cover)的候选地址则只来自已结束的抓取器，被跳过的抓取器提供的封面不会参与择优
+
+    Args:
+        priority: 按优先级排列的所有抓取器
+        finished: 已经结束的抓取器的抓取结果
+        by_dvdid: 汇总时按dvdid（否则按cid）统计各站点的番号
+    """
+    fields = set(Cfg().crawler.required_keys) | set(Cfg().crawler.wanted_keys)
+    for field in fields:
+        attr = field.value
+        for name in priority:
+            if name not in finished:
+                # 优先级更高的抓取器尚未结束，它可能会提供此字段
+                return False
+            result = finished[name]
+            if not result.success:
+                continue
+            # genre和cover的选取逻辑与其他字段不同，javdb的数据只在其他抓取器均没有数据时才可能被采用（见info_summary）
+            if name.endswith('.javdb') and attr == 'cover' and Cfg().crawler.use_javdb_cover != UseJavDBCover.yes:
+                continue
+            value = getattr(result.info, attr, None)
+            if (value is not None) if attr == 'uncensored' else value:
+                break
+        else:
+            # 所有抓取器都已结束但仍缺少此字段，已经没有可以提前结束的抓取器了
+            return False
+    if 'genre' in fields:
+        # info_summary优先采用javdb的genre
+        javdb = next((i for i in priority if i.endswith('.javdb')), None)
+        if javdb and javdb not in finished:
+            return False
+    if Cfg().crawler.respect_site_avid:
+        # 票数最多的番号领先的票数要多于尚未结束的抓取器的数量，否则它们的结果可能改变最终番号
+        votes = Counter((r.info.dvdid if by_dvdid else r.info.cid) for r in finished.values()
+                        if r.success and r.info.title)
+        top = votes.most_common(2) + [(None, 0)] * 2
+        unfinished = len([i for i in priority if i not in finished])
+        if top[0][1] - top[1][1] <= unfinished:
+            return False
+    return True
+
+
 def info_summary(movie: Movie, all_info: Dict[str, MovieInfo]):
     """汇总多个来源的在线数据生成最终数据"""
     final_info = MovieInfo(movie)
@@ -294,16 +302,20 @@ def info_summary(movie: Movie, all_info: Dict[str, MovieInfo]):
     
     # javdb封面有水印，优先采用其他站点的封面
     javdb_cover = getattr(all_info.get('javdb'), 'cover', None)
+    fallback_covers = []
     if javdb_cover is not None:
         match Cfg().crawler.use_javdb_cover:
             case UseJavDBCover.fallback:
                 covers.remove(javdb_cover)
                 covers.append(javdb_cover)
+                fallback_covers.append(javdb_cover)
             case UseJavDBCover.no:
                 covers.remove(javdb_cover)
 
     setattr(final_info, 'covers', covers)
     setattr(final_info, 'big_covers', big_covers)
+    # 只有在其他封面都不可用时才使用的封面
+    setattr(final_info, 'fallback_covers', fallback_covers)
     # 对cover和big_cover赋值，避免后续检查必须字段时出错
     if covers:
         final_info.cover = covers[0]
@@ -497,185 +509,220 @@ def process_poster(movie: Movie):
             fanart_cropped = add_label_to_poster(fanart_cropped, UNCENSORED_MARK_FILE, LabelPostion.BOTTOM_LEFT)
     fanart_cropped.save(movie.poster_file)
 
-def RunNormalMode(all_movies):
-    """普通整理模式"""
-    def check_step(result, msg='步骤错误'):
-        """检查一个整理步骤的结果，并负责更新tqdm的进度"""
-        if result:
-            inner_bar.update()
-        else:
-            raise Exception(msg + '\n')
+def check_step(result, msg='步骤错误'):
+    """检查一个整理步骤的结果，失败时抛出异常以中止对当前影片的整理"""
+    if not result:
+        raise Exception(msg + '\n')
 
-    outer_bar = tqdm(all_movies, desc='整理影片', ascii=True, leave=False)
-    total_step = 6
+
+def crawl_stage(movie: Movie):
+    """流水线阶段: 从各个站点抓取影片数据"""
+    filenames = [os.path.split(i)[1] for i in movie.files]
+    logger.info('正在整理: ' + ', '.join(filenames))
+    all_info = parallel_crawler(movie)
+    msg = f'为其配置的{len(Cfg().crawler.selection[movie.data_src])}个抓取器均未获取到影片信息'
+    check_step(all_info, msg)
+    return movie, all_info
+
+
+def summarize_stage(args):
+    """流水线阶段: 汇总数据、翻译并生成文件名"""
+    movie, all_info = args
+    has_required_keys = info_summary(movie, all_info)
+    check_step(has_required_keys)
     if Cfg().translator.engine:
-        total_step += 1
-    if Cfg().summarizer.extra_fanarts.enabled:
-        total_step += 1
+        success = translate_movie_info(movie.info)
+        check_step(success)
+    generate_names(movie)
+    check_step(movie.save_dir, '无法按命名规则生成目标文件夹')
+    os.makedirs(movie.save_dir, exist_ok=True)
+    return movie
+
+
+def download_stage(movie: Movie):
+    """流水线阶段: 下载封面和剧照"""
+    fallback = getattr(movie.info, 'fallback_covers', [])
+    if Cfg().summarizer.cover.highres:
+        cover_dl = download_cover(movie.info.covers, movie.fanart_file, movie.info.big_covers, fallback)
+    else:
+        cover_dl = download_cover(movie.info.covers, movie.fanart_file, fallback_covers=fallback)
+    check_step(cover_dl, '下载封面图片失败')
+    cover, pic_path = cover_dl
+    # 确保实际下载的封面的url与即将写入到movie.info中的一致
+    if cover != movie.info.cover:
+        movie.info.cover = cover
+    # 根据实际下载的封面的格式更新fanart/poster等图片的文件名
+    if pic_path != movie.fanart_file:
+        movie.fanart_file = pic_path
+        actual_ext = os.path.splitext(pic_path)[1]
+        movie.poster_file = os.path.splitext(movie.poster_file)[0] + actual_ext
+
+    if Cfg().summarizer.extra_fanarts.enabled and movie.info.preview_pics:
+        scrape_interval = Cfg().summarizer.extra_fanarts.scrap_interval.total_seconds()
+        extrafanartdir = movie.save_dir + '/extrafanart'
+        os.mkdir(extrafanartdir)
+        for (id, pic_url) in enumerate(movie.info.preview_pics):
+            fanart_destination = f"{extrafanartdir}/{id}.png"
+            try:
+                info = download(pic_url, fanart_destination)
+                if valid_pic(fanart_destination):
+                    filesize = get_fmt_size(pic_path)
+                    width, height = get_pic_size(pic_path)
+                    elapsed = time.strftime("%M:%S", time.gmtime(info['elapsed']))
+                    speed = get_fmt_size(info['rate']) + '/s'
+                    logger.info(f"已下载剧照{pic_url} {id}.png: {width}x{height}, {filesize} [{elapsed}, {speed}]")
+                else:
+                    check_step(False, f"下载剧照{id}: {pic_url}失败")
+            except:
+                discard_partial(fanart_destination)
+                check_step(False, f"下载剧照{id}: {pic_url}失败")
+            time.sleep(scrape_interval)
+    return movie
+
+
+def image_stage(movie: Movie):
+    """流水线阶段: 裁剪封面并添加水印"""
+    process_poster(movie)
+    return movie
 
+
+def commit_stage(movie: Movie):
+    """流水线阶段: 写入NFO并移动影片文件（按扫描顺序逐个进行）"""
+    # 设置当前影片信息，供通知系统使用
+    set_current_movie_info(movie.info)
+    try:
+        write_nfo(movie.info, movie.nfo_file)
+        if Cfg().summarizer.move_files:
+            movie.rename_files(Cfg().summarizer.path.hard_link)
+            logger.info(f'整理完成，相关文件已保存到: {movie.save_dir}\n')
+        else:
+            logger.info(f'刮削完成，相关文件已保存到: {movie.nfo_file}\n')
+        # 发送 Telegram 成功通知
+        movie_id = movie.dvdid or movie.cid
+        notifier.send_success_notification(
+            movie_title=movie.info.title,
+            movie_id=movie_id,
+            save_dir=movie.save_dir,
+            poster_path=movie.poster_file
+        )
+    finally:
+        # 清除当前影片信息
+        set_current_movie_info(None)
+    return movie
+
+
+def RunNormalMode(all_movies):
+    """普通整理模式"""
+    # 各个阶段以有界队列相连，多部影片可以同时处于不同的阶段（例如一部在抓取时另一部在下载封面）
+    workers = Cfg().crawler.pipeline
+    pipeline = Pipeline([
+        Stage('抓取', crawl_stage, workers.crawl),
+        Stage('汇总', summarize_stage, workers.summarize),
+        Stage('下载', download_stage, workers.download),
+        Stage('图片', image_stage, workers.image),
+        Stage('写入', commit_stage, ordered=True),
+    ], queue_size=workers.queue_size)
+
+    outer_bar = tqdm(total=len(all_movies), desc='整理影片', ascii=True, leave=False)
     return_movies = []
-    success_count = 0
     failed_count = 0
-    
-    for movie in outer_bar:
-        try:
-            # 初始化本次循环要整理影片任务
-            filenames = [os.path.split(i)[1] for i in movie.files]
-            logger.info('正在整理: ' + ', '.join(filenames))
-            inner_bar = tqdm(total=total_step, desc='步骤', ascii=True, leave=False)
-            # 依次执行各个步骤
-            inner_bar.set_description(f'启动并发任务')
-            all_info = parallel_crawler(movie, inner_bar)
-            msg = f'为其配置的{len(Cfg().crawler.selection[movie.data_src])}个抓取器均未获取到影片信息'
-            check_step(all_info, msg)
-
-            inner_bar.set_description('汇总数据')
-            has_required_keys = info_summary(movie, all_info)
-            check_step(has_required_keys)
-            
-            # 设置当前影片信息，供通知系统使用
-            set_current_movie_info(movie.info)
-
-            if Cfg().translator.engine:
-                inner_bar.set_description('翻译影片信息')
-                success = translate_movie_info(movie.info)
-                check_step(success)
-
-            generate_names(movie)
-            check_step(movie.save_dir, '无法按命名规则生成目标文件夹')
-            if not os.path.exists(movie.save_dir):
-                os.makedirs(movie.save_dir)
-
-            inner_bar.set_description('下载封面图片')
-            if Cfg().summarizer.cover.highres:
-                cover_dl = download_cover(movie.info.covers, movie.fanart_file, movie.info.big_covers)
-            else:
-                cover_dl = download_cover(movie.info.covers, movie.fanart_file)
-            check_step(cover_dl, '下载封面图片失败')
-            cover, pic_path = cover_dl
-            # 确保实际下载的封面的url与即将写入到movie.info中的一致
-            if cover != movie.info.cover:
-                movie.info.cover = cover
-            # 根据实际下载的封面的格式更新fanart/poster等图片的文件名
-            if pic_path != movie.fanart_file:
-                movie.fanart_file = pic_path
-                actual_ext = os.path.splitext(pic_path)[1]
-                movie.poster_file = os.path.splitext(movie.poster_file)[0] + actual_ext
-
-            process_poster(movie)
-
-            check_step(True)
-
-            if Cfg().summarizer.extra_fanarts.enabled:
-                scrape_interval = Cfg().summarizer.extra_fanarts.scrap_interval.total_seconds()
-                inner_bar.set_description('下载剧照')
-                if movie.info.preview_pics:
-                    extrafanartdir = movie.save_dir + '/extrafanart'
-                    os.mkdir(extrafanartdir)
-                    for (id, pic_url) in enumerate(movie.info.preview_pics):
-                        inner_bar.set_description(f"Downloading extrafanart {id} from url: {pic_url}")
-                                                                                                                                
-                        fanart_destination = f"{extrafanartdir}/{id}.png"
-                        try:
-                            info = download(pic_url, fanart_destination)
-                            if valid_pic(fanart_destination):
-                                filesize = get_fmt_size(pic_path)
-                                width, height = get_pic_size(pic_path)
-                                elapsed = time.strftime("%M:%S", time.gmtime(info['elapsed']))
-                                speed = get_fmt_size(info['rate']) + '/s'
-                                logger.info(f"已下载剧照{pic_url} {id}.png: {width}x{height}, {filesize} [{elapsed}, {speed}]")
-                            else:
-                                check_step(False, f"下载剧照{id}: {pic_url}失败")
-                        except:
-                            check_step(False, f"下载剧照{id}: {pic_url}失败")
-                        time.sleep(scrape_interval)
-                check_step(True)
-
-            inner_bar.set_description('写入NFO')
-            write_nfo(movie.info, movie.nfo_file)
-            check_step(True)
-            if Cfg().summarizer.move_files:
-                inner_bar.set_description('移动影片文件')
-                movie.rename_files(Cfg().summarizer.path.hard_link)
-                check_step(True)
-                logger.info(f'整理完成，相关文件已保存到: {movie.save_dir}\n')
-            else:
-                logger.info(f'刮削完成，相关文件已保存到: {movie.nfo_file}\n')
-            
-            # 发送 Telegram 成功通知
-            movie_id = movie.dvdid or movie.cid
-            notifier.send_success_notification(
-                movie_title=movie.info.title, 
-                movie_id=movie_id,
-                save_dir=movie.save_dir,
-                poster_path=movie.poster_file
-            )
-            
-            success_count += 1
-            
-            if movie != all_movies[-1] and Cfg().crawler.sleep_after_scraping > Duration(0):
-                time.sleep(Cfg().crawler.sleep_after_scraping.total_seconds())
-            return_movies.append(movie)
-        except Exception as e:
-            logger.debug(e, exc_info=True)
-            logger.error(f'整理失败: {e}')
-            
-            # 发送 Telegram 失败通知
-            movie_id = movie.dvdid or movie.cid
-            notifier.send_error_notification(
-                movie_id=movie_id,
-                error_message=str(e)
-            )
-            
-            failed_count += 1
-        finally:
-            # 清除当前影片信息
-            set_current_movie_info(None)
-            inner_bar.close()
-    
+
+    def on_done(movie: Movie, _):
+        return_movies.append(movie)
+        outer_bar.update()
+
+    def on_fail(movie: Movie, e: Exception, stage: str):
+        nonlocal failed_count
+        logger.error(f'整理失败({stage}): {e}')
+        # 发送 Telegram 失败通知
+        movie_id = movie.dvdid or movie.cid
+        notifier.send_error_notification(
+            movie_id=movie_id,
+            error_message=str(e)
+        )
+        failed_count += 1
+        outer_bar.update()
+
+    if Cfg().network.routing.enabled:
+        # 整理大量影片时耗时较长，在后台保持自动获取到的免代理地址可用
+        start_refresher()
+    try:
+        pipeline.run(all_movies, on_done=on_done, on_fail=on_fail)
+    finally:
+        outer_bar.close()
+
+    breaker = get_runner().breaker
+    # 断路器按抓取器的模块名记录，报告时只显示站点名称
+    tripped = [i.split('.')[-1] for i in breaker.tripped] if breaker else []
+    if tripped:
+        logger.warning(f"以下站点因连续访问失败而被暂停访问过，相关影片的数据可能不完整: {', '.join(tripped)}")
     # 发送批量整理完成的汇总通知
-    total_count = len(all_movies)
     notifier.send_batch_summary(
-        total=total_count,
-        success=success_count,
-        failed=failed_count
+        total=len(all_movies),
+        success=len(return_movies),
+        failed=failed_count,
+        tripped=tripped
     )
-    
+
     return return_movies
 
 
-def download_cover(covers, fanart_path, big_covers=[]):
-    """下载封面图片"""
-    # 优先下载高清封面
+def rank_covers(covers, big_covers=[], fallback_covers=[]):
+    """并发探测所有候选封面，按优先级排序返回可用的封面地址（只有一个候选地址时不探测）
+
+    排序依据依次为: 高清封面 > 普通封面 > 仅作为后备的封面(如javdb的封面); 分辨率(面积)更大; 文件更大; 原有的顺序(站点优先级)
+    探测失败或超时的地址不一定无法下载（例如只是响应较慢），它们按原有的顺序排在探测成功的地址之后
+    """
+    tiers = {}
     for url in big_covers:
-        pic_path = get_pic_path(fanart_path, url)
-        for _ in range(Cfg().network.retry):
-            try:
-                info = download(url, pic_path)
-                if valid_pic(pic_path):
-                    filesize = get_fmt_size(pic_path)
-                    width, height = get_pic_size(pic_path)
-                    elapsed = time.strftime("%M:%S", time.gmtime(info['elapsed']))
-                    speed = get_fmt_size(info['rate']) + '/s'
-                    logger.info(f"已下载高清封面: {width}x{height}, {filesize} [{elapsed}, {speed}]")
-                    return (url, pic_path)
-            except requests.exceptions.HTTPError:
-                # HTTPError通常说明猜测的高清封面地址实际不可用，因此不再重试
-                break
-    # 如果没有高清封面或高清封面下载失败
+        tiers.setdefault(url, 0)
     for url in covers:
+        tiers.setdefault(url, 2 if url in fallback_covers else 1)
+    if len(tiers) <= 1:
+        # 只有一个候选地址时没有需要比较的，直接下载，省去探测的请求
+        return [(url, tier == 0) for url, tier in tiers.items()]
+    # 探测使用连接超时作为时限，无法连接的镜像不会拖慢整个流程
+    probes = probe_images(list(tiers), Cfg().network.timeout.total_seconds())
+    order = list(tiers)
+    def key(url):
+        probe = probes[url]
+        width, height = peek_pic_size(probe['head']) or (0, 0)
+        return (tiers[url], -width*height, -(probe['size'] or 0), order.index(url))
+    ranked = sorted(probes, key=key)
+    for url in order:
+        if url not in probes:
+            logger.debug(f"未能探测封面地址，将在其他地址之后尝试: '{url}'")
+            ranked.append(url)
+    return [(url, tiers[url] == 0) for url in ranked]
+
+
+def download_cover(covers, fanart_path, big_covers=[], fallback_covers=[]):
+    """下载封面图片（先并发探测所有候选地址，然后按优先级依次尝试下载）"""
+    for url, is_big in rank_covers(covers, big_covers, fallback_covers):
         pic_path = get_pic_path(fanart_path, url)
         for _ in range(Cfg().network.retry):
             try:
-                download(url, pic_path)
+                info = download(url, pic_path)
                 if valid_pic(pic_path):
-                    logger.debug(f"已下载封面: '{url}'")
+                    if is_big:
+                        filesize = get_fmt_size(pic_path)
+                        width, height = get_pic_size(pic_path)
+                        elapsed = time.strftime("%M:%S", time.gmtime(info['elapsed']))
+                        speed = get_fmt_size(info['rate']) + '/s'
+                        logger.info(f"已下载高清封面: {width}x{height}, {filesize} [{elapsed}, {speed}]")
+                    else:
+                        logger.debug(f"已下载封面: '{url}'")
                     return (url, pic_path)
                 else:
                     logger.debug(f"图片无效或已损坏: '{url}'，尝试更换下载地址")
                     break
+            except requests.exceptions.HTTPError:
+                # HTTPError通常说明地址实际不可用（如猜测的高清封面地址），因此不再重试
+                break
             except Exception as e:
+                # 下载中断时保留了临时文件，重试时会从断点处继续下载
                 logger.debug(e, exc_info=True)
+        discard_partial(pic_path)
     logger.error(f"下载封面图片失败")
     logger.debug('big_covers:'+str(big_covers) + ', covers'+str(covers))
     return None
@@ -720,6 +767,11 @@ def entry():
     error_exit(root, '未选择要扫描的文件夹')
     # 导入抓取器，必须在chdir之前
     import_crawlers()
+    warm_up = None
+    if Cfg().crawler.warm_up:
+        # 预热与扫描影片文件同时进行，不占用整理第一部影片的时间
+        names = dict.fromkeys('javsp.web.' + i.value for _, mods in Cfg().crawler.selection.items() for i in mods)
+        warm_up = start_warm_up([sys.modules[i] for i in names if i in sys.modules])
     os.chdir(root)
 
     print(f'扫描影片文件...')
@@ -730,6 +782,8 @@ def entry():
     logger.info(f'扫描影片文件：共找到 {movie_count} 部影片')
     if Cfg().scanner.manual:
         reviewMovieID(recognized, root)
+    if warm_up:
+        report_unreachable(warm_up)
     RunNormalMode(recognized + recognize_fail)
 
     sys.exit(0)
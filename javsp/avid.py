@@ -1,146 +1,211 @@
 """获取和转换影片的各类番号（DVD ID, DMM cid, DMM pid）"""
 import os
 import re
+import functools
 from pathlib import Path
+from typing import Iterable, List
 
 
-__all__ = ['get_id', 'get_cid', 'guess_av_type']
+__all__ = ['get_id', 'get_ids', 'get_cid', 'guess_av_type']
 
 
 from javsp.config import Cfg
 
-def get_id(filepath_str: str) -> str:
-    """从给定的文件路径中提取番号（DVD ID）"""
-    filepath = Path(filepath_str)
-    # 通常是接收文件的路径，当然如果是普通字符串也可以
-    ignore_pattern = re.compile('|'.join(Cfg().scanner.ignored_id_pattern))
-    norm = ignore_pattern.sub('', filepath.stem).upper()
-    if 'FC2' in norm:
-        # 根据FC2 Club的影片数据，FC2编号为5-7个数字
-        match = re.search(r'FC2[^A-Z\d]{0,5}(PPV[^A-Z\d]{0,5})?(\d{5,7})', norm, re.I)
-        if match:
-            return 'FC2-' + match.group(2)
-    elif 'HEYDOUGA' in norm:
-        match = re.search(r'(HEYDOUGA)[-_]*(\d{4})[-_]0?(\d{3,5})', norm, re.I)
-        if match:
-            return '-'.join(match.groups())
-    elif 'GETCHU' in norm:
-        match = re.search(r'GETCHU[-_]*(\d+)', norm, re.I)
-        if match:
-            return 'GETCHU-' + match.group(1)
-    elif 'GYUTTO' in norm:
-        match = re.search(r'GYUTTO-(\d+)', norm, re.I)
-        if match:
-            return 'GYUTTO-' + match.group(1)
-    elif '259LUXU' in norm: # special case having form of '259luxu'
-        match = re.search(r'259LUXU-(\d+)', norm, re.I)
-        if match:
-            return '259LUXU-' + match.group(1)
 
-    else:
-        # 先尝试移除可疑域名进行匹配，如果匹配不到再使用原始文件名进行匹配
-        no_domain = re.sub(r'\w{3,10}\.(COM|NET|APP|XYZ)', '', norm, flags=re.I)
-        if no_domain != norm:
-            avid = get_id(no_domain)
-            if avid:
-                return avid
-        # 匹配缩写成hey的heydouga影片。由于番号分三部分，要先于后面分两部分的进行匹配
-        match = re.search(r'(?:HEY)[-_]*(\d{4})[-_]0?(\d{3,5})', norm, re.I)
-        if match:
-            return 'heydouga-' + '-'.join(match.groups())
-        # 匹配片商 MUGEN 的奇怪番号。由于MK3D2DBD的模式，要放在普通番号模式之前进行匹配
-        match = re.search(r'(MKB?D)[-_]*(S\d{2,3})|(MK3D2DBD|S2M|S2MBD)[-_]*(\d{2,3})', norm, re.I)
-        if match:
-            if match.group(1) is not None:
-                avid = match.group(1) + '-' + match.group(2)
-            else:
-                avid = match.group(3) + '-' + match.group(4)
-            return avid
-        # 匹配IBW这样带有后缀z的番号
-        match = re.search(r'(IBW)[-_](\d{2,5}z)', norm, re.I)
-        if match:
-            return match.group(1) + '-' + match.group(2)
-        # 普通番号，优先尝试匹配带分隔符的（如ABC-123）
-        match = re.search(r'([A-Z]{2,10})[-_](\d{2,5})', norm, re.I)
-        if match:
-            return match.group(1) + '-' + match.group(2)
-        # 普通番号，运行到这里时表明无法匹配到带分隔符的番号
-        # 先尝试匹配东热的red, sky, ex三个不带-分隔符的系列
-        # （这三个系列已停止更新，因此根据其作品编号将数字范围限制得小一些以降低误匹配概率）
-        match = re.search(r'(RED[01]\d\d|SKY[0-3]\d\d|EX00[01]\d)', norm, re.I)
-        if match:
-            return match.group(1)
-        # 然后再将影片视作缺失了-分隔符来匹配
-        match = re.search(r'([A-Z]{2,})(\d{2,5})', norm, re.I)
-        if match:
-            return match.group(1) + '-' + match.group(2)
+# 文件名中含有这些关键字时，只使用对应的表达式匹配番号（按顺序检查关键字）
+_KEYWORD_PATTERNS = [
+    # 根据FC2 Club的影片数据，FC2编号为5-7个数字
+    ('FC2', re.compile(r'FC2[^A-Z\d]{0,5}(PPV[^A-Z\d]{0,5})?(\d{5,7})', re.I), lambda m: 'FC2-' + m.group(2)),
+    ('HEYDOUGA', re.compile(r'(HEYDOUGA)[-_]*(\d{4})[-_]0?(\d{3,5})', re.I), lambda m: '-'.join(m.groups())),
+    ('GETCHU', re.compile(r'GETCHU[-_]*(\d+)', re.I), lambda m: 'GETCHU-' + m.group(1)),
+    ('GYUTTO', re.compile(r'GYUTTO-(\d+)', re.I), lambda m: 'GYUTTO-' + m.group(1)),
+    # special case having form of '259luxu'
+    ('259LUXU', re.compile(r'259LUXU-(\d+)', re.I), lambda m: '259LUXU-' + m.group(1)),
+]
+_DOMAIN = re.compile(r'\w{3,10}\.(COM|NET|APP|XYZ)', re.I)
+
+
+def _patterns(*rules):
+    """编译(表达式, 是否忽略大小写, 表达式能够匹配时文件名中必然含有的文本, 格式化函数)形式的规则列表"""
+    return [(re.compile(pattern, re.I if ignorecase else 0), literals, fmt)
+            for pattern, ignorecase, literals, fmt in rules]
+
+
+# 不含上述关键字的文件名，依次尝试以下模式
+_GENERAL_PATTERNS = _patterns(
+    # 匹配缩写成hey的heydouga影片。由于番号分三部分，要先于后面分两部分的进行匹配
+    (r'(?:HEY)[-_]*(\d{4})[-_]0?(\d{3,5})', True, ('HEY',), lambda m: 'heydouga-' + '-'.join(m.groups())),
+    # 匹配片商 MUGEN 的奇怪番号。由于MK3D2DBD的模式，要放在普通番号模式之前进行匹配
+    (r'(MKB?D)[-_]*(S\d{2,3})|(MK3D2DBD|S2M|S2MBD)[-_]*(\d{2,3})', True, ('MK', 'S2M'),
+     lambda m: m.group(1) + '-' + m.group(2) if m.group(1) is not None else m.group(3) + '-' + m.group(4)),
+    # 匹配IBW这样带有后缀z的番号
+    (r'(IBW)[-_](\d{2,5}z)', True, ('IBW',), lambda m: m.group(1) + '-' + m.group(2)),
+    # 普通番号，优先尝试匹配带分隔符的（如ABC-123）
+    (r'([A-Z]{2,10})[-_](\d{2,5})', True, None, lambda m: m.group(1) + '-' + m.group(2)),
+    # 普通番号，运行到这里时表明无法匹配到带分隔符的番号
+    # 先尝试匹配东热的red, sky, ex三个不带-分隔符的系列
+    # （这三个系列已停止更新，因此根据其作品编号将数字范围限制得小一些以降低误匹配概率）
+    (r'(RED[01]\d\d|SKY[0-3]\d\d|EX00[01]\d)', True, ('RED', 'SKY', 'EX00'), lambda m: m.group(1)),
+    # 然后再将影片视作缺失了-分隔符来匹配
+    (r'([A-Z]{2,})(\d{2,5})', True, None, lambda m: m.group(1) + '-' + m.group(2)),
+)
+# 以上都无法匹配时，对所有文件名依次尝试以下模式
+_FALLBACK_PATTERNS = _patterns(
     # 尝试匹配TMA制作的影片（如'T28-557'，他家的番号很乱）
-    match = re.search(r'(T[23]8[-_]\d{3})', norm)
-    if match:
-        return match.group(1)
+    (r'(T[23]8[-_]\d{3})', False, ('T28', 'T38'), lambda m: m.group(1)),
     # 尝试匹配东热n, k系列
-    match = re.search(r'(N\d{4}|K\d{4})', norm, re.I)
-    if match:
-        return match.group(1)
+    (r'(N\d{4}|K\d{4})', True, None, lambda m: m.group(1)),
     # 尝试匹配R18-XXX的番号
-    match = re.search(r'R18-?\d{3}', norm, re.I)
-    if match:
-        return match.group(1)
+    (r'R18-?\d{3}', True, ('R18',), lambda m: m.group(0)),
     # 尝试匹配纯数字番号（无码影片）
-    match = re.search(r'(\d{6}[-_]\d{2,3})', norm)
-    if match:
-        return match.group(1)
-    # 如果还是匹配不了，尝试将')('替换为'-'后再试，少部分影片的番号是由')('分隔的
-    if ')(' in norm:
-        avid = get_id(norm.replace(')(', '-'))
+    (r'(\d{6}[-_]\d{2,3})', False, None, lambda m: m.group(1)),
+)
+
+
+def _search(patterns, norm: str) -> str:
+    """依次尝试各个模式，返回第一个匹配的结果"""
+    # 忽略大小写时K、S等字母还能匹配到一些非ASCII字符，因此只对纯ASCII的文件名按文本预先筛选
+    is_ascii = norm.isascii()
+    for pattern, literals, fmt in patterns:
+        if literals and is_ascii and not any(i in norm for i in literals):
+            continue
+        match = pattern.search(norm)
+        if match:
+            return fmt(match)
+    return ''
+
+
+def _stem(name: str) -> str:
+    """与Path(name).stem相同（name为不含路径分隔符的文件名）"""
+    i = name.rfind('.')
+    if 0 < i < len(name) - 1:
+        return name[:i]
+    return '' if name == '.' else name
+
+
+@functools.lru_cache(maxsize=4096)
+def _dir_name(dirname: str) -> str:
+    return Path(dirname).name
+
+
+class IdEngine():
+    """从文件名中识别番号。忽略模式在创建时编译，识别结果按（移除忽略的内容并转换为大写后的）文件名缓存
+
+    Args:
+        ignored_patterns: 识别番号前要从文件名中移除的内容（正则表达式）
+        cache_size (int): 最多缓存多少个文件名的识别结果
+    """
+    def __init__(self, ignored_patterns: Iterable[str], cache_size: int = 65536) -> None:
+        self.ignored_patterns = tuple(ignored_patterns)
+        self._ignore = re.compile('|'.join(self.ignored_patterns))
+        self._match_norm = functools.lru_cache(maxsize=cache_size)(self._match_norm)
+
+    def get_id(self, filepath_str: str) -> str:
+        # 通常是接收文件的路径，当然如果是普通字符串也可以
+        filepath_str = os.fspath(filepath_str)
+        name = os.path.basename(filepath_str)
+        if name in ('', '.'):
+            # 以路径分隔符或者'.'结尾的路径需要由Path规范化
+            filepath = Path(filepath_str)
+            stem, parent = filepath.stem, filepath.parent.name
+        else:
+            # 同一个文件夹中的文件很多，文件夹的名字只需要计算一次
+            stem, parent = _stem(name), _dir_name(os.path.dirname(filepath_str))
+        avid = self._match(stem)
+        if avid:
+            return avid
+        # 如果最后仍然匹配不了番号，则尝试使用文件所在文件夹的名字去匹配
+        if parent != '':  # haven't reach '.' or '/'
+            return self.get_id(parent)
+        return ''
+
+    def _match(self, name: str) -> str:
+        return self._match_norm(self._ignore.sub('', name).upper())
+
+    def _match_norm(self, norm: str) -> str:
+        for keyword, pattern, fmt in _KEYWORD_PATTERNS:
+            if keyword in norm:
+                match = pattern.search(norm)
+                if match:
+                    return fmt(match)
+                break
+        else:
+            # 先尝试移除可疑域名进行匹配，如果匹配不到再使用原始文件名进行匹配
+            no_domain = _DOMAIN.sub('', norm)
+            if no_domain != norm:
+                avid = self._match(_stem(no_domain))
+                if avid:
+                    return avid
+            avid = _search(_GENERAL_PATTERNS, norm)
+            if avid:
+                return avid
+        avid = _search(_FALLBACK_PATTERNS, norm)
         if avid:
             return avid
-    # 如果最后仍然匹配不了番号，则尝试使用文件所在文件夹的名字去匹配
-    
-    if filepath.parent.name != '': # haven't reach '.' or '/'
-        return get_id(filepath.parent.name)
-    else:
+        # 如果还是匹配不了，尝试将')('替换为'-'后再试，少部分影片的番号是由')('分隔的
+        if ')(' in norm:
+            return self._match(_stem(norm.replace(')(', '-')))
         return ''
 
 
+_engine: IdEngine = None
+
+
+def get_engine() -> IdEngine:
+    """获取与当前配置的忽略模式对应的IdEngine（配置变化时重新创建）"""
+    global _engine
+    patterns = tuple(Cfg().scanner.ignored_id_pattern)
+    engine = _engine
+    if engine is None or engine.ignored_patterns != patterns:
+        engine = _engine = IdEngine(patterns)
+    return engine
+
+
+def get_id(filepath_str: str) -> str:
+    """从给定的文件路径中提取番号（DVD ID）"""
+    return get_engine().get_id(filepath_str)
+
+
+def get_ids(filepaths: Iterable[str]) -> List[str]:
+    """批量识别文件的番号: 能匹配为cid时返回cid，否则返回DVD ID，都无法识别时为空字符串"""
+    engine = get_engine()
+    # 文件名能匹配到cid时，dvdid多半是错的，因此不再识别dvdid
+    return [get_cid(i) or engine.get_id(i) for i in filepaths]
+
+
 CD_POSTFIX = re.compile(r'([-_]\w|cd\d)$')
+_CID_CHARS = re.compile(r'^([a-z\d_]+)$', re.A)
+# 长度为7-14的cid就占了约99.01%. 最长的cid为24，但是长为20-24的比例不到十万分之五
+_CID_SIMPLE = re.compile(r'^[a-z\d]{7,19}$')
+# 绝大多数都只有一个下划线（只有约万分之一带有两个下划线）
+_CID_UNDERSCORE = re.compile(r'''^h_\d{3,4}[a-z]{1,10}\d{2,5}[a-z\d]{0,8}$  # 约 99.17%
+                                |^\d{3}_\d{4,5}$                            # 约 0.57%
+                                |^402[a-z]{3,6}\d*_[a-z]{3,8}\d{5,6}$       # 约 0.09%
+                                |^h_\d{3,4}wvr\d\w\d{4,5}[a-z\d]{0,8}$      # 约 0.06%
+                                 $''', re.VERBOSE)
 def get_cid(filepath: str) -> str:
     """尝试将给定的文件名匹配为CID（Content ID）"""
     basename = os.path.splitext(os.path.basename(filepath))[0]
     # 移除末尾可能带有的分段影片序号
     possible = CD_POSTFIX.sub('', basename)
     # cid只由数字、小写字母和下划线组成
-    match = re.match(r'^([a-z\d_]+)$', possible, re.A)
+    match = _CID_CHARS.match(possible)
     if match:
         possible = match.group(1)
         if '_' not in possible:
-            # 长度为7-14的cid就占了约99.01%. 最长的cid为24，但是长为20-24的比例不到十万分之五
-            match = re.match(r'^[a-z\d]{7,19}$', possible)
-            if match:
-                return possible
-        else:
-            # 绝大多数都只有一个下划线（只有约万分之一带有两个下划线）
-            match2 = re.match(r'''^h_\d{3,4}[a-z]{1,10}\d{2,5}[a-z\d]{0,8}$  # 约 99.17%
-                                |^\d{3}_\d{4,5}$                            # 约 0.57%
-                                |^402[a-z]{3,6}\d*_[a-z]{3,8}\d{5,6}$       # 约 0.09%
-                                |^h_\d{3,4}wvr\d\w\d{4,5}[a-z\d]{0,8}$      # 约 0.06%
-                                 $''', possible, re.VERBOSE)
-            if match2:
+            if _CID_SIMPLE.match(possible):
                 return possible
+        elif _CID_UNDERSCORE.match(possible):
+            return possible
     return ''
 
 
+_AV_TYPE = re.compile(r'^(?:(?P<fc2>FC2-\d{5,7}$)|(?P<getchu>GETCHU-\d+)|(?P<gyutto>GYUTTO-\d+))', re.I)
 def guess_av_type(avid: str) -> str:
     """识别给定的番号所属的分类: normal, fc2, cid"""
-    match = re.match(r'^FC2-\d{5,7}$', avid, re.I)
-    if match:
-        return 'fc2'
-    match = re.match(r'^GETCHU-(\d+)',avid,re.I)
-    if match:
-        return 'getchu'
-    match = re.match(r'^GYUTTO-(\d+)',avid,re.I)
+    match = _AV_TYPE.match(avid)
     if match:
-        return 'gyutto'
+        return match.lastgroup
     # 如果传入的avid完全匹配cid的模式，则将影片归类为cid
     cid = get_cid(avid)
     if cid == avid:
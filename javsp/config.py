@@ -39,11 +39,59 @@ class CrawlerID(str, Enum):
     arzon = 'arzon'
     arzon_iv = 'arzon_iv'
 
+class HttpCache(BaseConfig):
+    enabled: bool = False
+    offline: bool = False
+    ttl: Duration = Duration(days=1)
+    site_ttl: Dict[str, Duration] = {}
+
+class RateLimitRule(BaseConfig):
+    rate: float = Field(default=0, ge=0)
+    burst: PositiveInt = 1
+    daily_quota: PositiveInt | None = None
+
+class RateLimit(BaseConfig):
+    enabled: bool = True
+    default: RateLimitRule = Field(default_factory=lambda: RateLimitRule(rate=5, burst=5))
+    sites: Dict[str, RateLimitRule] = {}
+
+class AdaptiveTimeout(BaseConfig):
+    enabled: bool = True
+    factor: float = Field(default=3, gt=0)
+    min: Duration = Duration(seconds=3)
+    max: Duration = Duration(seconds=60)
+    min_samples: PositiveInt = 5
+
+class Download(BaseConfig):
+    segments: PositiveInt = 4
+    segment_min_size: ByteSize = ByteSize(4*1024*1024)
+
+class ProxyPool(BaseConfig):
+    check_url: Url | None = Url('https://www.gstatic.com/generate_204')
+    check_interval: Duration = Duration(minutes=1)
+    max_failures: PositiveInt = 3
+    cooldown: Duration = Duration(minutes=5)
+
+class Routing(BaseConfig):
+    enabled: bool = True
+    ttl: Duration = Duration(days=1)
+    probe_timeout: Duration = Duration(seconds=5)
+    mirror_ttl: Duration = Duration(days=3)
+
 class Network(BaseConfig):
-    proxy_server: Url | None
+    proxy_server: Url | List[Url] | None
+    proxy_pool: ProxyPool = Field(default_factory=ProxyPool)
     retry: NonNegativeInt = 3
     timeout: Duration
     proxy_free: Dict[CrawlerID, Url]
+    routing: Routing = Field(default_factory=Routing)
+    pool_size: PositiveInt = 10
+    http_cache: HttpCache = Field(default_factory=HttpCache)
+    coalesce_requests: bool = True
+    reuse_cf_clearance: bool = True
+    rate_limit: RateLimit = Field(default_factory=RateLimit)
+    adaptive_timeout: AdaptiveTimeout = Field(default_factory=AdaptiveTimeout)
+    download: Download = Field(default_factory=Download)
 
 class CrawlerSelect(BaseConfig):
     def items(self) -> List[tuple[str, list[CrawlerID]]]:
@@ -106,15 +154,41 @@ class UseJavDBCover(str, Enum):
     no = 'no'
     fallback = 'fallback'
 
+class PipelineWorkers(BaseConfig):
+    crawl: PositiveInt = 2
+    summarize: PositiveInt = 1
+    download: PositiveInt = 2
+    image: PositiveInt = 1
+    queue_size: PositiveInt = 4
+
+class NotFoundCache(BaseConfig):
+    enabled: bool = True
+    expire: Duration = Duration(days=30)
+    purge: bool = False
+
+class CircuitBreaker(BaseConfig):
+    enabled: bool = True
+    threshold: PositiveInt = 3
+    cooldown: Duration | None = Duration(minutes=10)
+
 class Crawler(BaseConfig):
     selection: CrawlerSelect
     required_keys: list[MovieInfoField]
+    early_completion: bool = True
+    warm_up: bool = True
+    wanted_keys: list[MovieInfoField] = [
+        MovieInfoField.actress, MovieInfoField.plot, MovieInfoField.genre, MovieInfoField.director,
+        MovieInfoField.producer, MovieInfoField.publisher, MovieInfoField.serial,
+        MovieInfoField.publish_date, MovieInfoField.duration,
+    ]
     hardworking: bool
     respect_site_avid: bool
     fc2fan_local_path: Path | None
-    sleep_after_scraping: Duration
     use_javdb_cover: UseJavDBCover
     normalize_actress_name: bool
+    pipeline: PipelineWorkers = Field(default_factory=PipelineWorkers)
+    not_found_cache: NotFoundCache = Field(default_factory=NotFoundCache)
+    circuit_breaker: CircuitBreaker = Field(default_factory=CircuitBreaker)
 
 class MovieDefault(BaseConfig):
     title: str
@@ -214,6 +288,7 @@ class Other(BaseConfig):
     interactive: bool
     check_update: bool
     auto_update: bool
+    cache_dir: Path = Path('cache')
 
 # 添加 Telegram 通知配置
 class TelegramConfig(BaseModel):
@@ -30,6 +30,7 @@ def scan_movies(root: str) -> List[Movie]:
 
     # 扫描所有影片文件并获取它们的番号
     dic = {}    # avid: [abspath1, abspath2...]
+    video_files = []
     small_videos = {}
     ignore_folder_name_pattern = re.compile('|'.join(Cfg().scanner.ignored_folder_name_pattern))
     for dirpath, dirnames, filenames in os.walk(root):
@@ -51,26 +52,23 @@ def scan_movies(root: str) -> List[Movie]:
                 if filesize < Cfg().scanner.minimum_size:
                     small_videos.setdefault(file, []).append(fullpath)
                     continue
-                dvdid = get_id(fullpath)
-                cid = get_cid(fullpath)
-                # 如果文件名能匹配到cid，那么将cid视为有效id，因为此时dvdid多半是错的
-                avid = cid if cid else dvdid
-                if avid:
-                    if avid in dic:
-                        dic[avid].append(fullpath)
-                    else:
-                        dic[avid] = [fullpath]
-                else:
-                    fail = Movie('无法识别番号')
-                    fail.files = [fullpath]
-                    failed_items.append(fail)
-                    logger.error(f"无法提取影片番号: '{fullpath}'")
+                video_files.append(fullpath)
+    # 扫描完成后再批量识别番号（如果文件名能匹配到cid，那么将cid视为有效id，因为此时dvdid多半是错的）
+    for fullpath, avid in zip(video_files, get_ids(video_files)):
+        if avid:
+            if avid in dic:
+                dic[avid].append(fullpath)
+            else:
+                dic[avid] = [fullpath]
+        else:
+            fail = Movie('无法识别番号')
+            fail.files = [fullpath]
+            failed_items.append(fail)
+            logger.error(f"无法提取影片番号: '{fullpath}'")
     # 多分片影片容易有文件大小低于阈值的子片，进行特殊处理
     has_avid = {}
-    for name in list(small_videos.keys()):
-        dvdid = get_id(name)
-        cid = get_cid(name)
-        avid = cid if cid else dvdid
+    small_names = list(small_videos.keys())
+    for name, avid in zip(small_names, get_ids(small_names)):
         if avid in dic:
             dic[avid].extend(small_videos.pop(name))
         elif avid:
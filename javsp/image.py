@@ -1,11 +1,12 @@
 """处理本地图片的相关功能"""
 from enum import Enum
+import io
 import os
 import logging
 from PIL import Image, ImageOps
 
 
-__all__ = ['valid_pic', 'get_pic_size', 'add_label_to_poster', 'LabelPostion']
+__all__ = ['valid_pic', 'get_pic_size', 'peek_pic_size', 'add_label_to_poster', 'LabelPostion']
 
 logger = logging.getLogger(__name__)
 
@@ -50,3 +51,11 @@ def get_pic_size(pic_path):
     """获取图片文件的分辨率"""
     pic = ImageOps.exif_transpose(Image.open(pic_path))
     return pic.size
+
+
+def peek_pic_size(head: bytes):
+    """根据图片文件开头的数据获取图片的分辨率，无法识别时返回None"""
+    try:
+        return Image.open(io.BytesIO(head)).size
+    except Exception:
+        return None
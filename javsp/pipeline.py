@@ -0,0 +1,145 @@
+"""多阶段流水线：让多部影片的抓取、下载、图片处理等步骤交错进行"""
+import queue
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+
+__all__ = ['Stage', 'Pipeline']
+
+
+logger = logging.getLogger(__name__)
+# 通知工作线程退出的哨兵对象
+_STOP = object()
+
+
+class _Job:
+    """在各个阶段之间流转的单个任务"""
+    __slots__ = ('index', 'item', 'value', 'error', 'stage')
+
+    def __init__(self, index: int, item) -> None:
+        self.index = index      # 任务在输入序列中的位置，用于保证输出顺序
+        self.item = item        # 原始输入（失败时用来报告是哪个任务出错）
+        self.value = item       # 上一阶段的输出，作为下一阶段的输入
+        self.error = None       # 任务在某个阶段失败时记录异常，后续阶段将直接跳过它
+        self.stage = None       # 任务失败时所在的阶段名
+
+
+class Stage:
+    """流水线中的一个阶段
+
+    Args:
+        name (str): 阶段名称，用于日志和错误提示
+        func (Callable): 处理函数，接收上一阶段的输出并返回本阶段的输出
+        workers (int): 此阶段的并发线程数
+        ordered (bool): 是否严格按输入顺序处理（启用时只使用单个线程）
+    """
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1, ordered: bool = False) -> None:
+        self.name = name
+        self.func = func
+        self.workers = 1 if ordered else max(1, workers)
+        self.ordered = ordered
+
+
+class Pipeline:
+    """由多个阶段组成的流水线，相邻阶段之间以有界队列相连
+
+    每个任务依次经过所有阶段，不同任务可以同时位于不同的阶段。某个任务在任一阶段出错时，
+    异常会被记录下来，该任务跳过余下的阶段，不会影响其他任务。
+    """
+    def __init__(self, stages: List[Stage], queue_size: int = 4) -> None:
+        if not stages:
+            raise ValueError('流水线至少需要一个阶段')
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+
+    def run(self, items: list, on_done: Optional[Callable[[Any, Any], None]] = None,
+            on_fail: Optional[Callable[[Any, Exception, str], None]] = None) -> list:
+        """处理所有任务并按输入顺序返回各任务最后一个阶段的输出（失败的任务对应None）
+
+        Args:
+            on_done: 任务成功时的回调 on_done(item, result)，按输入顺序调用
+            on_fail: 任务失败时的回调 on_fail(item, error, stage_name)，按输入顺序调用
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        # 最后一级的输出队列不设上限，由当前线程消费
+        queues.append(queue.Queue())
+        threads = []
+        for i, stage in enumerate(self.stages):
+            # 上游的最后一个工作线程退出时，负责通知下游的所有工作线程退出
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            downstream = self.stages[i+1].workers if i+1 < len(self.stages) else 1
+            for n in range(stage.workers):
+                th = threading.Thread(target=self._worker, name=f'{stage.name}-{n}', daemon=True,
+                                      args=(stage, queues[i], queues[i+1], remaining, lock, downstream))
+                th.start()
+                threads.append(th)
+
+        feeder = threading.Thread(target=self._feed, args=(items, queues[0], self.stages[0].workers),
+                                  name='pipeline-feeder', daemon=True)
+        feeder.start()
+
+        # 按照输入顺序收集结果，保证回调的调用顺序是确定的
+        results = [None] * len(items)
+        pending = {}
+        next_index = 0
+        while True:
+            job = queues[-1].get()
+            if job is _STOP:
+                break
+            pending[job.index] = job
+            while next_index in pending:
+                job = pending.pop(next_index)
+                if job.error is None:
+                    results[job.index] = job.value
+                    if on_done:
+                        on_done(job.item, job.value)
+                elif on_fail:
+                    on_fail(job.item, job.error, job.stage)
+                next_index += 1
+        for th in threads:
+            th.join()
+        return results
+
+    @staticmethod
+    def _feed(items, out_q: queue.Queue, workers: int):
+        for i, item in enumerate(items):
+            out_q.put(_Job(i, item))
+        for _ in range(workers):
+            out_q.put(_STOP)
+
+    @staticmethod
+    def _worker(stage: Stage, in_q: queue.Queue, out_q: queue.Queue, remaining: list, lock: threading.Lock, downstream: int):
+        # ordered阶段的重排缓冲区: 先到达的后续任务暂存于此，直到轮到它们时再处理
+        buffer = {}
+        next_index = 0
+
+        def process(job: _Job):
+            if job.error is None:
+                try:
+                    job.value = stage.func(job.value)
+                except Exception as e:
+                    logger.debug(f"流水线阶段'{stage.name}'出错: {job.item}", exc_info=True)
+                    job.error, job.stage = e, stage.name
+            out_q.put(job)
+
+        while True:
+            job = in_q.get()
+            if job is _STOP:
+                break
+            if not stage.ordered:
+                process(job)
+                continue
+            buffer[job.index] = job
+            while next_index in buffer:
+                process(buffer.pop(next_index))
+                next_index += 1
+        # 正常情况下buffer此时已经为空，防御性地按顺序清空剩余的任务
+        for index in sorted(buffer):
+            process(buffer[index])
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                for _ in range(downstream):
+                    out_q.put(_STOP)
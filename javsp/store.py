@@ -0,0 +1,91 @@
+"""在多次运行之间持久化保存的本地状态（各类缓存、统计数据等）"""
+import os
+import json
+import time
+import logging
+import threading
+
+from javsp.config import Cfg
+from javsp.lib import resource_path
+
+
+__all__ = ['cache_path', 'JsonStore']
+
+
+logger = logging.getLogger(__name__)
+_MISSING = object()
+
+
+# 程序运行过程中会切换工作目录，因此在导入时就将缓存文件夹解析为绝对路径
+_cache_dir = os.path.abspath(resource_path(str(Cfg().other.cache_dir)))
+
+
+def cache_path(name: str) -> str:
+    """获取缓存文件夹中指定文件的绝对路径（会自动创建缓存文件夹）"""
+    os.makedirs(_cache_dir, exist_ok=True)
+    return os.path.join(_cache_dir, name)
+
+
+class JsonStore():
+    """保存在缓存文件夹下的JSON文件中的键值对，每一项都可以单独设置有效期（线程安全）"""
+    def __init__(self, name: str) -> None:
+        self.path = cache_path(name)
+        self._lock = threading.Lock()
+        self._data = {}     # key: [value, 过期时间戳(None表示永不过期)]
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'rt', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"无法读取缓存文件，将忽略其中的数据: '{self.path}': {e}")
+        self._expire()
+
+    def _expire(self):
+        now = time.time()
+        self._data = {k: v for k, v in self._data.items() if v[1] is None or v[1] > now}
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            if item[1] is not None and item[1] <= time.time():
+                del self._data[key]
+                return default
+            return item[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: str, value, ttl: float = None, save=True):
+        """写入一项数据，ttl为有效期（秒），为None时表示永不过期"""
+        expires = None if ttl is None else time.time() + ttl
+        with self._lock:
+            self._data[key] = [value, expires]
+        if save:
+            self.save()
+
+    def delete(self, key: str, save=True):
+        with self._lock:
+            removed = self._data.pop(key, None)
+        if removed is not None and save:
+            self.save()
+
+    def items(self):
+        with self._lock:
+            self._expire()
+            return [(k, v[0]) for k, v in self._data.items()]
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+        self.save()
+
+    def save(self):
+        """将数据写入文件（先写入临时文件再替换，避免中断时损坏原有的数据）"""
+        with self._lock:
+            content = json.dumps(self._data, ensure_ascii=False, indent=1)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wt', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp, self.path)
@@ -5,7 +5,7 @@ import os
 import logging
 import requests
 import html
-from typing import Optional
+from typing import List, Optional
 from javsp.config import Cfg
 from pathlib import Path
 
@@ -164,13 +164,14 @@ class TelegramNotifier:
         
         return self._send_message(message)
         
-    def send_batch_summary(self, total: int, success: int, failed: int) -> bool:
+    def send_batch_summary(self, total: int, success: int, failed: int, tripped: List[str] = None) -> bool:
         """发送批量整理完成的汇总通知
         
         Args:
             total: 总影片数
             success: 成功数量
             failed: 失败数量
+            tripped: 因连续访问失败而被暂停访问的站点
             
         Returns:
             bool: 发送是否成功
@@ -185,6 +186,8 @@ class TelegramNotifier:
             f"✅ <b>成功</b>: {success}\n"
             f"❌ <b>失败</b>: {failed}"
         )
+        if tripped:
+            message += f"\n🔌 <b>暂停访问的站点</b>: {', '.join(tripped)}"
         
         return self._send_message(message)
 
@@ -4,7 +4,7 @@ import logging
 from html import unescape
 
 
-from javsp.web.base import Request
+from javsp.web.base import Request, set_timeout_floor
 from javsp.web.exceptions import *
 from javsp.config import Cfg
 from javsp.datatype import MovieInfo
@@ -12,8 +12,8 @@ from javsp.datatype import MovieInfo
 # 初始化Request实例
 request = Request(use_scraper=True)
 request.headers['Accept-Language'] = 'zh-TW,zh;q=0.9'
-# 近期airav服务器似乎不稳定，时好时坏，单次查询平均在17秒左右，timeout时间增加到20秒
-request.timeout = 20
+# 近期airav服务器似乎不稳定，时好时坏，单次查询平均在17秒左右，读取超时至少为20秒（更慢时由network.adaptive_timeout自动放宽）
+set_timeout_floor('airav', 20)
 
 
 logger = logging.getLogger(__name__)
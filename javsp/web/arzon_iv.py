@@ -4,7 +4,7 @@ import sys
 import logging
 import re
 
-from javsp.web.base import request_get
+from javsp.web.base import Selectors, request_get
 from javsp.web.exceptions import *
 from javsp.datatype import MovieInfo
 import requests
@@ -12,6 +12,15 @@ from lxml import html
 
 logger = logging.getLogger(__name__)
 base_url = "https://www.arzon.jp"
+sel = Selectors('arzon_iv',
+    search_urls="//h2/a/@href",
+    title="//div[@class='detail_title_new']//h1/text()",
+    cover="//td[@align='center']//a/img/@src",
+    item_text="//div[@class='item_text']/text()",
+    info_rows="//div[@class='item_register']/table//tr",
+    row_key="./td[1]/text()",
+    row_value="./td[2]//text()",
+)
 
 def get_cookie():
     # https://www.arzon.jp/index.php?action=adult_customer_agecheck&agecheck=1&redirect=https%3A%2F%2Fwww.arzon.jp%2F
@@ -31,7 +40,7 @@ def parse_data(movie: MovieInfo):
     # https://stackoverflow.com/questions/15830421/xml-unicode-strings-with-encoding-declaration-are-not-supported
     data = html.fromstring(r.content)
 
-    urls = data.xpath("//h2/a/@href")
+    urls = sel.search_urls(data)
     if len(urls) == 0:
         raise MovieNotFoundError(__name__, movie.dvdid)
 
@@ -39,15 +48,15 @@ def parse_data(movie: MovieInfo):
     e = request_get(item_url, cookies, delay_raise=True)
     item =  html.fromstring(e.content)
 
-    title = item.xpath("//div[@class='detail_title_new']//h1/text()")[0]
-    cover = item.xpath("//td[@align='center']//a/img/@src")[0]
-    item_text = item.xpath("//div[@class='item_text']/text()")
+    title = sel.title(item)[0]
+    cover = sel.cover(item)[0]
+    item_text = sel.item_text(item)
     plot = [item.strip() for item in item_text if item.strip() != ''][0]
 
-    container = item.xpath("//div[@class='item_register']/table//tr")
+    container = sel.info_rows(item)
     for row in container:
-      key = row.xpath("./td[1]/text()")[0]
-      contents = row.xpath("./td[2]//text()")
+      key = sel.row_key(row)[0]
+      contents = sel.row_value(row)
       content = [item.strip() for item in contents if item.strip() != '']
       index = 0
       value = content[index] if content and index < len(content) else None
@@ -1,7 +1,7 @@
 """从avsox抓取数据"""
 import logging
 
-from javsp.web.base import get_html
+from javsp.web.base import Selectors, get_html
 from javsp.web.exceptions import *
 from javsp.config import Cfg, CrawlerID
 from javsp.datatype import MovieInfo
@@ -9,6 +9,22 @@ from javsp.datatype import MovieInfo
 
 logger = logging.getLogger(__name__)
 base_url = str(Cfg().network.proxy_free[CrawlerID.avsox])
+# 影片的所有信息都在div.container中，因此从container（而不是整个网页）开始查找
+sel = Selectors('avsox',
+    search_ids="//div[@class='photo-info']/span/date[1]/text()",
+    search_urls="//a[contains(@class, 'movie-box')]/@href",
+    container="/html/body/div[@class='container']",
+    title="h3/text()",
+    cover=".//a[@class='bigImage']/@href",
+    info="div/div[@class='col-md-3 info']",
+    dvdid="p/span[@style]/text()",
+    label="p/span[text()=$label]",
+    line="p[text()=$label]",
+    link="a",
+    link_text="a/text()",
+    genre="p/span[@class='genre']/a/text()",
+    actress=".//a[@class='avatar-box']/span/text()",
+)
 
 
 def parse_data(movie: MovieInfo):
@@ -18,8 +34,8 @@ def parse_data(movie: MovieInfo):
     if full_id.startswith('FC2-'):
         full_id = full_id.replace('FC2-', 'FC2-PPV-')
     html = get_html(f'{base_url}tw/search/{full_id}')
-    ids = html.xpath("//div[@class='photo-info']/span/date[1]/text()")
-    urls = html.xpath("//a[contains(@class, 'movie-box')]/@href")
+    ids = sel.search_ids(html)
+    urls = sel.search_urls(html)
     ids_lower = list(map(str.lower, ids))
     if full_id.lower() in ids_lower:
         url = urls[ids_lower.index(full_id.lower())]
@@ -29,22 +45,22 @@ def parse_data(movie: MovieInfo):
 
     # 提取影片信息
     html = get_html(url)
-    container = html.xpath("/html/body/div[@class='container']")[0]
-    title = container.xpath("h3/text()")[0]
-    cover = container.xpath("//a[@class='bigImage']/@href")[0]
-    info = container.xpath("div/div[@class='col-md-3 info']")[0]
-    dvdid = info.xpath("p/span[@style]/text()")[0]
-    publish_date = info.xpath("p/span[text()='发行时间:']")[0].tail.strip()
-    duration = info.xpath("p/span[text()='长度:']")[0].tail.replace('分钟', '').strip()
+    container = sel.container(html)[0]
+    title = sel.title(container)[0]
+    cover = sel.cover(container)[0]
+    info = sel.info(container)[0]
+    dvdid = sel.dvdid(info)[0]
+    publish_date = sel.label(info, label='发行时间:')[0].tail.strip()
+    duration = sel.label(info, label='长度:')[0].tail.replace('分钟', '').strip()
     producer, serial = None, None
-    producer_tag = info.xpath("p[text()='制作商: ']")[0].getnext().xpath("a")
+    producer_tag = sel.link(sel.line(info, label='制作商: ')[0].getnext())
     if producer_tag:
         producer = producer_tag[0].text_content()
-    serial_tag = info.xpath("p[text()='系列:']")
+    serial_tag = sel.line(info, label='系列:')
     if serial_tag:
-        serial = serial_tag[0].getnext().xpath("a/text()")[0]
-    genre = info.xpath("p/span[@class='genre']/a/text()")
-    actress = container.xpath("//a[@class='avatar-box']/span/text()")
+        serial = sel.link_text(serial_tag[0].getnext())[0]
+    genre = sel.genre(info)
+    actress = sel.actress(container)
 
     movie.dvdid = dvdid.replace('FC2-PPV-', 'FC2-')
     movie.url = url
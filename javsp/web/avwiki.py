@@ -8,6 +8,16 @@ from javsp.datatype import MovieInfo
 
 logger = logging.getLogger(__name__)
 base_url = 'https://av-wiki.net'
+sel = Selectors('avwiki',
+    cover="//header/div/a[@class='image-link-border']/img",
+    body="//section[@class='article-body']",
+    title="div/p/text()",
+    cite_url="div/cite/a/@href",
+    info="dl[@class='dltable']",
+    info_keys="dt/text()",
+    info_values="dd",
+    links="a",
+)
 
 
 def parse_data(movie: MovieInfo):
@@ -21,7 +31,7 @@ def parse_data(movie: MovieInfo):
         raise MovieNotFoundError(__name__, movie.dvdid)
     html = resp2html(resp)
 
-    cover_tag = html.xpath("//header/div/a[@class='image-link-border']/img")
+    cover_tag = sel.cover(html)
     if cover_tag:
         try:
             srcset = cover_tag[0].get('srcset').split(', ')
@@ -34,17 +44,17 @@ def parse_data(movie: MovieInfo):
             movie.cover = max_pic[0][1]
         except:
             movie.cover = cover_tag[0].get('src')
-    body = html.xpath("//section[@class='article-body']")[0]
-    title = body.xpath("div/p/text()")[0]
+    body = sel.body(html)[0]
+    title = sel.title(body)[0]
     title = title.replace(f"【{movie.dvdid}】", '')
-    cite_url = body.xpath("div/cite/a/@href")[0]
+    cite_url = sel.cite_url(body)[0]
     cite_url = cite_url.split('?aff=')[0]
-    info = body.xpath("dl[@class='dltable']")[0]
-    dt_txt_ls, dd_tags = info.xpath("dt/text()"), info.xpath("dd")
+    info = sel.info(body)[0]
+    dt_txt_ls, dd_tags = sel.info_keys(info), sel.info_values(info)
     data = {}
     for dt_txt, dd in zip(dt_txt_ls, dd_tags):
         dt_txt = dt_txt.strip()
-        a_tag = dd.xpath('a')
+        a_tag = sel.links(dd)
         if len(a_tag) == 0:
             dd_txt = dd.text.strip()
         else:
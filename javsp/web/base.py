@@ -1,24 +1,49 @@
 """网络请求的统一接口"""
 import os
+import re
 import sys
+import codecs
 import time
 import shutil
+import asyncio
 import logging
 import requests
+import functools
 import contextlib
+import contextvars
+import threading
 import cloudscraper
 import lxml.html
 from tqdm import tqdm
 from lxml import etree
+from urllib.parse import urljoin, urlsplit
+from http.cookiejar import DefaultCookiePolicy
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 from lxml.html.clean import Cleaner
 from requests.models import Response
 
 
 from javsp.config import Cfg
 from javsp.web.exceptions import *
-
-
-__all__ = ['Request', 'get_html', 'post_html', 'request_get', 'resp2html', 'is_connectable', 'download', 'get_resp_text', 'read_proxy']
+from javsp.web.httpcache import HttpCache, http_cache
+from javsp.web.singleflight import SingleFlight
+from javsp.web.proxypool import BANNED_STATUS, PROXY_ERRORS, PoolProxies, ProxyPool, make_checker
+from javsp.web.ratelimit import RateLimiter, rate_limiter
+from javsp.web.latency import latency_tracker
+from javsp.web.downloader import Downloader, parse_content_range
+from javsp.web.clearance import clearance_store
+from javsp.web.cassette import Cassette, CassetteMiss, use_cassette
+from javsp.web.selector import Selector, Selectors
+
+
+__all__ = ['Request', 'get_html', 'post_html', 'request_get', 'resp2html', 'is_connectable', 'download', 'get_resp_text', 'read_proxy',
+           'AsyncRequest', 'async_request_get', 'async_request_post', 'async_get_html', 'run_blocking',
+           'session_pool', 'pooled_get', 'pooled_post', 'pooled_head', 'cached_get', 'rate_limited',
+           'CancelToken', 'DeadlineExceeded', 'cancel_scope', 'current_token', 'deadline_bound', 'adaptive_timeout', 'set_timeout_floor',
+           'discard_partial', 'probe_image', 'probe_images', 'proxy_pool', 'proxied',
+           'guess_encoding', 'parse_html', 'Cassette', 'CassetteMiss', 'use_cassette', 'Selector', 'Selectors',
+           'parse_partial_html', 'partial_html', 'absolute_url']
 
 
 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36'}
@@ -27,12 +52,284 @@ logger = logging.getLogger(__name__)
 # 删除js脚本相关的tag，避免网页检测到没有js运行环境时强行跳转，影响调试
 cleaner = Cleaner(kill_tags=['script', 'noscript'])
 
+def _proxy_list():
+    proxy_server = Cfg().network.proxy_server
+    if proxy_server is None:
+        return []
+    if not isinstance(proxy_server, list):
+        proxy_server = [proxy_server]
+    return [str(i) for i in proxy_server]
+
+
+def _create_proxy_pool():
+    """配置了多个代理时创建代理池"""
+    proxies = _proxy_list()
+    if len(proxies) < 2:
+        return None
+    cfg = Cfg().network.proxy_pool
+    check = make_checker(str(cfg.check_url), Cfg().network.timeout.total_seconds()) if cfg.check_url else None
+    pool = ProxyPool(proxies, cfg.max_failures, cfg.cooldown.total_seconds(), check)
+    pool.start_checker(cfg.check_interval.total_seconds())
+    return pool
+
+
+proxy_pool = _create_proxy_pool()
+
+
 def read_proxy():
-    if Cfg().network.proxy_server is None:
+    proxies = _proxy_list()
+    if not proxies:
         return {}
+    if proxy_pool is not None:
+        # 经由本模块发送的请求会在发送时才从代理池中选择代理
+        return PoolProxies({'http': proxies[0], 'https': proxies[0]})
+    return {'http': proxies[0], 'https': proxies[0]}
+
+
+def proxied(send):
+    """包装send(url, **kw)，proxies为read_proxy()返回的PoolProxies时，从代理池中为本次请求选择代理并记录请求结果"""
+    @functools.wraps(send)
+    def func(url, **kw):
+        if proxy_pool is None or not isinstance(kw.get('proxies'), PoolProxies):
+            return send(url, **kw)
+        proxy = proxy_pool.choose(url)
+        kw['proxies'] = {'http': proxy, 'https': proxy}
+        start = time.monotonic()
+        try:
+            r = send(url, **kw)
+        except PROXY_ERRORS:
+            proxy_pool.report(proxy, url, failed=True)
+            raise
+        except Exception:
+            proxy_pool.report(proxy, url)
+            raise
+        banned = r.status_code in BANNED_STATUS
+        proxy_pool.report(proxy, url, latency=time.monotonic() - start, banned=banned)
+        return r
+    return func
+
+class SessionPool():
+    """按(站点, 代理)复用requests.Session，使所有抓取器和下载器对同一站点的请求都能复用keep-alive连接"""
+    def __init__(self, pool_size: int) -> None:
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str, proxies: dict = None):
+        parts = urlsplit(url)
+        proxy = (proxies or {}).get(parts.scheme, '')
+        return (parts.scheme, parts.netloc.lower(), proxy)
+
+    def get(self, url: str, proxies: dict = None) -> requests.Session:
+        """获取访问指定url所应使用的Session（线程安全）"""
+        key = self._key(url, proxies)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._create_session()
+                    self._sessions[key] = session
+        return session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # 每个Session只服务于一个站点，因此只需要一个连接池，但要允许多个线程同时占用连接
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        # 与requests.get等函数的行为保持一致：不在多次请求之间保留服务器设置的Cookies（Cookies由各个调用者自行传入）
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+session_pool = SessionPool(Cfg().network.pool_size)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """发送请求时发现所属的抓取任务已被取消或超过了截止时间"""
+
+
+class CancelToken():
+    """抓取任务的取消令牌，带有可选的截止时间（time.monotonic()）
+
+    通过cancel_scope()绑定到当前上下文后，经由本模块发出的每个请求都会先检查令牌，并以剩余时间作为请求的超时时间。
+    由于run_blocking()会携带contextvars上下文，在I/O线程池中运行的同步抓取器也能感知到任务已被取消
+    """
+    def __init__(self, deadline: float = None) -> None:
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> float:
+        """距离截止时间的剩余秒数，没有截止时间时返回None"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def check(self):
+        """任务已取消或已超过截止时间时抛出DeadlineExceeded"""
+        if self.cancelled:
+            raise DeadlineExceeded('抓取任务已被取消')
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded('抓取任务已超过截止时间')
+
+
+_current_token: contextvars.ContextVar[CancelToken] = contextvars.ContextVar('cancel_token', default=None)
+
+
+def current_token() -> CancelToken:
+    """当前上下文中的取消令牌，没有时返回None"""
+    return _current_token.get()
+
+
+@contextlib.contextmanager
+def cancel_scope(token: CancelToken):
+    """在with语句块内将token绑定为当前上下文的取消令牌"""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def _clamp_timeout(timeout, remaining: float):
+    if isinstance(timeout, tuple):
+        return tuple(_clamp_timeout(i, remaining) for i in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def deadline_bound(send):
+    """包装send(url, **kw)，发送请求前检查当前的取消令牌，并将请求的超时时间限制在剩余时间内"""
+    @functools.wraps(send)
+    def func(url, **kw):
+        token = _current_token.get()
+        if token is not None:
+            token.check()
+            remaining = token.remaining()
+            if remaining is not None:
+                kw['timeout'] = _clamp_timeout(kw.get('timeout'), remaining)
+        return send(url, **kw)
+    return func
+
+
+# 各站点读取超时的下限（秒），键名只要出现在网址的域名中即视为匹配
+_timeout_floors = {}
+
+
+def set_timeout_floor(site: str, seconds: float):
+    """为已知响应很慢的站点设置读取超时的下限，无论样本是否充足、近期耗时如何，自动设置的读取超时都不低于此值"""
+    _timeout_floors[site.lower()] = seconds
+
+
+def _timeout_floor(url: str) -> float:
+    host = urlsplit(url).netloc.lower()
+    return max((v for k, v in _timeout_floors.items() if k in host), default=0)
+
+
+def adaptive_timeout(send):
+    """包装send(url, **kw)，未指定timeout时使用根据站点近期耗时计算的超时时间，并记录本次请求的耗时"""
+    @functools.wraps(send)
+    def func(url, **kw):
+        if kw.get('timeout') is not None:
+            return send(url, **kw)
+        floor = _timeout_floor(url)
+        if latency_tracker is None:
+            kw['timeout'] = max(Cfg().network.timeout.total_seconds(), floor)
+            return send(url, **kw)
+        connect, read = latency_tracker.timeout_for(url)
+        kw['timeout'] = (connect, max(read, floor))
+        start = time.monotonic()
+        try:
+            r = send(url, **kw)
+        except DeadlineExceeded:
+            raise
+        except requests.exceptions.Timeout:
+            # 超时的请求按实际耗时记录样本，以便放宽慢站点之后的超时时间。连接被拒绝、重置等错误很快就会发生，
+            # 并不能说明站点的快慢，记录下来反而会拉低恢复中的站点的超时时间，因此不记录
+            # （如果是因为抓取任务的剩余时间不足而超时，同样不能说明站点的快慢）
+            token = current_token()
+            if not (token and token.remaining() is not None and token.remaining() <= 0):
+                latency_tracker.record(url, time.monotonic() - start)
+            raise
+        # elapsed是从发送请求到解析完响应头的耗时，对于流式下载不包含读取响应体的时间
+        latency_tracker.record(url, r.elapsed.total_seconds())
+        return r
+    return func
+
+
+def rate_limited(send, limiter: RateLimiter = None):
+    """包装send(url, **kw)，使其发出的请求受到按站点的速率限制（limiter默认为按配置创建的rate_limiter）"""
+    if limiter is None and rate_limiter is None:
+        return send
+    @functools.wraps(send)
+    def func(url, **kw):
+        current = limiter or rate_limiter
+        current.acquire(url)
+        r = send(url, **kw)
+        current.feedback(url, r)
+        return r
+    return func
+
+
+def _pooled(method: str):
+    """生成与requests.get/post/head用法相同，但使用session_pool中的连接（并受到速率限制和截止时间约束）的函数"""
+    def func(url, **kw):
+        session = session_pool.get(url, kw.get('proxies'))
+        return getattr(session, method)(url, **kw)
+    func.__name__ = 'pooled_' + method
+    return rate_limited(adaptive_timeout(deadline_bound(proxied(func))))
+
+pooled_get = _pooled('get')
+pooled_post = _pooled('post')
+pooled_head = _pooled('head')
+
+
+def _wait_budget():
+    """等待其他线程中相同的请求完成时，最多等待当前抓取任务的剩余时间"""
+    token = _current_token.get()
+    return token.remaining() if token else None
+
+
+# leader的抓取任务被取消时，其他等待相同请求的调用者应该自行重新请求
+_single_flight = SingleFlight(retry_on=(DeadlineExceeded,)) if Cfg().network.coalesce_requests else None
+
+
+def cached_get(send, url, **kw):
+    """使用send(url, **kw)发送GET请求，启用了网页缓存时优先使用缓存中的响应
+
+    同时发出的相同请求（经由同一个send和同一个代理发出，Cookies和影响网页内容的请求头也都相同）只会发送一次，并共享同一个响应。
+    经由代理池发出的请求在发送时才选择代理，为了使请求在代理间分散、并按代理统计被封禁的情况，这些请求不会被合并
+    """
+    if http_cache is not None:
+        fetch = lambda: http_cache.fetch(url, send, **kw)
     else:
-        proxy = str(Cfg().network.proxy_server)
-        return {'http': proxy, 'https': proxy}
+        fetch = lambda: send(url, **kw)
+    proxies = kw.get('proxies')
+    if _single_flight is None or kw.get('stream') or isinstance(proxies, PoolProxies):
+        return fetch()
+    # send不同时（如普通Session与cloudscraper），UA、Referer、CloudFlare凭据等都可能不同
+    proxy = (proxies or {}).get(urlsplit(url).scheme, '')
+    key = f"{id(send)} {proxy} " + HttpCache.make_key('GET', url, kw.get('headers'), kw.get('cookies'))
+    try:
+        return _single_flight.do(key, fetch, _wait_budget)
+    except TimeoutError:
+        raise DeadlineExceeded(f'等待相同的请求完成时超时: {url}')
+
 
 # 与网络请求相关的功能汇总到一个模块中以方便处理，但是不同站点的抓取器又有自己的需求（针对不同网站
 # 需要使用不同的UA、语言等）。每次都传递参数很麻烦，而且会面临函数参数越加越多的问题。因此添加这个
@@ -45,17 +342,34 @@ class Request():
         self.cookies = {}
 
         self.proxies = read_proxy()
-        self.timeout = Cfg().network.timeout.total_seconds()
+        # 为None时根据站点近期的耗时自动设置超时时间（network.adaptive_timeout）
+        self.timeout = None
         if not use_scraper:
             self.scraper = None
-            self.__get = requests.get
-            self.__post = requests.post
-            self.__head = requests.head
+            self.__get = pooled_get
+            self.__post = pooled_post
+            self.__head = pooled_head
         else:
             self.scraper = cloudscraper.create_scraper()
-            self.__get = self._scraper_monitor(self.scraper.get)
-            self.__post = self._scraper_monitor(self.scraper.post)
-            self.__head = self._scraper_monitor(self.scraper.head)
+            if clearance_store is not None:
+                clearance_store.seed(self.scraper)
+            self.__get = self._wrap_scraper(self.scraper.get)
+            self.__post = self._wrap_scraper(self.scraper.post)
+            self.__head = self._wrap_scraper(self.scraper.head)
+
+    def _wrap_scraper(self, func):
+        return rate_limited(adaptive_timeout(deadline_bound(proxied(self._clearance(self._scraper_monitor(func))))))
+
+    def _clearance(self, func):
+        """使用并保存CloudFlare的通行凭据，使多次运行以及多个会话之间无需重复通过验证"""
+        if clearance_store is None:
+            return func
+        def wrapper(url, **kw):
+            kw['headers'] = clearance_store.prepare(self.scraper, url, kw.get('headers'))
+            r = func(url, **kw)
+            clearance_store.update(self.scraper, url, r)
+            return r
+        return wrapper
 
     def _scraper_monitor(self, func):
         """监控cloudscraper的工作状态，遇到不支持的Challenge时尝试退回常规的requests请求"""
@@ -64,14 +378,17 @@ class Request():
                 return func(*args, **kw)
             except Exception as e:
                 logger.debug(f"无法通过CloudFlare检测: '{e}', 尝试退回常规的requests请求")
+                # 外层已经进行过速率限制，因此直接使用连接池中的Session
+                url = args[0] if args else kw['url']
+                session = session_pool.get(url, kw.get('proxies'))
                 if func == self.scraper.get:
-                    return requests.get(*args, **kw)
+                    return session.get(*args, **kw)
                 else:
-                    return requests.post(*args, **kw)
+                    return session.post(*args, **kw)
         return wrapper
 
     def get(self, url, delay_raise=False):
-        r = self.__get(url,
+        r = cached_get(self.__get, url,
                       headers=self.headers,
                       proxies=self.proxies,
                       cookies=self.cookies,
@@ -107,6 +424,40 @@ class Request():
         return html
 
 
+# requests是阻塞式的库，异步接口将实际的网络请求交给这个线程池执行。线程池中的线程会被复用，
+# 因此即使同时有成百上千个请求在排队，也不会反复地创建和销毁线程
+IO_WORKERS = 32
+_io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='javsp-io')
+
+
+async def run_blocking(func, *args, **kw):
+    """在I/O线程池中执行阻塞的函数（会携带当前的contextvars上下文）"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kw)
+    return await loop.run_in_executor(_io_executor, call)
+
+
+class AsyncRequest():
+    """Request的异步版本，接口与Request保持一致，便于抓取器逐步迁移到异步实现"""
+    def __init__(self, use_scraper=False, request: Request = None) -> None:
+        # 可以直接包装抓取器模块中已有的Request实例，以便共用其headers、cookies等定制（通过self.request修改）
+        self.request = request if request else Request(use_scraper=use_scraper)
+
+    async def get(self, url, delay_raise=False):
+        return await run_blocking(self.request.get, url, delay_raise=delay_raise)
+
+    async def post(self, url, data, delay_raise=False):
+        return await run_blocking(self.request.post, url, data, delay_raise=delay_raise)
+
+    async def head(self, url, delay_raise=True):
+        return await run_blocking(self.request.head, url, delay_raise=delay_raise)
+
+    async def get_html(self, url):
+        r = await self.get(url)
+        return resp2html(r)
+
+
 class DownloadProgressBar(tqdm):
     def update_to(self, b=1, bsize=1, tsize=None):
         if tsize is not None:
@@ -115,13 +466,10 @@ class DownloadProgressBar(tqdm):
 
 
 def request_get(url, cookies={}, timeout=None, delay_raise=False):
-    """获取指定url的原始请求"""
-    if timeout is None:
-        timeout = Cfg().network.timeout.seconds
-    
+    """获取指定url的原始请求（timeout为None时自动设置超时时间）"""
     logger.debug(f"🌐 发送请求: GET {url}")
     start_time = time.time()
-    r = requests.get(url, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
+    r = cached_get(pooled_get, url, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
     elapsed = time.time() - start_time
     
     # 记录响应信息
@@ -138,13 +486,10 @@ def request_get(url, cookies={}, timeout=None, delay_raise=False):
 
 
 def request_post(url, data, cookies={}, timeout=None, delay_raise=False):
-    """向指定url发送post请求"""
-    if timeout is None:
-        timeout = Cfg().network.timeout.seconds
-    
+    """向指定url发送post请求（timeout为None时自动设置超时时间）"""
     logger.debug(f"🌐 发送请求: POST {url}")
     start_time = time.time()
-    r = requests.post(url, data=data, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
+    r = pooled_post(url, data=data, headers=headers, proxies=read_proxy(), cookies=cookies, timeout=timeout)
     elapsed = time.time() - start_time
     
     # 记录响应信息
@@ -156,20 +501,78 @@ def request_post(url, data, cookies={}, timeout=None, delay_raise=False):
     return r
 
 
+# 编码声明缺失或不正确的站点所使用的编码（键名只要出现在网址的域名中即视为匹配）
+SITE_ENCODINGS = {
+    'dl.getchu.com': 'euc-jp',
+    'gyutto.com': 'euc-jp',
+}
+# 不得不检测字符集时，只检测网页开头的这么多字节
+DETECT_PREFIX = 32 * 1024
+_header_charset = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+_meta_charset = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+# lxml的解析器不能同时在多个线程中使用，因此每个线程使用各自的解析器
+_parsers = threading.local()
+
+
+def _valid_encoding(name) -> str:
+    """返回规范化的编码名称，无法识别的编码返回None"""
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    try:
+        return codecs.lookup(name).name if name else None
+    except LookupError:
+        return None
+
+
+def guess_encoding(resp: Response) -> str:
+    """确定网页的编码，依次使用: 站点编码表、响应头中声明的编码、网页开头<meta>中声明的编码，
+    然后检查能否按UTF-8解码，最后才对网页开头的一部分进行字符集检测（而不是检测整个网页）
+    """
+    host = (urlsplit(resp.url or '').hostname or '').lower()
+    for site, encoding in SITE_ENCODINGS.items():
+        if site in host:
+            return encoding
+    match = _header_charset.search(resp.headers.get('Content-Type', ''))
+    if match and _valid_encoding(match.group(1)):
+        return _valid_encoding(match.group(1))
+    head = resp.content[:DETECT_PREFIX]
+    match = _meta_charset.search(head)
+    if match and _valid_encoding(match.group(1)):
+        return _valid_encoding(match.group(1))
+    try:
+        # 使用增量解码器，以免截断处不完整的多字节字符导致误判
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    logger.debug(f"检测网页的字符集: {resp.url}")
+    return _valid_encoding(requests.compat.chardet.detect(head)['encoding']) or 'utf-8'
+
+
 def get_resp_text(resp: Response, encoding=None):
-    """提取Response的文本"""
-    if encoding:
-        resp.encoding = encoding
-    else:
-        resp.encoding = resp.apparent_encoding
+    """提取Response的文本（未指定encoding时通过guess_encoding确定编码）"""
+    resp.encoding = encoding or guess_encoding(resp)
     return resp.text
 
 
-def get_html(url, encoding='utf-8'):
+def parse_html(content: bytes, encoding='utf-8') -> lxml.html.HtmlElement:
+    """将网页的原始数据直接交给lxml解析，省去先解码为str、lxml再重新编码的过程
+
+    libxml2转换其他编码比Python慢，因此非UTF-8编码的网页先由Python转换为UTF-8
+    """
+    if _valid_encoding(encoding) != 'utf-8':
+        content = content.decode(encoding, errors='replace').encode('utf-8')
+    parser = getattr(_parsers, 'utf8', None)
+    if parser is None:
+        parser = _parsers.utf8 = lxml.html.HTMLParser(encoding='utf-8')
+    return lxml.html.fromstring(content, parser=parser)
+
+
+def get_html(url, encoding=None):
     """使用get方法访问指定网页并返回经lxml解析后的document"""
     resp = request_get(url)
-    text = get_resp_text(resp, encoding=encoding)
-    html = lxml.html.fromstring(text)
+    encoding = encoding or guess_encoding(resp)
+    html = parse_html(resp.content, encoding)
     html.make_links_absolute(url, resolve_base_href=True)
     # 清理功能仅应在需要的时候用来调试网页（如prestige），否则可能反过来影响调试（如JavBus）
     # html = cleaner.clean_html(html)
@@ -178,10 +581,10 @@ def get_html(url, encoding='utf-8'):
     return html
 
 
-def resp2html(resp, encoding='utf-8') -> lxml.html.HtmlComment:
-    """将request返回的response转换为经lxml解析后的document"""
-    text = get_resp_text(resp, encoding=encoding)
-    html = lxml.html.fromstring(text)
+def resp2html(resp, encoding=None) -> lxml.html.HtmlComment:
+    """将request返回的response转换为经lxml解析后的document（未指定encoding时通过guess_encoding确定编码）"""
+    encoding = encoding or guess_encoding(resp)
+    html = parse_html(resp.content, encoding)
     html.make_links_absolute(resp.url, resolve_base_href=True)
     # html = cleaner.clean_html(html)
     if hasattr(sys, 'javsp_debug_mode'):
@@ -189,11 +592,74 @@ def resp2html(resp, encoding='utf-8') -> lxml.html.HtmlComment:
     return html
 
 
-def post_html(url, data, encoding='utf-8', cookies={}):
+# 增量解析网页时每次交给解析器的数据量
+PARTIAL_CHUNK = 16 * 1024
+_section_pattern = re.compile(r'^([\w-]+)?(?:#([\w-]+))?((?:\.[\w-]+)*)$')
+
+
+def _section_matcher(section: str):
+    """将'div.video-detail'、'ul#list'形式的区域描述转换为判断元素是否匹配的函数"""
+    match = _section_pattern.match(section)
+    if not match or not any(match.groups()):
+        raise ValueError(f"无法识别的网页区域: '{section}'")
+    tag, id_, classes = match.group(1), match.group(2), set(match.group(3).split('.')) - {''}
+    def matcher(elem) -> bool:
+        if tag and elem.tag != tag:
+            return False
+        if id_ and elem.get('id') != id_:
+            return False
+        return classes.issubset((elem.get('class') or '').split())
+    return matcher
+
+
+def parse_partial_html(chunks, section: str, encoding='utf-8', base_url=None) -> lxml.html.HtmlElement:
+    """逐块解析网页，在section指定的区域（如'div.video-detail'）结束后立即停止，不再解析网页的剩余部分
+
+    返回的仍然是整个网页的根节点，不过只包含到section结束为止的内容；网页中没有section时解析整个网页
+    """
+    matcher = _section_matcher(section)
+    parser = etree.HTMLPullParser(events=('start', 'end'), encoding='utf-8', base_url=base_url)
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    # 与parse_html相同，非UTF-8编码的网页先由Python转换为UTF-8
+    decoder = None
+    if _valid_encoding(encoding) != 'utf-8':
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    target = None
+    for chunk in chunks:
+        if decoder:
+            chunk = decoder.decode(chunk).encode('utf-8')
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if target is None:
+                if event == 'start' and matcher(elem):
+                    target = elem
+            elif event == 'end' and elem is target:
+                return parser.close()
+    if decoder:
+        parser.feed(decoder.decode(b'', final=True).encode('utf-8'))
+    return parser.close()
+
+
+def partial_html(resp: Response, section: str, encoding=None) -> lxml.html.HtmlElement:
+    """resp2html的增量解析版本: 只解析到section指定的区域结束为止（参见parse_partial_html）
+
+    为了节省时间，不会像resp2html那样将网页中所有的链接都转换为绝对地址，需要的链接请使用absolute_url转换。
+    注意resp通常不是流式请求（网页缓存和相同请求的合并都需要完整的响应），此时响应体已经全部下载到内存中，
+    提前结束节省的只是解析和构建文档树的时间，并不能减少网络传输或者内存占用
+    """
+    encoding = encoding or guess_encoding(resp)
+    return parse_partial_html(resp.iter_content(PARTIAL_CHUNK), section, encoding, base_url=resp.url)
+
+
+def absolute_url(node, url: str) -> str:
+    """将从partial_html解析出的网页中获取的链接转换为绝对地址"""
+    return urljoin(node.getroottree().docinfo.URL or '', url)
+
+
+def post_html(url, data, encoding=None, cookies={}):
     """使用post方法访问指定网页并返回经lxml解析后的document"""
     resp = request_post(url, data, cookies=cookies)
-    text = get_resp_text(resp, encoding=encoding)
-    html = lxml.html.fromstring(text)
+    html = parse_html(resp.content, encoding or guess_encoding(resp))
     # jav321提供ed2k形式的资源链接，其中的非ASCII字符可能导致转换失败，因此要先进行处理
     ed2k_tags = html.xpath("//a[starts-with(@href,'ed2k://')]")
     for tag in ed2k_tags:
@@ -207,6 +673,22 @@ def post_html(url, data, encoding='utf-8', cookies={}):
     return html
 
 
+async def async_request_get(url, cookies={}, timeout=None, delay_raise=False):
+    """request_get的异步版本"""
+    return await run_blocking(request_get, url, cookies=cookies, timeout=timeout, delay_raise=delay_raise)
+
+
+async def async_request_post(url, data, cookies={}, timeout=None, delay_raise=False):
+    """request_post的异步版本"""
+    return await run_blocking(request_post, url, data, cookies=cookies, timeout=timeout, delay_raise=delay_raise)
+
+
+async def async_get_html(url, encoding=None):
+    """get_html的异步版本"""
+    resp = await async_request_get(url)
+    return resp2html(resp, encoding=encoding)
+
+
 def dump_xpath_node(node, filename=None):
     """将xpath节点dump到文件"""
     if not filename:
@@ -219,7 +701,7 @@ def dump_xpath_node(node, filename=None):
 def is_connectable(url, timeout=3):
     """测试与指定url的连接"""
     try:
-        r = requests.get(url, headers=headers, timeout=timeout)
+        r = pooled_get(url, headers=headers, timeout=timeout)
         return True
     except requests.exceptions.RequestException as e:
         logger.debug(f"Not connectable: {url}\n" + repr(e))
@@ -227,28 +709,72 @@ def is_connectable(url, timeout=3):
 
 
 def urlretrieve(url, filename=None, reporthook=None, headers=None):
+    """使用requests实现urlretrieve（reporthook的调用方式与urllib.request.urlretrieve相同）"""
+    progress = None
+    if reporthook:
+        progress = lambda done, total: reporthook(done, 1, -1 if total is None else total)
+    _downloader.fetch(url, filename, headers=headers, progress=progress, proxies=read_proxy())
+
+
+_downloader = Downloader(pooled_get, Cfg().network.download.segments, Cfg().network.download.segment_min_size)
+
+
+def _referrer_headers(url):
+    """下载图片等资源时使用的请求头（带有站点的Referer）"""
+    referrer = headers.copy()
+    referrer['referer'] = url[:url.find('/', 8)+1]  # 提取base_url部分
     if "arzon" in url:
-        headers["Referer"] = "https://www.arzon.jp/"
-    """使用requests实现urlretrieve"""
-    # https://blog.csdn.net/qq_38282706/article/details/80253447
-    with contextlib.closing(requests.get(url, headers=headers,
-                                         proxies=read_proxy(), stream=True)) as r:
-        header = r.headers
-        with open(filename, 'wb+') as fp:
-            bs = 1024
-            size = -1
-            blocknum = 0
-            if "content-length" in header:
-                size = int(header["Content-Length"])    # 文件总大小（理论值）
-            if reporthook:                              # 写入前运行一次回调函数
-                reporthook(blocknum, bs, size)
-            for chunk in r.iter_content(chunk_size=1024):
-                if chunk:
-                    fp.write(chunk)
-                    fp.flush()
-                    blocknum += 1
-                    if reporthook:
-                        reporthook(blocknum, bs, size)  # 每写入一次运行一次回调函数
+        referrer['referer'] = "https://www.arzon.jp/"
+    return referrer
+
+
+def probe_image(url, head_size=64*1024):
+    """通过Range请求只获取图片开头的一部分，返回{'url', 'size': 文件大小(未知时为None), 'head': 文件头}"""
+    h = _referrer_headers(url)
+    h['Range'] = f'bytes=0-{head_size-1}'
+    with contextlib.closing(pooled_get(url, headers=h, proxies=read_proxy(), stream=True)) as r:
+        r.raise_for_status()
+        size = None
+        if r.status_code == 206:
+            size = parse_content_range(r.headers.get('Content-Range'))[1]
+        elif 'Content-Length' in r.headers:
+            size = int(r.headers['Content-Length'])
+        # 服务器不支持Range请求时会返回完整的文件，此时也只读取开头的部分
+        head = b''
+        for chunk in r.iter_content(chunk_size=head_size):
+            head += chunk
+            if len(head) >= head_size:
+                break
+    return {'url': url, 'size': size, 'head': head[:head_size]}
+
+
+def probe_images(urls, timeout):
+    """并发地探测多个图片地址，返回{url: probe_image()的结果}（失败或在timeout秒内未完成的地址不在结果中）
+
+    超时后仍未完成的探测会被取消，不会继续占用连接
+    """
+    token = CancelToken(time.monotonic() + timeout)
+    def probe(url):
+        with cancel_scope(token):
+            return probe_image(url)
+    futures = {_io_executor.submit(probe, url): url for url in dict.fromkeys(urls)}
+    done, pending = wait(futures, timeout=timeout)
+    token.cancel()
+    for f in pending:
+        f.cancel()
+    results = {}
+    for f in done:
+        url = futures[f]
+        try:
+            results[url] = f.result()
+        except Exception as e:
+            logger.debug(f"图片地址不可用: {url}: {e!r}")
+    return results
+
+
+def discard_partial(output_path):
+    """删除下载output_path失败后留下的临时文件"""
+    _downloader.discard(output_path)
 
 
 def download(url, output_path, desc=None):
@@ -267,16 +793,15 @@ def download(url, output_path, desc=None):
         desc = url.split('/')[-1]
     
     logger.debug(f"⬇️ 开始下载: {desc} -> {output_path}")
-    referrer = headers.copy()
-    referrer['referer'] = url[:url.find('/', 8)+1]  # 提取base_url部分
+    referrer = _referrer_headers(url)
     with DownloadProgressBar(unit='B', unit_scale=True,
                              miniters=1, desc=desc, leave=False) as t:
-        urlretrieve(url, filename=output_path, reporthook=t.update_to, headers=referrer)
-        info = {k: t.format_dict[k] for k in ('total', 'elapsed', 'rate')}
-        size_mb = info['total'] / 1024 / 1024
-        rate_mb = info['rate'] / 1024 / 1024
-        logger.debug(f"✅ 下载完成: {desc} ({size_mb:.2f}MB), 速度: {rate_mb:.2f}MB/s, 耗时: {info['elapsed']:.2f}秒")
-        return info
+        progress = lambda done, total: t.update_to(done, 1, total)
+        info = _downloader.fetch(url, output_path, headers=referrer, progress=progress, proxies=read_proxy())
+    size_mb = info['total'] / 1024 / 1024
+    rate_mb = info['rate'] / 1024 / 1024
+    logger.debug(f"✅ 下载完成: {desc} ({size_mb:.2f}MB), 速度: {rate_mb:.2f}MB/s, 耗时: {info['elapsed']:.2f}秒")
+    return info
 
 
 def open_in_chrome(url, new=0, autoraise=True):
@@ -0,0 +1,154 @@
+"""录制与回放HTTP请求：录制模式下保存完整的请求与响应，回放模式下不访问网络，直接返回录制的响应
+
+工作在requests的传输层(HTTPAdapter.send)，因此经由连接池、cloudscraper或者抓取器自建的Session发出的请求都会被录制，
+重定向的每一跳也会被分别录制和回放
+"""
+import io
+import gzip
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+import contextlib
+from typing import Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.models import PreparedRequest
+from urllib3 import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+
+__all__ = ['Cassette', 'CassetteMiss', 'use_cassette']
+
+
+logger = logging.getLogger(__name__)
+LIVE = 'live'
+RECORD = 'record'
+REPLAY = 'replay'
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """回放模式下没有录制对应的请求"""
+
+
+def _body_bytes(body) -> bytes:
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    if isinstance(body, bytes):
+        return body
+    # 文件等流式的请求体无法录制，仅按类型区分
+    return repr(type(body)).encode('utf-8')
+
+
+class Cassette():
+    """保存录制的请求与响应的文件（gzip压缩的JSON）
+
+    Args:
+        path (str): 文件路径
+        mode (str): 'record'表示录制（覆盖已有的录制内容），'replay'表示回放，'live'表示正常访问网络（仅进行统计）
+    """
+    def __init__(self, path: str, mode: str = REPLAY) -> None:
+        if mode not in (LIVE, RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.interactions: List[dict] = []
+        # 统计: 请求次数以及在传输层花费的时间
+        self.fetch_count = 0
+        self.fetch_time = 0.0
+        self._played: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if mode == REPLAY:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.interactions = json.load(f)['interactions']
+
+    @staticmethod
+    def match_key(method: str, url: str, body) -> str:
+        """匹配请求时使用的键: 请求方法、URL和请求体（不包含请求头，以免UA、Cookies等的变化导致无法回放）"""
+        digest = hashlib.sha1(_body_bytes(body)).hexdigest()
+        return f"{method.upper()} {url} {digest}"
+
+    def save(self):
+        with self._lock:
+            data = {'version': 1, 'interactions': self.interactions}
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    def record(self, request: PreparedRequest, resp: requests.Response):
+        # 保存的是解压后的响应体，因此去掉与压缩有关的响应头
+        headers = {k: v for k, v in resp.headers.items()
+                   if k.lower() not in ('content-encoding', 'transfer-encoding', 'content-length')}
+        headers['Content-Length'] = str(len(resp.content))
+        item = {
+            'key': self.match_key(request.method, request.url, request.body),
+            'request': {
+                'method': request.method,
+                'url': request.url,
+                'headers': dict(request.headers),
+                'body': base64.b64encode(_body_bytes(request.body)).decode('ascii'),
+            },
+            'response': {
+                'status': resp.status_code,
+                'reason': resp.reason,
+                'headers': headers,
+                'body': base64.b64encode(resp.content).decode('ascii'),
+            },
+        }
+        with self._lock:
+            self.interactions.append(item)
+
+    def play(self, request: PreparedRequest) -> dict:
+        """按录制时的顺序返回与请求匹配的响应（相同请求的次数多于录制时，重复返回最后一次的响应）"""
+        key = self.match_key(request.method, request.url, request.body)
+        with self._lock:
+            matched = [i for i in self.interactions if i['key'] == key]
+            if not matched:
+                raise CassetteMiss(f"没有录制此请求: {request.method} {request.url}")
+            index = self._played.get(key, 0)
+            self._played[key] = index + 1
+            return matched[min(index, len(matched) - 1)]['response']
+
+
+def _build_response(adapter: HTTPAdapter, request: PreparedRequest, data: dict) -> requests.Response:
+    raw = HTTPResponse(
+        body=io.BytesIO(base64.b64decode(data['body'])),
+        headers=HTTPHeaderDict(data['headers']),
+        status=data['status'],
+        reason=data['reason'],
+        preload_content=False,
+        decode_content=False,
+    )
+    return adapter.build_response(request, raw)
+
+
+@contextlib.contextmanager
+def use_cassette(cassette: Cassette):
+    """在此期间，所有经由requests发出的请求都会被录制或者回放（作用于整个进程）"""
+    original_send = HTTPAdapter.send
+
+    def send(adapter, request, **kw):
+        start = time.perf_counter()
+        try:
+            if cassette.mode == REPLAY:
+                return _build_response(adapter, request, cassette.play(request))
+            resp = original_send(adapter, request, **kw)
+            if cassette.mode == RECORD:
+                cassette.record(request, resp)
+            return resp
+        finally:
+            with cassette._lock:
+                cassette.fetch_count += 1
+                cassette.fetch_time += time.perf_counter() - start
+
+    HTTPAdapter.send = send
+    try:
+        yield cassette
+    finally:
+        HTTPAdapter.send = original_send
+        if cassette.mode == RECORD:
+            cassette.save()
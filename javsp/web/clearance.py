@@ -0,0 +1,102 @@
+"""保存CloudFlare的通行凭据（cf_clearance），在多次运行以及多个cloudscraper会话之间复用，避免重复通过验证"""
+import time
+import logging
+from typing import Optional
+from urllib.parse import urlsplit
+
+from requests import Session
+from requests.models import Response
+
+from javsp.config import Cfg
+from javsp.store import JsonStore
+
+
+__all__ = ['ClearanceStore', 'clearance_store']
+
+
+logger = logging.getLogger(__name__)
+# 通过CloudFlare验证后获得的Cookies
+CLEARANCE_COOKIES = ('cf_clearance',)
+SESSION_TTL = 30 * 60
+
+
+class ClearanceStore():
+    """按域名保存通行凭据: {域名: {'cookies': {名称: 值}, 'user_agent': 获得凭据时使用的UA}}，有效期与Cookies一致
+
+    CloudFlare会校验cf_clearance与User-Agent是否匹配，因此使用凭据时必须同时使用与之配对的UA
+    """
+    def __init__(self, store: JsonStore) -> None:
+        self.store = store
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlsplit(url).hostname or '').lower()
+
+    def find(self, url: str):
+        """查找适用于url的凭据，返回(域名, 凭据)，没有时返回(None, None)"""
+        host = self._host(url)
+        for domain, item in self.store.items():
+            if host == domain or host.endswith('.' + domain):
+                return domain, item
+        return None, None
+
+    def seed(self, session: Session):
+        """将所有仍然有效的凭据添加到会话中（创建新的会话时调用）"""
+        for domain, item in self.store.items():
+            self._set_cookies(session, domain, item)
+
+    @staticmethod
+    def _set_cookies(session: Session, domain: str, item: dict):
+        # 使用与原Cookie相同的domain，以免会话中出现两个同名的Cookie
+        cookie_domain = item.get('domain', '.' + domain)
+        for name, value in item['cookies'].items():
+            if session.cookies.get(name, domain=cookie_domain) != value:
+                session.cookies.set(name, value, domain=cookie_domain, path='/', expires=item.get('expires'))
+
+    def prepare(self, session: Session, url: str, headers: Optional[dict]) -> Optional[dict]:
+        """发送请求前调用: 使用其他会话（或之前的运行）获得的凭据，返回应使用的请求头"""
+        domain, item = self.find(url)
+        if item is None:
+            return headers
+        self._set_cookies(session, domain, item)
+        headers = dict(headers or {})
+        headers['User-Agent'] = item['user_agent']
+        return headers
+
+    def update(self, session: Session, url: str, resp: Response):
+        """收到响应后调用: 如果会话获得了新的凭据，则将其保存下来"""
+        host = self._host(url)
+        found = {}
+        expires = None
+        for cookie in session.cookies:
+            domain = cookie.domain.lstrip('.').lower()
+            if cookie.name in CLEARANCE_COOKIES and (host == domain or host.endswith('.' + domain)):
+                found[cookie.name] = cookie.value
+                if cookie.expires:
+                    expires = cookie.expires if expires is None else min(expires, cookie.expires)
+                key, cookie_domain = domain, cookie.domain
+        if not found:
+            return
+        saved = self.store.get(key)
+        if saved and saved['cookies'] == found:
+            return
+        # 没有过期时间的凭据只在会话期间有效，保守地只保留较短的时间
+        ttl = expires - time.time() if expires else SESSION_TTL
+        if ttl <= 0:
+            return
+        user_agent = resp.request.headers.get('User-Agent') if resp.request else None
+        if not user_agent:
+            user_agent = session.headers.get('User-Agent')
+        logger.debug(f"保存{key}的CloudFlare通行凭据，有效期{ttl/60:.0f}分钟")
+        item = {'cookies': found, 'user_agent': user_agent, 'domain': cookie_domain, 'expires': expires}
+        self.store.set(key, item, ttl=ttl)
+
+
+def _create_store() -> Optional[ClearanceStore]:
+    if not Cfg().network.reuse_cf_clearance:
+        return None
+    return ClearanceStore(JsonStore('cf_clearance.json'))
+
+
+# 未启用时为None
+clearance_store = _create_store()
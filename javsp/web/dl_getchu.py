@@ -2,7 +2,7 @@
 import re
 import logging
 
-from javsp.web.base import resp2html, request_get
+from javsp.web.base import Selectors, resp2html, request_get
 from javsp.web.exceptions import *
 from javsp.datatype import MovieInfo
 
@@ -11,17 +11,28 @@ logger = logging.getLogger(__name__)
 # https://dl.getchu.com/i/item4045373
 base_url = 'https://dl.getchu.com'
 # dl.getchu用utf-8会乱码
-base_encode = 'euc-jp'
+sel = Selectors('dl_getchu',
+    title_table="//form[@action='https://dl.getchu.com/cart/']/div/table[2]",
+    title_rows=".//tr",
+    title_cells=".//td/div",
+    cover="//img[contains(@src, concat($id, 'top.jpg'))]",
+    preview_pics="//img[contains(@src, concat($id, '_'))]",
+    info_table="//form[@action='https://dl.getchu.com/cart/']/div/table[3]",
+    info_rows=".//table/tr",
+    row_key="td[@class='bluetext']/text()",
+    row_links="td[2]/a",
+    row_text="td[2]/text()",
+)
 
 
 def get_movie_title(html):
-    container = html.xpath("//form[@action='https://dl.getchu.com/cart/']/div/table[2]")
+    container = sel.title_table(html)
     if len(container) > 0:
         container = container[0]
-    rows = container.xpath('.//tr')
+    rows = sel.title_rows(container)
     title = ''
     for row in rows:
-        for cell in row.xpath('.//td/div'):
+        for cell in sel.title_cells(row):
             # 获取单元格文本内容
             if cell.text:
                 title = str(cell.text).strip()
@@ -30,7 +41,7 @@ def get_movie_title(html):
 
 def get_movie_img(html, getchu_id):
     img_src = ''
-    container = html.xpath(f'//img[contains(@src, "{getchu_id}top.jpg")]')
+    container = sel.cover(html, id=getchu_id)
     if len(container) > 0:
         container = container[0]
         img_src = container.get('src')
@@ -39,7 +50,7 @@ def get_movie_img(html, getchu_id):
 
 def get_movie_preview(html, getchu_id):
     preview_pics = []
-    container = html.xpath(f'//img[contains(@src, "{getchu_id}_")]')
+    container = sel.preview_pics(html, id=getchu_id)
     if len(container) > 0:
         for c in container:
             preview_pics.append(c.get('src'))
@@ -59,24 +70,24 @@ def parse_data(movie: MovieInfo):
     r = request_get(url, delay_raise=True)
     if r.status_code == 404:
         raise MovieNotFoundError(__name__, movie.dvdid)
-    html = resp2html(r, base_encode)
-    container = html.xpath("//form[@action='https://dl.getchu.com/cart/']/div/table[3]")
+    html = resp2html(r)
+    container = sel.info_table(html)
     if len(container) > 0:
         container = container[0]
     # 将表格提取为键值对
-    rows = container.xpath('.//table/tr')
+    rows = sel.info_rows(container)
     kv_rows = [i for i in rows if len(i) == 2]
     data = {}
     for row in kv_rows:
         # 获取单元格文本内容
-        key = row.xpath("td[@class='bluetext']/text()")[0]
+        key = sel.row_key(row)[0]
         # 是否包含a标签: 有的属性是用<a>表示的，不是text
-        a_tags = row.xpath("td[2]/a")
+        a_tags = sel.row_links(row)
         if a_tags:
             value = [i.text for i in a_tags]
         else:
             # 获取第2个td标签的内容（下标从1开始计数）
-            value = row.xpath("td[2]/text()")
+            value = sel.row_text(row)
         data[key] = value
 
     for key, value in data.items():
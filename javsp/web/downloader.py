@@ -0,0 +1,224 @@
+"""下载引擎：大块缓冲读取、临时文件+原子重命名、断点续传以及大文件的分段并行下载"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+import contextlib
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+__all__ = ['Downloader', 'DownloadError', 'parse_content_range']
+
+
+logger = logging.getLogger(__name__)
+# 每次从连接中读取并写入文件的数据块大小
+CHUNK_SIZE = 256 * 1024
+# 下载过程中使用的临时文件的后缀，下载完成后才重命名为目标文件
+PART_SUFFIX = '.part'
+
+
+class DownloadError(requests.exceptions.RequestException):
+    """下载的数据不完整等错误"""
+
+
+def parse_content_range(value: str):
+    """解析'bytes start-end/total'，返回(start, total)，total未知时为None"""
+    match = re.match(r'bytes\s+(\d+)-\d+/(\d+|\*)', value or '')
+    if not match:
+        return None, None
+    start, total = match.groups()
+    return int(start), (None if total == '*' else int(total))
+
+
+def _validator(headers) -> Optional[str]:
+    """从响应头中获取可用于If-Range的校验值（弱ETag不能用于If-Range）"""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+def _meta_path(part: str) -> str:
+    """与临时文件一起保存的下载地址和资源校验值，用于确认断点续传时服务器上的资源没有变化"""
+    return part + '.json'
+
+
+def _load_meta(part: str) -> dict:
+    try:
+        with open(_meta_path(part), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_meta(part: str, url: str, validator: Optional[str]):
+    with open(_meta_path(part), 'wt', encoding='utf-8') as f:
+        json.dump({'url': url, 'validator': validator}, f)
+
+
+def _remove_part(part: str):
+    for path in (part, _meta_path(part)):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+class _Progress():
+    """线程安全的进度统计，按时间间隔节流回调，避免每读取一个数据块就刷新一次进度条"""
+    def __init__(self, callback: Optional[Callable[[int, int], None]], total: int = None,
+                 done: int = 0, interval: float = 0.2) -> None:
+        self.callback = callback
+        self.total = total
+        self.done = done
+        self.interval = interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, n: int):
+        with self._lock:
+            self.done += n
+            now = time.monotonic()
+            if self.callback and now - self._last >= self.interval:
+                self._last = now
+                self.callback(self.done, self.total)
+
+    def finish(self):
+        if self.callback:
+            self.callback(self.done, self.total)
+
+
+class Downloader():
+    """下载器
+
+    Args:
+        get: 发送GET请求的函数，用法与requests.get相同
+        segments: 大文件分段并行下载时的分段数（为1时不分段）
+        segment_min_size: 文件大小达到此值（字节）且服务器支持Range请求时才分段下载
+    """
+    def __init__(self, get: Callable[..., requests.Response], segments: int = 4,
+                 segment_min_size: int = 4*1024*1024) -> None:
+        self.get = get
+        self.segments = segments
+        self.segment_min_size = segment_min_size
+        self._executor = ThreadPoolExecutor(max_workers=max(1, segments), thread_name_prefix='javsp-dl')
+
+    def fetch(self, url: str, output_path: str, headers: dict = None,
+              progress: Callable[[int, int], None] = None, **kw) -> dict:
+        """下载url到output_path，返回{'total': 字节数, 'elapsed': 耗时, 'rate': 平均速度}
+
+        下载中断时会保留临时文件以及资源的校验值，再次下载同一url时通过带有If-Range的Range请求从断点处继续下载
+        （服务器上的资源已经变化时服务器会返回完整的内容）。临时文件来自其他url或者没有校验值时，会删除后重新下载
+        """
+        start_time = time.time()
+        part = output_path + PART_SUFFIX
+        headers = dict(headers or {})
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        meta = _load_meta(part) if offset else {}
+        if offset and (meta.get('url') != url or not meta.get('validator')):
+            logger.debug(f"临时文件无法确认与要下载的资源一致，重新下载: {part}")
+            _remove_part(part)
+            offset = 0
+        req_headers = headers.copy()
+        if offset:
+            req_headers['Range'] = f'bytes={offset}-'
+            req_headers['If-Range'] = meta['validator']
+        with contextlib.closing(self.get(url, headers=req_headers, stream=True, **kw)) as r:
+            if offset and r.status_code == 416:
+                # 临时文件已经包含了完整的内容（或者已经失效），删除后重新下载
+                r.close()
+                _remove_part(part)
+                return self.fetch(url, output_path, headers, progress, **kw)
+            r.raise_for_status()
+            if offset and r.status_code == 206:
+                start, total = parse_content_range(r.headers.get('Content-Range'))
+                if start != offset:
+                    raise DownloadError(f"服务器返回的数据范围与请求的不一致: {r.headers.get('Content-Range')}")
+                validator = _validator(r.headers)
+                if validator and validator != meta['validator']:
+                    # 服务器忽略了If-Range，返回的是已经变化的资源的一部分，不能与临时文件拼接
+                    r.close()
+                    _remove_part(part)
+                    raise DownloadError(f"资源已经变化，无法继续下载: {url}")
+                logger.debug(f"从断点处继续下载: {offset}字节, {url}")
+            else:
+                # 服务器不支持Range请求（或者资源已经变化），只能从头开始下载
+                offset = 0
+                _save_meta(part, url, _validator(r.headers))
+                total = int(r.headers['Content-Length']) if 'Content-Length' in r.headers else None
+                # gzip等压缩过的响应，Content-Length与实际写入的数据长度不同
+                if r.headers.get('Content-Encoding', 'identity') != 'identity':
+                    total = None
+            stats = _Progress(progress, total, offset)
+            can_split = (offset == 0 and total and self.segments > 1 and total >= self.segment_min_size
+                         and r.headers.get('Accept-Ranges') == 'bytes')
+            if can_split:
+                r.close()
+                validator = _validator(r.headers)
+                if validator:
+                    # 下载过程中资源发生变化时，服务器会返回完整的内容而不是分段数据，从而不会拼接出错误的文件
+                    headers['If-Range'] = validator
+                self._fetch_segments(url, part, total, headers, stats, **kw)
+            else:
+                with open(part, 'ab' if offset else 'wb') as fp:
+                    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                        fp.write(chunk)
+                        stats.add(len(chunk))
+        stats.finish()
+        size = os.path.getsize(part)
+        if total is not None and size != total:
+            raise DownloadError(f"下载的数据不完整: {size}/{total}字节: {url}")
+        os.replace(part, output_path)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(_meta_path(part))
+        elapsed = time.time() - start_time
+        downloaded = size - (offset or 0)
+        return {'total': size, 'elapsed': elapsed, 'rate': downloaded / elapsed if elapsed > 0 else 0}
+
+    @staticmethod
+    def discard(output_path: str):
+        """删除下载output_path时留下的临时文件（不再需要断点续传时调用）"""
+        _remove_part(output_path + PART_SUFFIX)
+
+    def _fetch_segments(self, url: str, part: str, total: int, headers: dict, stats: _Progress, **kw):
+        """将文件分为多段并行下载，各段直接写入临时文件中对应的位置"""
+        logger.debug(f"分{self.segments}段并行下载: {total}字节, {url}")
+        with open(part, 'wb') as fp:
+            fp.truncate(total)
+        size = -(-total // self.segments)
+        ranges = [(i, min(i + size, total) - 1) for i in range(0, total, size)]
+
+        def fetch_range(start: int, end: int):
+            h = headers.copy()
+            h['Range'] = f'bytes={start}-{end}'
+            with contextlib.closing(self.get(url, headers=h, stream=True, **kw)) as r:
+                r.raise_for_status()
+                if r.status_code != 206 or parse_content_range(r.headers.get('Content-Range'))[0] != start:
+                    raise DownloadError(f"服务器未按请求返回分段数据: {url}")
+                pos = start
+                with open(part, 'r+b') as fp:
+                    fp.seek(start)
+                    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                        fp.write(chunk)
+                        pos += len(chunk)
+                        stats.add(len(chunk))
+                if pos != end + 1:
+                    raise DownloadError(f"分段数据不完整: {start}-{end}: {url}")
+
+        futures = [self._executor.submit(fetch_range, *i) for i in ranges]
+        try:
+            for f in futures:
+                f.result()
+        except Exception:
+            # 分段下载的临时文件中间可能有空洞，无法用于断点续传
+            for f in futures:
+                f.cancel()
+            for f in futures:
+                with contextlib.suppress(Exception):
+                    f.result()
+            _remove_part(part)
+            raise
+
@@ -7,7 +7,7 @@ import logging
 from typing import Dict, List, Tuple
 
 
-from javsp.web.base import Request, resp2html
+from javsp.web.base import Request, Selectors, absolute_url, partial_html, resp2html
 from javsp.web.exceptions import *
 from javsp.config import Cfg
 from javsp.datatype import MovieInfo
@@ -19,6 +19,29 @@ base_url = 'https://www.dmm.co.jp'
 request = Request()
 request.cookies = {'age_check_done': '1'}
 request.headers['Accept-Language'] = 'ja,en-US;q=0.9'
+# 注意: 浏览器在渲染时会自动加上了'tbody'字段，但是原始html网页中并没有，因此xpath解析时还是要按原始网页的来
+sel = Selectors('fanza',
+    search_result="//ul[@id='list']/li/div/p/a/@href",
+    container="//table[@class='mg-b12']/tr/td",
+    # 信息表格中字段名所在的单元格（如'品番：'），字段值位于其后的单元格中
+    field_names="//td[contains(text(), '：')]",
+    field="following-sibling::td/text()",
+    field_link="following-sibling::td/a/text()",
+    field_img="following-sibling::td/img/@src",
+    videoa_genre="following-sibling::td/a[contains(@href,'?keyword=') or contains(@href,'article=keyword')]",
+    anime_genre="following-sibling::td/a[contains(@href,'article=keyword')]",
+    videoa_title="//div[@class='hreview']/h1/text()",
+    videoa_cover="//div[@id='sample-video']/a/@href",
+    videoa_actress="//span[@id='performer']/a/text()",
+    videoa_plot="//div[contains(@class, 'mg-b20 lh4')]/text()",
+    videoa_preview_pics="//a[@name='sample-image']/img/@src",
+    review_average="//p[@class='d-review__average']/strong/text()",
+    player_script="//script[contains(text(),'getElementById(\"dmmplayer\")')]/text()",
+    anime_title="//h1[@id='title']/text()",
+    anime_cover="//img[@name='package-image']/@src",
+    anime_plot="//div[@class='mg-b20 lh4']/p",
+    anime_preview_pics="//a[@name='sample-image']/img/@data-lazy",
+)
 
 
 _PRODUCT_PRIORITY = {'digital': 10, 'mono': 5, 'monthly': 2, 'rental': 1}
@@ -30,14 +53,28 @@ def sort_search_result(result: List[Dict]):
     return sorted_result
 
 
+def info_fields(html) -> Dict[str, list]:
+    """只遍历一次网页，找出信息表格中所有字段名所在的单元格: {字段名: [单元格]}"""
+    fields = {}
+    for td in sel.field_names(html):
+        fields.setdefault(td.text, []).append(td)
+    return fields
+
+
+def field_values(fields: Dict[str, list], name: str, selector) -> list:
+    """从字段名所在的单元格出发，获取字段的值（字段不存在时为空列表）"""
+    return [i for td in fields.get(name, ()) for i in selector(td)]
+
+
 def get_urls_of_cid(cid: str) -> Tuple[str, str]:
     """搜索cid可能的影片URL"""
     r = request.get(f"https://www.dmm.co.jp/search/?redirect=1&enc=UTF-8&category=&searchstr={cid}&commit.x=0&commit.y=0")
     if r.status_code == 404:
         raise MovieNotFoundError(__name__, cid)
     r.raise_for_status()
-    html = resp2html_wrapper(r)
-    result = html.xpath("//ul[@id='list']/li/div/p/a/@href")
+    # 搜索结果之后的筛选、分页等内容不需要解析
+    html = resp2html_wrapper(r, section='ul#list')
+    result = [absolute_url(html, i) for i in sel.search_result(html)]
     parsed_result = {}
     for url in result:
         items = url.split('/')
@@ -58,8 +95,8 @@ def get_urls_of_cid(cid: str) -> Tuple[str, str]:
     return sorted_result
 
 
-def resp2html_wrapper(resp):
-    html = resp2html(resp)
+def resp2html_wrapper(resp, section=None):
+    html = partial_html(resp, section) if section else resp2html(resp)
     if 'not available in your region' in html.text_content():
         raise SiteBlocked('FANZA不允许从当前IP所在地区访问，请检查你的网络和代理服务器设置')
     elif '/login/' in resp.url:
@@ -99,50 +136,50 @@ def parse_data(movie: MovieInfo):
 
 def parse_videoa_page(movie: MovieInfo, html):
     """解析AV影片的页面布局"""
-    title = html.xpath("//div[@class='hreview']/h1/text()")[0]
-    # 注意: 浏览器在渲染时会自动加上了'tbody'字段，但是原始html网页中并没有，因此xpath解析时还是要按原始网页的来
-    container = html.xpath("//table[@class='mg-b12']/tr/td")[0]
-    cover = container.xpath("//div[@id='sample-video']/a/@href")[0]
+    title = sel.videoa_title(html)[0]
+    container = sel.container(html)[0]
+    fields = info_fields(html)
+    cover = sel.videoa_cover(container)[0]
     # 采用'配信開始日'作为发布日期: https://www.zhihu.com/question/57513172/answer/153219083
-    date_tag = container.xpath("//td[text()='配信開始日：']/following-sibling::td/text()")
+    date_tag = field_values(fields, '配信開始日：', sel.field)
     if date_tag:
         movie.publish_date = date_tag[0].strip().replace('/', '-')
-    duration_str = container.xpath("//td[text()='収録時間：']/following-sibling::td/text()")[0].strip()
+    duration_str = field_values(fields, '収録時間：', sel.field)[0].strip()
     match = re.search(r'\d+', duration_str)
     if match:
         movie.duration = match.group(0)
     # 女优、导演、系列：字段不存在时，匹配将得到空列表。暂未发现有名字不显示在a标签中的情况
-    actress = container.xpath("//span[@id='performer']/a/text()")
-    director_tag = container.xpath("//td[text()='監督：']/following-sibling::td/a/text()")
+    actress = sel.videoa_actress(container)
+    director_tag = field_values(fields, '監督：', sel.field_link)
     if director_tag:
         movie.director = director_tag[0].strip()
-    serial_tag = container.xpath("//td[text()='シリーズ：']/following-sibling::td/a/text()")
+    serial_tag = field_values(fields, 'シリーズ：', sel.field_link)
     if serial_tag:
         movie.serial = serial_tag[0].strip()
-    producer_tag = container.xpath("//td[text()='メーカー：']/following-sibling::td/a/text()")
+    producer_tag = field_values(fields, 'メーカー：', sel.field_link)
     if producer_tag:
         movie.producer = producer_tag[0].strip()
     # label: 大意是某个系列策划用同样的番号，例如ABS打头的番号label是'ABSOLUTELY PERFECT'，暂时用不到
-    # label_tag = container.xpath("//td[text()='レーベル：']/following-sibling::td/a/text()")
+    # label_tag = field_values(fields, 'レーベル：', sel.field_link)
     # if label_tag:
     #     label = label_tag[0].strip()
     # fanza会把促销信息也写进genre……因此要根据tag指向的链接类型进行筛选
-    genre_tags = container.xpath("//td[text()='ジャンル：']/following-sibling::td/a[contains(@href,'?keyword=') or contains(@href,'article=keyword')]")
+    genre_tags = field_values(fields, 'ジャンル：', sel.videoa_genre)
     genre, genre_id = [], []
     for tag in genre_tags:
         genre.append(tag.text.strip())
         genre_id.append(tag.get('href').split('=')[-1].strip('/'))
-    cid = container.xpath("//td[text()='品番：']/following-sibling::td/text()")[0].strip()
-    plot = container.xpath("//div[contains(@class, 'mg-b20 lh4')]/text()")[0].strip()
-    preview_pics = container.xpath("//a[@name='sample-image']/img/@src")
-    score_tag = container.xpath("//p[@class='d-review__average']/strong/text()")
+    cid = field_values(fields, '品番：', sel.field)[0].strip()
+    plot = sel.videoa_plot(container)[0].strip()
+    preview_pics = sel.videoa_preview_pics(container)
+    score_tag = sel.review_average(container)
     if score_tag:
         match = re.search(r'\d+', score_tag[0].strip())
         if match:
             score = float(match.group()) * 2
             movie.score = f'{score:.2f}'
     else:
-        score_img = container.xpath("//td[text()='平均評価：']/following-sibling::td/img/@src")[0]
+        score_img = field_values(fields, '平均評価：', sel.field_img)[0]
         movie.score = int(score_img.split('/')[-1].split('.')[0]) # 00, 05 ... 50
     
     if Cfg().crawler.hardworking:
@@ -150,7 +187,7 @@ def parse_videoa_page(movie: MovieInfo, html):
         video_url = f'{base_url}/service/digitalapi/-/html5_player/=/cid={movie.cid}'
         html2 = request.get_html(video_url)
         # 目前用到js脚本的地方不多，所以不使用专门的js求值模块，先用正则提取文本然后用json解析数据
-        script = html2.xpath("//script[contains(text(),'getElementById(\"dmmplayer\")')]/text()")[0].strip()
+        script = sel.player_script(html2)[0].strip()
         match = re.search(r'\{.*\}', script)
         # 主要是为了捕捉json.loads的异常，但是也借助try-except判断是否正则表达式是否匹配
         try:
@@ -175,29 +212,30 @@ def parse_videoa_page(movie: MovieInfo, html):
 
 def parse_anime_page(movie: MovieInfo, html):
     """解析动画影片的页面布局"""
-    title = html.xpath("//h1[@id='title']/text()")[0]
-    container = html.xpath("//table[@class='mg-b12']/tr/td")[0]
-    cover = container.xpath("//img[@name='package-image']/@src")[0]
-    date_str = container.xpath("//td[text()='発売日：']/following-sibling::td/text()")[0].strip()
+    title = sel.anime_title(html)[0]
+    container = sel.container(html)[0]
+    fields = info_fields(html)
+    cover = sel.anime_cover(container)[0]
+    date_str = field_values(fields, '発売日：', sel.field)[0].strip()
     publish_date = date_str.replace('/', '-')
-    duration_tag = container.xpath("//td[text()='収録時間：']/following-sibling::td/text()")
+    duration_tag = field_values(fields, '収録時間：', sel.field)
     if duration_tag:
         movie.duration = duration_tag[0].strip().replace('分', '')
-    serial_tag = container.xpath("//td[text()='シリーズ：']/following-sibling::td/a/text()")
+    serial_tag = field_values(fields, 'シリーズ：', sel.field_link)
     if serial_tag:
         movie.serial = serial_tag[0].strip()
-    producer_tag = container.xpath("//td[text()='メーカー：']/following-sibling::td/a/text()")
+    producer_tag = field_values(fields, 'メーカー：', sel.field_link)
     if producer_tag:
         movie.producer = producer_tag[0].strip()
-    genre_tags = container.xpath("//td[text()='ジャンル：']/following-sibling::td/a[contains(@href,'article=keyword')]")
+    genre_tags = field_values(fields, 'ジャンル：', sel.anime_genre)
     genre, genre_id = [], []
     for tag in genre_tags:
         genre.append(tag.text.strip())
         genre_id.append(tag.get('href').split('=')[-1].strip('/'))
-    cid = container.xpath("//td[text()='品番：']/following-sibling::td/text()")[0].strip()
-    plot = container.xpath("//div[@class='mg-b20 lh4']/p")[0].text_content().strip()
-    preview_pics = container.xpath("//a[@name='sample-image']/img/@data-lazy")
-    score_img = container.xpath("//td[text()='平均評価：']/following-sibling::td/img/@src")[0]
+    cid = field_values(fields, '品番：', sel.field)[0].strip()
+    plot = sel.anime_plot(container)[0].text_content().strip()
+    preview_pics = sel.anime_preview_pics(container)
+    score_img = field_values(fields, '平均評価：', sel.field_img)[0]
     score = int(score_img.split('/')[-1].split('.')[0]) # 00, 05 ... 50
 
     movie.cid = cid
@@ -2,7 +2,7 @@
 import logging
 
 
-from javsp.web.base import get_html, request_get, resp2html
+from javsp.web.base import Selectors, get_html, request_get, resp2html
 from javsp.web.exceptions import *
 from javsp.config import Cfg
 from javsp.lib import strftime_to_minutes
@@ -11,16 +11,32 @@ from javsp.datatype import MovieInfo
 
 logger = logging.getLogger(__name__)
 base_url = 'https://adult.contents.fc2.com'
+sel = Selectors('fc2',
+    reviews="//ul[@class='items_comment_headerReviewInArea']/li",
+    review_score="div/span/text()",
+    review_votes="span",
+    container="//div[@class='items_article_left']",
+    title="//div[@class='items_article_headerInfo']/h3/text()",
+    thumb="//div[@class='items_article_MainitemThumb']",
+    thumb_pic="span/img/@src",
+    duration="span/p[@class='items_article_info']/text()",
+    producer="//li[text()='by ']/a/text()",
+    genre="//a[@class='tag tagTag']/text()",
+    publish_date="//div[@class='items_article_Releasedate']/p/text()",
+    preview_pics="//ul[@data-feed='sample-images']/li/a/@href",
+    desc_frame="//section[@class='items_article_Contents']/iframe/@src",
+    score_stars="//a[@class='items_article_Stars']/p/span/@class",
+)
 
 
 def get_movie_score(fc2_id):
     """通过评论数据来计算FC2的影片评分（10分制），无法获得评分时返回None"""
     html = get_html(f'{base_url}/article/{fc2_id}/review')
-    review_tags = html.xpath("//ul[@class='items_comment_headerReviewInArea']/li")
+    review_tags = sel.reviews(html)
     reviews = {}
     for tag in review_tags:
-        score = int(tag.xpath("div/span/text()")[0])
-        vote = int(tag.xpath("span")[0].text_content())
+        score = int(sel.review_score(tag)[0])
+        vote = int(sel.review_votes(tag)[0].text_content())
         reviews[score] = vote
     total_votes = sum(reviews.values())
     if (total_votes >= 2):   # 至少也该有两个人评价才有参考意义一点吧
@@ -42,23 +58,23 @@ def parse_data(movie: MovieInfo):
     if '/id.fc2.com/' in resp.url:
         raise SiteBlocked('FC2要求当前IP登录账号才可访问，请尝试更换为日本IP')
     html = resp2html(resp)
-    container = html.xpath("//div[@class='items_article_left']")
+    container = sel.container(html)
     if len(container) > 0:
         container = container[0]
     else:
         raise MovieNotFoundError(__name__, movie.dvdid)
     # FC2 标题增加反爬乱码，使用数组合并标题
-    title_arr = container.xpath("//div[@class='items_article_headerInfo']/h3/text()")
+    title_arr = sel.title(container)
     title = ''.join(title_arr)
-    thumb_tag = container.xpath("//div[@class='items_article_MainitemThumb']")[0]
-    thumb_pic = thumb_tag.xpath("span/img/@src")[0]
-    duration_str = thumb_tag.xpath("span/p[@class='items_article_info']/text()")[0]
+    thumb_tag = sel.thumb(container)[0]
+    thumb_pic = sel.thumb_pic(thumb_tag)[0]
+    duration_str = sel.duration(thumb_tag)[0]
     # FC2没有制作商和发行商的区分，作为个人市场，影片页面的'by'更接近于制作商
-    producer = container.xpath("//li[text()='by ']/a/text()")[0]
-    genre = container.xpath("//a[@class='tag tagTag']/text()")
-    date_str = container.xpath("//div[@class='items_article_Releasedate']/p/text()")[0]
+    producer = sel.producer(container)[0]
+    genre = sel.genre(container)
+    date_str = sel.publish_date(container)[0]
     publish_date = date_str[-10:].replace('/', '-')  # '販売日 : 2017/11/30'
-    preview_pics = container.xpath("//ul[@data-feed='sample-images']/li/a/@href")
+    preview_pics = sel.preview_pics(container)
 
     if Cfg().crawler.hardworking:
         # 通过评论数据来计算准确的评分
@@ -66,14 +82,14 @@ def parse_data(movie: MovieInfo):
         if score:
             movie.score = f'{score:.2f}'
         # 预览视频是动态加载的，不在静态网页中
-        desc_frame_url = container.xpath("//section[@class='items_article_Contents']/iframe/@src")[0]
+        desc_frame_url = sel.desc_frame(container)[0]
         key = desc_frame_url.split('=')[-1]     # /widget/article/718323/description?ac=60fc08fa...
         api_url = f'{base_url}/api/v2/videos/{fc2_id}/sample?key={key}'
         r = request_get(api_url).json()
         movie.preview_video = r['path']
     else:
         # 获取影片评分。影片页面的评分只能粗略到星级，且没有分数，要通过类名来判断，如'items_article_Star5'表示5星
-        score_tag_attr = container.xpath("//a[@class='items_article_Stars']/p/span/@class")[0]
+        score_tag_attr = sel.score_stars(container)[0]
         score = int(score_tag_attr[-1]) * 2
         movie.score = f'{score:.2f}'
 
@@ -7,7 +7,7 @@ import lxml.html
 import requests
 
 
-from javsp.web.base import resp2html
+from javsp.web.base import Selectors, resp2html
 from javsp.web.exceptions import *
 from javsp.config import Cfg
 from javsp.datatype import MovieInfo
@@ -16,6 +16,13 @@ from javsp.datatype import MovieInfo
 logger = logging.getLogger(__name__)
 base_path = str(Cfg().crawler.fc2fan_local_path)
 use_local_mirror = os.path.exists(base_path)
+sel = Selectors('fc2fan',
+    container="//div[@class='col-sm-8']",
+    title="h3/text()",
+    label="h5/strong[text()=$label]",
+    label_links="h5/strong[text()=$label]/../a/text()",
+    preview_pics="//ul[@class='slides']/li/img/@src",
+)
 
 
 def parse_data(movie: MovieInfo):
@@ -34,27 +41,27 @@ def parse_data(movie: MovieInfo):
             raise WebsiteError(f'fc2fan: 站点不可用 (HTTP {r.status_code}): {url}')
         html = resp2html(r)
     try:
-        container = html.xpath("//div[@class='col-sm-8']")[0]
+        container = sel.container(html)[0]
     except IndexError:
         raise WebsiteError(f'fc2fan: 站点不可用')
-    title = container.xpath("h3/text()")[0]
-    score_str = container.xpath("h5/strong[text()='影片评分']")[0].tail.strip()
+    title = sel.title(container)[0]
+    score_str = sel.label(container, label='影片评分')[0].tail.strip()
     match = re.search(r'\d+', score_str)
     if match:
         score = int(match.group()) / 10 # fc2fan站长是按100分来打分的
         movie.score = f'{score:.1f}'
-    resource_info = container.xpath("h5/strong[text()='资源参数']")[0].tail
+    resource_info = sel.label(container, label='资源参数')[0].tail
     if '无码' in resource_info:
         movie.uncensored = True
     elif '有码' in resource_info:
         movie.uncensored = False
     # FC2没有制作商和发行商的区分，作为个人市场，卖家更接近于制作商
-    producer = container.xpath("h5/strong[text()='卖家信息']")[0].getnext().text
+    producer = sel.label(container, label='卖家信息')[0].getnext().text
     if producer:
         movie.producer = producer.strip()
-    genre = container.xpath("h5/strong[text()='影片标签']/../a/text()")
-    actress = container.xpath("h5/strong[text()='女优名字']/../a/text()")
-    preview_pics = container.xpath("//ul[@class='slides']/li/img/@src")
+    genre = sel.label_links(container, label='影片标签')
+    actress = sel.label_links(container, label='女优名字')
+    preview_pics = sel.preview_pics(container)
     if use_local_mirror:
         preview_pics = [os.path.normpath(os.path.join(base_path, i)) for i in preview_pics]
     # big_preview = container.xpath("//img[@id='thumbpic']/../@href")[0]    # 影片真实截图，目前暂时用不到
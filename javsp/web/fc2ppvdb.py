@@ -3,7 +3,7 @@ import logging
 from typing import List
 
 
-from javsp.web.base import get_html
+from javsp.web.base import Selectors, get_html
 from javsp.web.exceptions import *
 from javsp.lib import strftime_to_minutes
 from javsp.datatype import MovieInfo
@@ -11,6 +11,14 @@ from javsp.datatype import MovieInfo
 
 logger = logging.getLogger(__name__)
 base_url = 'https://fc2ppvdb.com'
+sel = Selectors('fc2ppvdb',
+    container="//div[@class='container lg:px-5 px-2 py-12 mx-auto']/div[1]",
+    title="//h2/a/text()",
+    thumb_pic="//img[@alt=$id]/@src",
+    field="//div[starts-with(text(),$label)]/span/text()",
+    field_links="//div[starts-with(text(),$label)]/span/a/text()",
+    preview_video="//a[starts-with(text(),'サンプル動画')]/@href",
+)
 
 
 def parse_data(movie: MovieInfo):
@@ -23,24 +31,24 @@ def parse_data(movie: MovieInfo):
     # 抓取网页
     url = f'{base_url}/articles/{fc2_id}'
     html = get_html(url)
-    container = html.xpath("//div[@class='container lg:px-5 px-2 py-12 mx-auto']/div[1]")
+    container = sel.container(html)
     if len(container) > 0:
         container = container[0]
     else:
         raise MovieNotFoundError(__name__, movie.dvdid)
     
-    title = container.xpath("//h2/a/text()")
-    thumb_pic = container.xpath(f"//img[@alt='{fc2_id}']/@src")
-    duration_str = container.xpath("//div[starts-with(text(),'収録時間：')]/span/text()")
-    actress = container.xpath("//div[starts-with(text(),'女優：')]/span/a/text()")
-    genre = container.xpath("//div[starts-with(text(),'タグ：')]/span/a/text()")
-    publish_date = container.xpath("//div[starts-with(text(),'販売日：')]/span/text()")
-    publisher = container.xpath("//div[starts-with(text(),'販売者：')]/span/a/text()")
-    uncensored_str = container.xpath("//div[starts-with(text(),'モザイク：')]/span/text()")
+    title = sel.title(container)
+    thumb_pic = sel.thumb_pic(container, id=fc2_id)
+    duration_str = sel.field(container, label='収録時間：')
+    actress = sel.field_links(container, label='女優：')
+    genre = sel.field_links(container, label='タグ：')
+    publish_date = sel.field(container, label='販売日：')
+    publisher = sel.field_links(container, label='販売者：')
+    uncensored_str = sel.field(container, label='モザイク：')
     uncensored_str_f = get_list_first(uncensored_str);
     uncensored = True if uncensored_str_f == '無' else False if uncensored_str_f == '有' else None
     preview_pics = None
-    preview_video = container.xpath("//a[starts-with(text(),'サンプル動画')]/@href")
+    preview_video = sel.preview_video(container)
 
     movie.dvdid = id_uc
     movie.url = url
@@ -2,7 +2,7 @@
 import logging
 import time
 
-from javsp.web.base import resp2html, request_get
+from javsp.web.base import Selectors, resp2html, request_get
 from javsp.web.exceptions import *
 from javsp.datatype import MovieInfo
 
@@ -10,10 +10,18 @@ logger = logging.getLogger(__name__)
 
 # https://dl.gyutto.com/i/item266923
 base_url = 'http://gyutto.com'
-base_encode = 'euc-jp'
+sel = Selectors('gyutto',
+    title="//h1",
+    images="//a[@class='highslide']/img",
+    info_rows="//dl[@class='BasicInfo clearfix']",
+    row_key=".//dt/text()",
+    row_links=".//dd/a/text()",
+    row_text=".//dd/text()",
+    plot="//div[@class='unit_DetailLead']/p/text()",
+)
 
 def get_movie_title(html):
-    container = html.xpath("//h1")
+    container = sel.title(html)
     if len(container) > 0:
         container = container[0]
     title = container.text
@@ -22,7 +30,7 @@ def get_movie_title(html):
 
 def get_movie_img(html, index = 1):
     images = []
-    container = html.xpath("//a[@class='highslide']/img")
+    container = sel.images(html)
     if len(container) > 0:
         if index == 0:
             return container[0].get('src')
@@ -44,22 +52,22 @@ def parse_data(movie: MovieInfo):
     r = request_get(url, delay_raise=True)
     if r.status_code == 404:
         raise MovieNotFoundError(__name__, movie.dvdid)
-    html = resp2html(r, base_encode)
-    container = html.xpath("//dl[@class='BasicInfo clearfix']")
+    html = resp2html(r)
+    container = sel.info_rows(html)
 
     for row in container:
-        key = row.xpath(".//dt/text()")
+        key = sel.row_key(row)
         if key[0] == "サークル":
-            producer = ''.join(row.xpath(".//dd/a/text()"))
+            producer = ''.join(sel.row_links(row))
         elif key[0] == "ジャンル":
-            genre = row.xpath(".//dd/a/text()")
+            genre = sel.row_links(row)
         elif key[0] == "配信開始日":
-            date = row.xpath(".//dd/text()")
+            date = sel.row_text(row)
             date_str = ''.join(date)
             date_time = time.strptime(date_str, "%Y年%m月%d日")
             publish_date = time.strftime("%Y-%m-%d", date_time)
 
-    plot = html.xpath("//div[@class='unit_DetailLead']/p/text()")[0]
+    plot = sel.plot(html)[0]
     
     movie.title = get_movie_title(html)
     movie.cover = get_movie_img(html, 0)
@@ -0,0 +1,173 @@
+"""网页请求的本地缓存：重复运行或重试失败的影片时，直接使用之前抓取过的网页"""
+import json
+import time
+import zlib
+import base64
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from javsp.config import Cfg
+from javsp.store import cache_path
+
+
+__all__ = ['HttpCache', 'CacheMiss', 'http_cache']
+
+
+logger = logging.getLogger(__name__)
+# 只缓存这些状态码的响应（404用来表示影片不存在，同样值得缓存）
+CACHEABLE_STATUS = (200, 404)
+# 影响网页内容的请求头，它们也会被计入缓存的键
+VARY_HEADERS = ('Accept-Language',)
+
+
+class CacheMiss(requests.exceptions.ConnectionError):
+    """离线模式下缓存中没有对应的响应"""
+
+
+def _dump_response(resp: Response) -> dict:
+    return {
+        'status': resp.status_code,
+        'reason': resp.reason,
+        'url': resp.url,
+        'headers': dict(resp.headers),
+        'body': base64.b64encode(resp.content).decode('ascii'),
+    }
+
+
+def _load_response(d: dict) -> Response:
+    r = Response()
+    r.status_code = d['status']
+    r.reason = d['reason']
+    r.url = d['url']
+    r.headers = CaseInsensitiveDict(d['headers'])
+    r.encoding = get_encoding_from_headers(r.headers)
+    r._content = base64.b64decode(d['body'])
+    r._content_consumed = True
+    return r
+
+
+class HttpCache():
+    """基于sqlite的响应缓存，响应体经过压缩后保存
+
+    Args:
+        path (str): 缓存数据库的路径
+        default_ttl (float): 缓存的默认有效期（秒）
+        site_ttl (Dict[str, float]): 各个站点的有效期，键名只要出现在网址的域名中即视为匹配（如'javdb'）
+        offline (bool): 离线模式，仅使用缓存中的数据，不发送任何网络请求
+    """
+    def __init__(self, path: str, default_ttl: float, site_ttl: Dict[str, float] = None, offline=False) -> None:
+        self.path = path
+        self.default_ttl = default_ttl
+        self.site_ttl = site_ttl or {}
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY, url TEXT, expires REAL, etag TEXT, last_modified TEXT, data BLOB)''')
+        return self._conn
+
+    def ttl_of(self, url: str) -> float:
+        """获取指定网址的缓存有效期"""
+        host = urlsplit(url).netloc.lower()
+        for site, ttl in self.site_ttl.items():
+            if site.lower() in host:
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def make_key(method: str, url: str, headers: dict = None, cookies: dict = None) -> str:
+        """根据请求方法、URL以及会影响网页内容的请求头和Cookies生成缓存的键"""
+        headers = CaseInsensitiveDict(headers or {})
+        vary = [headers.get(i, '') for i in VARY_HEADERS]
+        items = [method.upper(), url, vary, sorted((cookies or {}).items())]
+        return hashlib.sha1(json.dumps(items, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """读取缓存: 返回(响应, 是否仍在有效期内, etag, last_modified)，没有缓存时返回None"""
+        with self._lock:
+            row = self.conn.execute('SELECT expires, etag, last_modified, data FROM responses WHERE key=?', (key,)).fetchone()
+        if row is None:
+            return None
+        expires, etag, last_modified, data = row
+        d = json.loads(zlib.decompress(data))
+        resp = _load_response(d)
+        resp.history = [_load_response(i) for i in d['history']]
+        setattr(resp, 'from_cache', True)
+        return resp, expires > time.time(), etag, last_modified
+
+    def put(self, key: str, resp: Response, ttl: float):
+        d = _dump_response(resp)
+        d['history'] = [_dump_response(i) for i in resp.history]
+        data = zlib.compress(json.dumps(d).encode('utf-8'))
+        row = (key, resp.url, time.time() + ttl, resp.headers.get('ETag'), resp.headers.get('Last-Modified'), data)
+        with self._lock:
+            self.conn.execute('INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?)', row)
+            self.conn.commit()
+
+    def refresh(self, key: str, ttl: float):
+        """服务器确认缓存的内容未变化（304）时，延长缓存的有效期"""
+        with self._lock:
+            self.conn.execute('UPDATE responses SET expires=? WHERE key=?', (time.time() + ttl, key))
+            self.conn.commit()
+
+    def purge(self):
+        """清空所有缓存"""
+        with self._lock:
+            self.conn.execute('DELETE FROM responses')
+            self.conn.commit()
+
+    def fetch(self, url: str, send: Callable[..., Response], headers: dict = None,
+              cookies: dict = None, **kw) -> Response:
+        """优先从缓存中获取GET请求的响应，缓存过期或不存在时调用send(url, headers=..., cookies=..., **kw)发送请求
+
+        缓存过期但带有ETag/Last-Modified时，发送条件请求来确认内容是否变化
+        """
+        key = self.make_key('GET', url, headers, cookies)
+        cached = self.get(key)
+        if cached:
+            resp, fresh, etag, last_modified = cached
+            if fresh or self.offline:
+                logger.debug(f"💾 使用缓存: {url}")
+                return resp
+        elif self.offline:
+            raise CacheMiss(f"离线模式下缓存中没有此网页: {url}")
+        req_headers = dict(headers or {})
+        if cached and etag:
+            req_headers['If-None-Match'] = etag
+        if cached and last_modified:
+            req_headers['If-Modified-Since'] = last_modified
+        r = send(url, headers=req_headers, cookies=cookies, **kw)
+        ttl = self.ttl_of(url)
+        if cached and r.status_code == 304:
+            logger.debug(f"💾 网页未变化，继续使用缓存: {url}")
+            self.refresh(key, ttl)
+            return resp
+        if r.status_code in CACHEABLE_STATUS and ttl > 0:
+            self.put(key, r, ttl)
+        return r
+
+
+def _create_cache() -> Optional[HttpCache]:
+    cfg = Cfg().network.http_cache
+    if not (cfg.enabled or cfg.offline):
+        return None
+    site_ttl = {k: v.total_seconds() for k, v in cfg.site_ttl.items()}
+    return HttpCache(cache_path('http_cache.sqlite'), cfg.ttl.total_seconds(), site_ttl, cfg.offline)
+
+
+# 未启用缓存时为None
+http_cache = _create_cache()
@@ -4,6 +4,8 @@ import logging
 
 from javsp.web.base import *
 from javsp.web.exceptions import *
+from javsp.web.route import select_route
+from javsp.web.proxyfree import get_proxy_free_url
 from javsp.func import *
 from javsp.config import Cfg, CrawlerID
 from javsp.datatype import MovieInfo, GenreMap
@@ -11,11 +13,28 @@ from javsp.datatype import MovieInfo, GenreMap
 
 logger = logging.getLogger(__name__)
 genre_map = GenreMap('data/genre_javbus.csv')
+request = Request()
 permanent_url = 'https://www.javbus.com'
-if Cfg().network.proxy_server is not None:
-    base_url = permanent_url
-else:
-    base_url = str(Cfg().network.proxy_free[CrawlerID.javbus])
+# 影片的所有信息都在第一个div.container中，因此从container（而不是整个网页）开始查找
+sel = Selectors('javbus',
+    page_title="/html/head/title/text()",
+    container="//div[@class='container']",
+    title="h3/text()",
+    cover=".//a[@class='bigImage']/img/@src",
+    preview_pics=".//div[@id='sample-waterfall']/a/@href",
+    info=".//div[@class='col-md-3 info']",
+    label="p/span[text()=$label]",
+    genre="p/span[@class='genre']/label/a",
+    actress=".//a[@class='avatar-box']/div/img",
+)
+
+
+def init_route():
+    """选择访问JavBus的路线并设置代理"""
+    route = select_route('javbus', permanent_url, [str(Cfg().network.proxy_free[CrawlerID.javbus])],
+                         discover=lambda: [get_proxy_free_url('javbus')])
+    request.proxies = route.proxies
+    return route
 
 
 def parse_data(movie: MovieInfo):
@@ -23,42 +42,43 @@ def parse_data(movie: MovieInfo):
     Args:
         movie (MovieInfo): 要解析的影片信息，解析后的信息直接更新到此变量内
     """
-    url = f'{base_url}/{movie.dvdid}'
-    resp = request_get(url, delay_raise=True)
+    route = init_route()
+    url = f'{route.base_url}/{movie.dvdid}'
+    resp = request.get(url, delay_raise=True)
     # 疑似JavBus检测到类似爬虫的行为时会要求登录，不过发现目前不需要登录也可以从重定向前的网页中提取信息
     if resp.history and resp.history[0].status_code == 302:
         html = resp2html(resp.history[0])
     else:
         html = resp2html(resp)
     # 引入登录验证后状态码不再准确，因此还要额外通过检测标题来确认是否发生了404
-    page_title = html.xpath('/html/head/title/text()')
+    page_title = sel.page_title(html)
     if page_title and page_title[0].startswith('404 Page Not Found!'):
         raise MovieNotFoundError(__name__, movie.dvdid)
 
-    container = html.xpath("//div[@class='container']")[0]
-    title = container.xpath("h3/text()")[0]
-    cover = container.xpath("//a[@class='bigImage']/img/@src")[0]
-    preview_pics = container.xpath("//div[@id='sample-waterfall']/a/@href")
-    info = container.xpath("//div[@class='col-md-3 info']")[0]
-    dvdid = info.xpath("p/span[text()='識別碼:']")[0].getnext().text
-    publish_date = info.xpath("p/span[text()='發行日期:']")[0].tail.strip()
-    duration = info.xpath("p/span[text()='長度:']")[0].tail.replace('分鐘', '').strip()
-    director_tag = info.xpath("p/span[text()='導演:']")
+    container = sel.container(html)[0]
+    title = sel.title(container)[0]
+    cover = sel.cover(container)[0]
+    preview_pics = sel.preview_pics(container)
+    info = sel.info(container)[0]
+    dvdid = sel.label(info, label='識別碼:')[0].getnext().text
+    publish_date = sel.label(info, label='發行日期:')[0].tail.strip()
+    duration = sel.label(info, label='長度:')[0].tail.replace('分鐘', '').strip()
+    director_tag = sel.label(info, label='導演:')
     if director_tag:    # xpath没有匹配时将得到空列表
         movie.director = director_tag[0].getnext().text.strip()
-    producer_tag = info.xpath("p/span[text()='製作商:']")
+    producer_tag = sel.label(info, label='製作商:')
     if producer_tag:
         text = producer_tag[0].getnext().text
         if text:
             movie.producer = text.strip()
-    publisher_tag = info.xpath("p/span[text()='發行商:']")
+    publisher_tag = sel.label(info, label='發行商:')
     if publisher_tag:
         movie.publisher = publisher_tag[0].getnext().text.strip()
-    serial_tag = info.xpath("p/span[text()='系列:']")
+    serial_tag = sel.label(info, label='系列:')
     if serial_tag:
         movie.serial = serial_tag[0].getnext().text
     # genre, genre_id
-    genre_tags = info.xpath("//span[@class='genre']/label/a")
+    genre_tags = sel.genre(info)
     genre, genre_id = [], []
     for tag in genre_tags:
         tag_url = tag.get('href')
@@ -73,7 +93,7 @@ def parse_data(movie: MovieInfo):
     # JavBus的磁力链接是依赖js脚本加载的，无法通过静态网页来解析
     # actress, actress_pics
     actress, actress_pics = [], {}
-    actress_tags = html.xpath("//a[@class='avatar-box']/div/img")
+    actress_tags = sel.actress(container)
     for tag in actress_tags:
         name = tag.get('title')
         pic_url = tag.get('src')
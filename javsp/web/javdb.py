@@ -3,8 +3,10 @@ import os
 import re
 import logging
 
-from javsp.web.base import Request, resp2html
+from javsp.web.base import Request, Selectors, absolute_url, partial_html, resp2html
 from javsp.web.exceptions import *
+from javsp.web.route import default_probe, select_route
+from javsp.web.proxyfree import get_proxy_free_url
 from javsp.func import *
 from javsp.avid import guess_av_type
 from javsp.config import Cfg, CrawlerID
@@ -19,14 +21,51 @@ request.headers['Accept-Language'] = 'zh-CN,zh;q=0.9,zh-TW;q=0.8,en-US;q=0.7,en;
 logger = logging.getLogger(__name__)
 genre_map = GenreMap('data/genre_javdb.csv')
 permanent_url = 'https://javdb.com'
-if Cfg().network.proxy_server is not None:
-    base_url = permanent_url
-else:
-    base_url = str(Cfg().network.proxy_free[CrawlerID.javdb])
-
-
-def get_html_wrapper(url):
-    """包装外发的request请求并负责转换为可xpath的html，同时处理Cookies无效等问题"""
+base_url = permanent_url
+route = None
+# 影片详情页的所有信息都在div.video-detail中，因此从container（而不是整个网页）开始查找
+sel = Selectors('javdb',
+    code_label="//span[@class='code-label']/span",
+    search_ids="//div[@class='video-title']/strong/text()",
+    search_boxes="//a[@class='box']",
+    box_cover="div/img/@src",
+    box_score="div[@class='score']/span/span",
+    box_meta="div[@class='meta']/text()",
+    container="/html/body/section/div/div[@class='video-detail']",
+    info=".//nav[@class='panel movie-panel-info']",
+    title="h2/strong[@class='current-title']/text()",
+    show_orig_title=".//a[contains(@class, 'meta-link') and not(contains(@style, 'display: none'))]",
+    ori_title="h2/span[@class='origin-title']/text()",
+    cover=".//img[@class='video-cover']/@src",
+    preview_pics=".//a[@class='tile-item'][@data-fancybox='gallery']/@href",
+    preview_video=".//video[@id='preview-video']/source/@src",
+    dvdid="div/span",
+    label="div/strong[text()=$label]",
+    score=".//span[@class='score-stars']",
+    genre="div/strong[text()='類別:']/../span/a",
+    actors="div/strong[text()='演員:']/../span",
+    actor_names="a/text()",
+    actor_genders="strong/text()",
+    magnet=".//div[@class='magnet-name column is-four-fifths']/a/@href",
+)
+
+
+def init_route():
+    """选择访问JavDB的路线，并据此设置base_url和代理"""
+    global base_url, route
+    route = select_route('javdb', permanent_url, [str(Cfg().network.proxy_free[CrawlerID.javdb])],
+                         discover=lambda: [get_proxy_free_url('javdb')],
+                         probe=lambda r, timeout: default_probe(r, timeout, use_scraper=True))
+    base_url = route.base_url
+    request.proxies = route.proxies
+    return route
+
+
+def get_html_wrapper(url, section=None):
+    """包装外发的request请求并负责转换为可xpath的html，同时处理Cookies无效等问题
+
+    指定section时只解析到该区域结束为止，此时网页中的链接不会被转换为绝对地址（参见partial_html）
+    """
     global request, cookies_pool
     r = request.get(url, delay_raise=True)
     if r.status_code == 200:
@@ -47,19 +86,23 @@ def get_html_wrapper(url):
                 # 更换Cookies时需要创建新的request实例，否则cloudscraper会保留它内部第一次发起网络访问时获得的Cookies
                 request = Request(use_scraper=True)
                 request.cookies = item['cookies']
+                if route:
+                    request.proxies = route.proxies
                 cookies_source = (item['profile'], item['site'])
                 logger.debug(f'未携带有效Cookies而发生重定向，尝试更换Cookies为: {cookies_source}')
-                return get_html_wrapper(url)
+                return get_html_wrapper(url, section)
             else:
                 raise CredentialError('JavDB: 所有浏览器Cookies均已过期')
         elif r.history and 'pay' in r.url.split('/')[-1]:
             raise SitePermissionError(f"JavDB: 此资源被限制为仅VIP可见: '{r.history[0].url}'")
+        elif section:
+            return partial_html(r, section)
         else:
             html = resp2html(r)
             return html
     elif r.status_code in (403, 503):
         html = resp2html(r)
-        code_tag = html.xpath("//span[@class='code-label']/span")
+        code_tag = sel.code_label(html)
         error_code = code_tag[0].text if code_tag else None
         if error_code:
             if error_code == '1020':
@@ -107,10 +150,13 @@ def parse_data(movie: MovieInfo):
     Args:
         movie (MovieInfo): 要解析的影片信息，解析后的信息直接更新到此变量内
     """
+    init_route()
     # JavDB搜索番号时会有多个搜索结果，从中查找匹配番号的那个
-    html = get_html_wrapper(f'{base_url}/search?q={movie.dvdid}')
-    ids = list(map(str.lower, html.xpath("//div[@class='video-title']/strong/text()")))
-    movie_urls = html.xpath("//a[@class='box']/@href")
+    # 搜索结果之后只有分页和页脚，不需要解析
+    html = get_html_wrapper(f'{base_url}/search?q={movie.dvdid}', section='div.movie-list')
+    ids = list(map(str.lower, sel.search_ids(html)))
+    boxes = sel.search_boxes(html)
+    movie_urls = [absolute_url(i, i.get('href')) for i in boxes]
     match_count = len([i for i in ids if i == movie.dvdid.lower()])
     if match_count == 0:
         raise MovieNotFoundError(__name__, movie.dvdid, ids)
@@ -121,57 +167,57 @@ def parse_data(movie: MovieInfo):
             html2 = get_html_wrapper(new_url)
         except (SitePermissionError, CredentialError):
             # 不开VIP不让看，过分。决定榨出能获得的信息，毕竟有时候只有这里能找到标题和封面
-            box = html.xpath("//a[@class='box']")[index]
+            box = boxes[index]
             movie.url = new_url
             movie.title = box.get('title')
-            movie.cover = box.xpath("div/img/@src")[0]
-            score_str = box.xpath("div[@class='score']/span/span")[0].tail
+            movie.cover = absolute_url(box, sel.box_cover(box)[0])
+            score_str = sel.box_score(box)[0].tail
             score = re.search(r'([\d.]+)分', score_str).group(1)
             movie.score = "{:.2f}".format(float(score)*2)
-            movie.publish_date = box.xpath("div[@class='meta']/text()")[0].strip()
+            movie.publish_date = sel.box_meta(box)[0].strip()
             return
     else:
         raise MovieDuplicateError(__name__, movie.dvdid, match_count)
 
-    container = html2.xpath("/html/body/section/div/div[@class='video-detail']")[0]
-    info = container.xpath("//nav[@class='panel movie-panel-info']")[0]
-    title = container.xpath("h2/strong[@class='current-title']/text()")[0]
-    show_orig_title = container.xpath("//a[contains(@class, 'meta-link') and not(contains(@style, 'display: none'))]")
+    container = sel.container(html2)[0]
+    info = sel.info(container)[0]
+    title = sel.title(container)[0]
+    show_orig_title = sel.show_orig_title(container)
     if show_orig_title:
-        movie.ori_title = container.xpath("h2/span[@class='origin-title']/text()")[0]
-    cover = container.xpath("//img[@class='video-cover']/@src")[0]
-    preview_pics = container.xpath("//a[@class='tile-item'][@data-fancybox='gallery']/@href")
-    preview_video_tag = container.xpath("//video[@id='preview-video']/source/@src")
+        movie.ori_title = sel.ori_title(container)[0]
+    cover = sel.cover(container)[0]
+    preview_pics = sel.preview_pics(container)
+    preview_video_tag = sel.preview_video(container)
     if preview_video_tag:
         preview_video = preview_video_tag[0]
         if preview_video.startswith('//'):
             preview_video = 'https:' + preview_video
         movie.preview_video = preview_video
-    dvdid = info.xpath("div/span")[0].text_content()
-    publish_date = info.xpath("div/strong[text()='日期:']")[0].getnext().text
-    duration = info.xpath("div/strong[text()='時長:']")[0].getnext().text.replace('分鍾', '').strip()
-    director_tag = info.xpath("div/strong[text()='導演:']")
+    dvdid = sel.dvdid(info)[0].text_content()
+    publish_date = sel.label(info, label='日期:')[0].getnext().text
+    duration = sel.label(info, label='時長:')[0].getnext().text.replace('分鍾', '').strip()
+    director_tag = sel.label(info, label='導演:')
     if director_tag:
         movie.director = director_tag[0].getnext().text_content().strip()
     av_type = guess_av_type(movie.dvdid)
     if av_type != 'fc2':
-        producer_tag = info.xpath("div/strong[text()='片商:']")
+        producer_tag = sel.label(info, label='片商:')
     else:
-        producer_tag = info.xpath("div/strong[text()='賣家:']")
+        producer_tag = sel.label(info, label='賣家:')
     if producer_tag:
         movie.producer = producer_tag[0].getnext().text_content().strip()
-    publisher_tag = info.xpath("div/strong[text()='發行:']")
+    publisher_tag = sel.label(info, label='發行:')
     if publisher_tag:
         movie.publisher = publisher_tag[0].getnext().text_content().strip()
-    serial_tag = info.xpath("div/strong[text()='系列:']")
+    serial_tag = sel.label(info, label='系列:')
     if serial_tag:
         movie.serial = serial_tag[0].getnext().text_content().strip()
-    score_tag = info.xpath("//span[@class='score-stars']")
+    score_tag = sel.score(info)
     if score_tag:
         score_str = score_tag[0].tail
         score = re.search(r'([\d.]+)分', score_str).group(1)
         movie.score = "{:.2f}".format(float(score)*2)
-    genre_tags = info.xpath("//strong[text()='類別:']/../span/a")
+    genre_tags = sel.genre(info)
     genre, genre_id = [], []
     for tag in genre_tags:
         pre_id = tag.get('href').split('/')[-1]
@@ -181,11 +227,11 @@ def parse_data(movie: MovieInfo):
         subsite = pre_id.split('?')[0]
         movie.uncensored = {'uncensored': True, 'tags':False}.get(subsite)
     # JavDB目前同时提供男女优信息，根据用来标识性别的符号筛选出女优
-    actors_tag = info.xpath("//strong[text()='演員:']/../span")[0]
-    all_actors = actors_tag.xpath("a/text()")
-    genders = actors_tag.xpath("strong/text()")
+    actors_tag = sel.actors(info)[0]
+    all_actors = sel.actor_names(actors_tag)
+    genders = sel.actor_genders(actors_tag)
     actress = [i for i in all_actors if genders[all_actors.index(i)] == '♀']
-    magnet = container.xpath("//div[@class='magnet-name column is-four-fifths']/a/@href")
+    magnet = sel.magnet(container)
 
     movie.dvdid = dvdid
     movie.url = new_url.replace(base_url, permanent_url)
@@ -237,6 +283,7 @@ def collect_actress_alias(type=0, use_original=True):
             json.dump({}, file)
 
     typeList = ["censored", "uncensored", "western"]
+    init_route()
     page_url = f"{base_url}/actors/{typeList[type]}"
     while True:
         try:
@@ -3,9 +3,10 @@ import logging
 from urllib.parse import urlsplit
 
 
-from javsp.web.base import Request, read_proxy, resp2html
+from javsp.web.base import Request, Selectors, absolute_url, partial_html, resp2html
 from javsp.web.exceptions import *
 from javsp.web.proxyfree import get_proxy_free_url
+from javsp.web.route import Route, default_probe, route_table, select_route
 from javsp.config import Cfg, CrawlerID
 from javsp.datatype import  MovieInfo
 
@@ -15,64 +16,73 @@ request = Request(use_scraper=True)
 
 logger = logging.getLogger(__name__)
 permanent_url = 'https://www.javlibrary.com'
-base_url = ''
+# 影片的所有信息都在div#rightcolumn中，因此从container（而不是整个网页）开始查找
+sel = Selectors('javlib',
+    search_results="//div[@class='video'][@id]/a",
+    search_id="div[@class='id']/text()",
+    container="/html/body/div/div[@id='rightcolumn']",
+    title="div/h3/a/text()",
+    cover=".//img[@id='video_jacket_img']/@src",
+    info=".//div[@id='video_info']",
+    dvdid="div[@id='video_id']//td[@class='text']/text()",
+    publish_date="div[@id='video_date']//td[@class='text']/text()",
+    duration="div[@id='video_length']//span[@class='text']/text()",
+    director=".//span[@class='director']/a/text()",
+    producer=".//span[@class='maker']/a/text()",
+    publisher=".//span[@class='label']/a/text()",
+    score=".//span[@class='score']/text()",
+    genre=".//span[@class='genre']/a/text()",
+    actress=".//span[@class='star']/a/text()",
+)
 
 
-def init_network_cfg():
-    """设置合适的代理模式和base_url"""
-    request.timeout = 5
-    proxy_free_url = get_proxy_free_url('javlib')
-    urls = [str(Cfg().network.proxy_free[CrawlerID.javlib]), permanent_url]
-    if proxy_free_url and proxy_free_url not in urls:
-        urls.insert(1, proxy_free_url)
-    # 使用代理容易触发IUAM保护，先尝试不使用代理访问
-    proxy_cfgs = [{}, read_proxy()] if Cfg().network.proxy_server else [{}]
-    for proxies in proxy_cfgs:
-        request.proxies = proxies
-        for url in urls:
-            if proxies == {} and url == permanent_url:
-                continue
-            try:
-                resp = request.get(url, delay_raise=True)
-                if resp.status_code == 200:
-                    request.timeout = Cfg().network.timeout.seconds
-                    return url
-            except Exception as e:
-                logger.debug(f"Fail to connect to '{url}': {e}")
-    logger.warning('无法绕开JavLib的反爬机制')
-    request.timeout = Cfg().network.timeout.seconds
-    return permanent_url
+def init_route() -> Route:
+    """选择访问JavLib的路线并设置代理"""
+    route = select_route('javlib', permanent_url, [str(Cfg().network.proxy_free[CrawlerID.javlib])],
+                         discover=lambda: [get_proxy_free_url('javlib')],
+                         probe=lambda r, timeout: default_probe(r, timeout, use_scraper=True))
+    request.proxies = route.proxies
+    return route
 
 
 # TODO: 发现JavLibrary支持使用cid搜索，会直接跳转到对应的影片页面，也许可以利用这个功能来做cid到dvdid的转换
-def parse_data(movie: MovieInfo):
-    """解析指定番号的影片数据"""
-    global base_url
-    if not base_url:
-        base_url = init_network_cfg()
-        logger.debug(f"JavLib网络配置: {base_url}, proxy={request.proxies}")
+def parse_data(movie: MovieInfo, base_url: str = None):
+    """解析指定番号的影片数据
+
+    Args:
+        base_url (str): 使用此地址搜索影片（搜索被重定向到新的域名时使用），为None时使用选择的访问路线
+    """
+    route = init_route()
+    redirected = base_url is not None
+    base_url = base_url or route.base_url
     url = new_url = f'{base_url}/cn/vl_searchbyid.php?keyword={movie.dvdid}'
     resp = request.get(url)
-    html = resp2html(resp)
     if resp.history:
         if urlsplit(resp.url).netloc == urlsplit(base_url).netloc:
             # 出现301重定向通常且新老地址netloc相同时，说明搜索到了影片且只有一个结果
             new_url = resp.url
+            html = resp2html(resp)
         else:
             # 重定向到了不同的netloc时，新地址并不是影片地址。这种情况下新地址中丢失了path字段，
             # 为无效地址（应该是JavBus重定向配置有问题），需要使用新的base_url抓取数据
+            # 直接使用新的base_url重新搜索一次，而不是依赖route_table（禁用了路线选择时route_table不会保存新地址）
+            if redirected:
+                raise WebsiteError(f'JavLib: 搜索被重复重定向到了其他域名: {resp.url}')
             base_url = 'https://' + urlsplit(resp.url).netloc
             logger.warning(f"请将配置文件中的JavLib免代理地址更新为: {base_url}")
-            return parse_data(movie)
+            route_table.set('javlib', Route(base_url, route.proxy))
+            return parse_data(movie, base_url)
     else:   # 如果有多个搜索结果则不会自动跳转，此时需要程序介入选择搜索结果
-        video_tags = html.xpath("//div[@class='video'][@id]/a")
+        # 搜索结果之后的分页、页脚等内容不需要解析
+        html = partial_html(resp, 'div.videos')
+        video_tags = sel.search_results(html)
         # 通常第一部影片就是我们要找的，但是以免万一还是遍历所有搜索结果
         pre_choose = []
         for tag in video_tags:
-            tag_dvdid = tag.xpath("div[@class='id']/text()")[0]
+            tag_dvdid = sel.search_id(tag)[0]
             if tag_dvdid.upper() == movie.dvdid.upper():
                 pre_choose.append(tag)
-        pre_choose_urls = [i.get('href') for i in pre_choose]
+        pre_choose_urls = [absolute_url(i, i.get('href')) for i in pre_choose]
         match_count = len(pre_choose)
         if match_count == 0:
             raise MovieNotFoundError(__name__, movie.dvdid)
@@ -85,7 +95,7 @@ def parse_data(movie: MovieInfo):
                     no_blueray.append(tag)
             no_blueray_count = len(no_blueray)
             if no_blueray_count == 1:
-                new_url = no_blueray[0].get('href')
+                new_url = absolute_url(no_blueray[0], no_blueray[0].get('href'))
                 logger.debug(f"'{movie.dvdid}': 存在{match_count}个同番号搜索结果，已自动选择封面比例正确的一个: {new_url}")
             else:
                 # 两个结果中没有谁是蓝光影片，说明影片番号重复了
@@ -95,26 +105,26 @@ def parse_data(movie: MovieInfo):
             raise MovieDuplicateError(__name__, movie.dvdid, match_count, pre_choose_urls)
         # 重新抓取网页
         html = request.get_html(new_url)
-    container = html.xpath("/html/body/div/div[@id='rightcolumn']")[0]
-    title_tag = container.xpath("div/h3/a/text()")
+    container = sel.container(html)[0]
+    title_tag = sel.title(container)
     title = title_tag[0]
-    cover = container.xpath("//img[@id='video_jacket_img']/@src")[0]
-    info = container.xpath("//div[@id='video_info']")[0]
-    dvdid = info.xpath("div[@id='video_id']//td[@class='text']/text()")[0]
-    publish_date = info.xpath("div[@id='video_date']//td[@class='text']/text()")[0]
-    duration = info.xpath("div[@id='video_length']//span[@class='text']/text()")[0]
-    director_tag = info.xpath("//span[@class='director']/a/text()")
+    cover = sel.cover(container)[0]
+    info = sel.info(container)[0]
+    dvdid = sel.dvdid(info)[0]
+    publish_date = sel.publish_date(info)[0]
+    duration = sel.duration(info)[0]
+    director_tag = sel.director(info)
     if director_tag:
         movie.director = director_tag[0]
-    producer = info.xpath("//span[@class='maker']/a/text()")[0]
-    publisher_tag = info.xpath("//span[@class='label']/a/text()")
+    producer = sel.producer(info)[0]
+    publisher_tag = sel.publisher(info)
     if publisher_tag:
         movie.publisher = publisher_tag[0]
-    score_tag = info.xpath("//span[@class='score']/text()")
+    score_tag = sel.score(info)
     if score_tag:
         movie.score = score_tag[0].strip('()')
-    genre = info.xpath("//span[@class='genre']/a/text()")
-    actress = info.xpath("//span[@class='star']/a/text()")
+    genre = sel.genre(info)
+    actress = sel.actress(info)
 
     movie.dvdid = dvdid
     movie.url = new_url.replace(base_url, permanent_url)
@@ -132,7 +142,6 @@ def parse_data(movie: MovieInfo):
 if __name__ == "__main__":
     import pretty_errors
     pretty_errors.configure(display_link=True)
-    base_url = permanent_url
     movie = MovieInfo('IPX-177')
     try:
         parse_data(movie)
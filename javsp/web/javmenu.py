@@ -1,7 +1,7 @@
 """从JavMenu抓取数据"""
 import logging
 
-from javsp.web.base import Request, resp2html
+from javsp.web.base import Request, Selectors, resp2html
 from javsp.web.exceptions import *
 from javsp.datatype import MovieInfo
 
@@ -10,6 +10,20 @@ request = Request()
 
 logger = logging.getLogger(__name__)
 base_url = 'https://mrzyx.xyz'
+sel = Selectors('javmenu',
+    container="//div[@class='col-md-9 px-0']",
+    title="div[@class='col-12 mb-3']/h1/strong/text()",
+    video="//div[@class='single-video']",
+    cover_img="//img[@class='lazy rounded']/@data-src",
+    info="//div[@class='card-body']",
+    label="div/span[contains(text(), $label)]",
+    producer="div/span[contains(text(), '製作:')]/following-sibling::a/span/text()",
+    genre="//a[@class='genre']",
+    actress="div/span[contains(text(), '女優:')]/following-sibling::*/a/text()",
+    magnet_table="//table[contains(@class, 'magnet-table')]/tbody",
+    magnet_links="tr/td/a/@href",
+    preview_pics="//a[@data-fancybox='gallery']/@href",
+)
 
 
 def parse_data(movie: MovieInfo):
@@ -25,12 +39,12 @@ def parse_data(movie: MovieInfo):
         raise MovieNotFoundError(__name__, movie.dvdid)
 
     html = resp2html(r)
-    container = html.xpath("//div[@class='col-md-9 px-0']")[0]
-    title = container.xpath("div[@class='col-12 mb-3']/h1/strong/text()")[0]
+    container = sel.container(html)[0]
+    title = sel.title(container)[0]
     # 竟然还在标题里插广告，真的疯了。要不是我已经写了抓取器，才懒得维护这个破站
     title = title.replace('  | JAV目錄大全 | 每日更新', '')
     title = title.replace(' 免費在線看', '').replace(' 免費AV在線看', '')
-    cover_tag = container.xpath("//div[@class='single-video']")
+    cover_tag = sel.video(container)
     if len(cover_tag) > 0:
         video_tag = cover_tag[0].find('video')
         # URL首尾竟然也有空格……
@@ -38,16 +52,16 @@ def parse_data(movie: MovieInfo):
         # 预览影片改为blob了，无法获取
         # movie.preview_video = video_tag.find('source').get('src').strip()
     else:
-        cover_img_tag = container.xpath("//img[@class='lazy rounded']/@data-src")
+        cover_img_tag = sel.cover_img(container)
         if cover_img_tag:
             movie.cover = cover_img_tag[0].strip()
-    info = container.xpath("//div[@class='card-body']")[0]
-    publish_date = info.xpath("div/span[contains(text(), '日期:')]")[0].getnext().text
-    duration = info.xpath("div/span[contains(text(), '時長:')]")[0].getnext().text.replace('分鐘', '')
-    producer = info.xpath("div/span[contains(text(), '製作:')]/following-sibling::a/span/text()")
+    info = sel.info(container)[0]
+    publish_date = sel.label(info, label='日期:')[0].getnext().text
+    duration = sel.label(info, label='時長:')[0].getnext().text.replace('分鐘', '')
+    producer = sel.producer(info)
     if producer:
         movie.producer = producer[0]
-    genre_tags = info.xpath("//a[@class='genre']")
+    genre_tags = sel.genre(info)
     genre, genre_id = [], []
     for tag in genre_tags:
         items = tag.get('href').split('/')
@@ -55,13 +69,13 @@ def parse_data(movie: MovieInfo):
         genre.append(tag.text.strip())
         genre_id.append(pre_id)
         # genre的链接中含有censored字段，但是无法用来判断影片是否有码，因为完全不可靠……
-    actress = info.xpath("div/span[contains(text(), '女優:')]/following-sibling::*/a/text()") or None
-    magnet_table = container.xpath("//table[contains(@class, 'magnet-table')]/tbody")
+    actress = sel.actress(info) or None
+    magnet_table = sel.magnet_table(container)
     if magnet_table:
-        magnet_links = magnet_table[0].xpath("tr/td/a/@href")
+        magnet_links = sel.magnet_links(magnet_table[0])
         # 它的FC2数据是从JavDB抓的，JavDB更换图片服务器后它也跟上了，似乎数据更新频率还可以
         movie.magnet = [i.replace('[javdb.com]','') for i in magnet_links]
-    preview_pics = container.xpath("//a[@data-fancybox='gallery']/@href")
+    preview_pics = sel.preview_pics(container)
 
     if (not movie.cover) and preview_pics:
         movie.cover = preview_pics[0]
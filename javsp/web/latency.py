@@ -0,0 +1,132 @@
+"""按站点统计请求耗时，并据此为每个站点设置合适的超时时间"""
+import math
+import atexit
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from javsp.config import Cfg
+from javsp.store import JsonStore
+
+
+__all__ = ['LatencyHistogram', 'LatencyTracker', 'latency_tracker']
+
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram():
+    """对数分桶的耗时直方图，每记录一个新样本时旧样本的权重都会按decay衰减，因此反映的是近期的耗时分布"""
+    # 桶的上界从MIN_BOUND秒开始按RATIO倍递增，最后一个桶收纳所有更大的值
+    MIN_BOUND = 0.05
+    RATIO = 1.25
+    BUCKETS = 40
+
+    def __init__(self, counts: List[float] = None, samples: int = 0, decay: float = 0.98) -> None:
+        self.counts = list(counts) if counts else [0.0] * self.BUCKETS
+        self.samples = samples
+        self.decay = decay
+
+    @classmethod
+    def bound(cls, index: int) -> float:
+        return cls.MIN_BOUND * cls.RATIO ** index
+
+    @classmethod
+    def index_of(cls, seconds: float) -> int:
+        if seconds <= cls.MIN_BOUND:
+            return 0
+        i = math.ceil(math.log(seconds / cls.MIN_BOUND, cls.RATIO))
+        return min(i, cls.BUCKETS - 1)
+
+    def add(self, seconds: float):
+        self.counts = [i * self.decay for i in self.counts]
+        self.counts[self.index_of(seconds)] += 1
+        self.samples += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """近期耗时的q分位数（取所在桶的上界），没有样本时返回None"""
+        total = sum(self.counts)
+        if total <= 0:
+            return None
+        acc = 0.0
+        for i, count in enumerate(self.counts):
+            acc += count
+            if acc >= q * total:
+                return self.bound(i)
+        return self.bound(self.BUCKETS - 1)
+
+    def dump(self) -> dict:
+        return {'counts': [round(i, 4) for i in self.counts], 'samples': self.samples}
+
+
+class LatencyTracker():
+    """记录每个站点（域名）的请求耗时，根据近期耗时的分位数计算超时时间
+
+    Args:
+        store (JsonStore): 保存统计数据的存储，以便在多次运行之间沿用
+        default (float): 样本不足时使用的超时时间（秒）
+        factor (float): 超时时间 = 分位数 * factor
+        lower, upper (float): 超时时间的下限和上限（秒）
+        min_samples (int): 样本数达到此值后才根据统计数据计算超时时间
+        quantile (float): 使用的分位数
+    """
+    # 统计数据的有效期，长期未访问的站点的数据会被丢弃
+    EXPIRE = 30 * 24 * 3600
+
+    def __init__(self, store: JsonStore, default: float, factor: float, lower: float, upper: float,
+                 min_samples: int = 5, quantile: float = 0.99) -> None:
+        self.store = store
+        self.default = default
+        self.factor = factor
+        self.lower = lower
+        self.upper = upper
+        self.min_samples = min_samples
+        self.q = quantile
+        self._lock = threading.Lock()
+        self._hists: Dict[str, LatencyHistogram] = {}
+
+    def _hist(self, host: str) -> LatencyHistogram:
+        hist = self._hists.get(host)
+        if hist is None:
+            saved = self.store.get(host)
+            hist = LatencyHistogram(**saved) if saved else LatencyHistogram()
+            self._hists[host] = hist
+        return hist
+
+    def record(self, url: str, seconds: float):
+        """记录一次请求的耗时（读取超时的请求也应以超时时间记录，表示耗时至少为这么久）"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            hist = self._hist(host)
+            hist.add(seconds)
+            # 数据在程序退出时统一写入文件
+            self.store.set(host, hist.dump(), ttl=self.EXPIRE, save=False)
+
+    def timeout_for(self, url: str) -> Tuple[float, float]:
+        """获取访问url时应使用的(连接超时, 读取超时)
+
+        读取超时由近期耗时决定，从而避免慢但正常的站点频繁超时；连接超时不超过默认的超时时间，使无法连接的站点尽快失败
+        """
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            hist = self._hist(host)
+            if hist.samples < self.min_samples:
+                return self.default, self.default
+            read = hist.quantile(self.q) * self.factor
+        read = min(self.upper, max(self.lower, read))
+        return min(read, self.default), read
+
+
+def _create_tracker() -> Optional[LatencyTracker]:
+    cfg = Cfg().network.adaptive_timeout
+    if not cfg.enabled:
+        return None
+    store = JsonStore('latency.json')
+    atexit.register(store.save)
+    return LatencyTracker(store, Cfg().network.timeout.total_seconds(), cfg.factor,
+                          cfg.min.total_seconds(), cfg.max.total_seconds(), cfg.min_samples)
+
+
+# 未启用自适应超时时为None
+latency_tracker = _create_tracker()
@@ -3,7 +3,7 @@ import re
 import logging
 
 
-from javsp.web.base import Request, resp2html
+from javsp.web.base import Request, Selectors, resp2html
 from javsp.web.exceptions import *
 from javsp.config import Cfg
 from javsp.datatype import MovieInfo
@@ -14,6 +14,19 @@ base_url = 'https://www.mgstage.com'
 # 初始化Request实例（要求携带已通过R18认证的cookies，否则会被重定向到认证页面）
 request = Request()
 request.cookies = {'adc': '1'}
+# 影片的信息表格、简介和预览图都在div.detail_left中，因此从container（而不是整个网页）开始查找
+sel = Selectors('mgstage',
+    title="//div[@class='common_detail_cover']/h1/text()",
+    container="//div[@class='detail_left']",
+    cover=".//a[@id='EnlargeImage']/@href",
+    field=".//th[text()=$label]/following-sibling::td/text()",
+    field_link=".//th[text()=$label]/following-sibling::td/a/text()",
+    genre=".//th[text()='ジャンル：']/following-sibling::td/a",
+    review=".//td[@class='review']/span",
+    plot=".//dl[@id='introduction']/dd/p[not(@class='more')]",
+    preview_pics=".//a[@class='sample_image']/@href",
+    sample_button=".//a[@class='button_sample']/@href",
+)
 
 
 def parse_data(movie: MovieInfo):
@@ -28,37 +41,37 @@ def parse_data(movie: MovieInfo):
 
     html = resp2html(resp)
     # mgstage的文本中含有大量的空白字符（'\n \t'），需要使用strip去除
-    title = html.xpath("//div[@class='common_detail_cover']/h1/text()")[0].strip()
-    container = html.xpath("//div[@class='detail_left']")[0]
-    cover = container.xpath("//a[@id='EnlargeImage']/@href")[0]
+    title = sel.title(html)[0].strip()
+    container = sel.container(html)[0]
+    cover = sel.cover(container)[0]
     # 有链接的女优和仅有文本的女优匹配方法不同，因此分别匹配以后合并列表
-    actress_text = container.xpath("//th[text()='出演：']/following-sibling::td/text()")
-    actress_link = container.xpath("//th[text()='出演：']/following-sibling::td/a/text()")
+    actress_text = sel.field(container, label='出演：')
+    actress_link = sel.field_link(container, label='出演：')
     actress = [i.strip() for i in actress_text + actress_link]
     actress = [i for i in actress if i]     # 移除空字符串
-    producer = container.xpath("//th[text()='メーカー：']/following-sibling::td/a/text()")[0].strip()
-    duration_str = container.xpath("//th[text()='収録時間：']/following-sibling::td/text()")[0]
+    producer = sel.field_link(container, label='メーカー：')[0].strip()
+    duration_str = sel.field(container, label='収録時間：')[0]
     match = re.search(r'\d+', duration_str)
     if match:
         movie.duration = match.group(0)
-    dvdid = container.xpath("//th[text()='品番：']/following-sibling::td/text()")[0]
-    date_str = container.xpath("//th[text()='配信開始日：']/following-sibling::td/text()")[0]
+    dvdid = sel.field(container, label='品番：')[0]
+    date_str = sel.field(container, label='配信開始日：')[0]
     publish_date = date_str.replace('/', '-')
-    serial_tag = container.xpath("//th[text()='シリーズ：']/following-sibling::td/a/text()")
+    serial_tag = sel.field_link(container, label='シリーズ：')
     if serial_tag:
         movie.serial = serial_tag[0].strip()
     # label: 大意是某个系列策划用同样的番号，例如ABS打头的番号label是'ABSOLUTELY PERFECT'，暂时用不到
-    # label = container.xpath("//th[text()='レーベル：']/following-sibling::td/text()")[0].strip()
-    genre_tags = container.xpath("//th[text()='ジャンル：']/following-sibling::td/a")
+    # label = sel.field(container, label='レーベル：')[0].strip()
+    genre_tags = sel.genre(container)
     genre = [i.text.strip() for i in genre_tags]
-    score_str = container.xpath("//td[@class='review']/span")[0].tail.strip()
+    score_str = sel.review(container)[0].tail.strip()
     match = re.search(r'^[\.\d]+', score_str)
     if match:
         score = float(match.group()) * 2
         movie.score = f'{score:.2f}'
     # plot可能含有嵌套格式，为了保留plot中的换行关系，手动处理plot中的各个标签
     plots = []
-    plot_p_tags = container.xpath("//dl[@id='introduction']/dd/p[not(@class='more')]")
+    plot_p_tags = sel.plot(container)
     for p in plot_p_tags:
         children = p.getchildren()
         # 没有children时表明plot不含有格式，此时简单地提取文本就可以
@@ -74,11 +87,11 @@ def parse_data(movie: MovieInfo):
                 if child.tail:
                     plots.append(child.tail)
     plot = ''.join(plots).strip()
-    preview_pics = container.xpath("//a[@class='sample_image']/@href")
+    preview_pics = sel.preview_pics(container)
 
     if Cfg().crawler.hardworking:
         # 预览视频是点击按钮后再加载的，不在静态网页中
-        btn_url = container.xpath("//a[@class='button_sample']/@href")[0]
+        btn_url = sel.sample_button(container)[0]
         video_pid = btn_url.split('/')[-1]
         req_url = f'{base_url}/sampleplayer/sampleRespons.php?pid={video_pid}'
         resp = request.get(req_url).json()
@@ -4,7 +4,7 @@ import logging
 from typing import List
 
 
-from javsp.web.base import get_html
+from javsp.web.base import Selectors, get_html
 from javsp.web.exceptions import *
 from javsp.lib import strftime_to_minutes
 from javsp.datatype import MovieInfo
@@ -12,23 +12,37 @@ from javsp.datatype import MovieInfo
 
 logger = logging.getLogger(__name__)
 base_url = 'https://njav.tv/ja'
+sel = Selectors('njav',
+    search_results="//div[@class='box-item']/div[@class='detail']/a",
+    text="text()",
+    href="@href",
+    container="//div[@class='container']/div/div[@class='col']",
+    title="//div[@class='d-flex justify-content-between align-items-start']/div/h1/text()",
+    thumb_pic="//div[@id='player']/@data-poster",
+    plot="//div[@class='description']/p/text()",
+    magnet="//div[@class='magnet']/a/@href",
+    detail_items="//div[@class='detail-item']/div",
+    item_title="span/text()",
+    item_spans="span",
+    links_text="a/text()",
+)
 
 def search_video(movie: MovieInfo):
     id_uc = movie.dvdid
     # 抓取网页
     url = f'{base_url}/search?keyword={id_uc}'
     html = get_html(url)
-    list = html.xpath("//div[@class='box-item']/div[@class='detail']/a")
+    list = sel.search_results(html)
     video_url = None
     for item in list:
-        search_title = item.xpath("text()")[0]
+        search_title = sel.text(item)[0]
         if id_uc in search_title:
-            video_url = item.xpath("@href")
+            video_url = sel.href(item)
             break
         if id_uc.startswith("FC2-"):
             fc2id = id_uc.replace('FC2-', '')
             if "FC2" in search_title and fc2id in search_title:
-                video_url = item.xpath("@href")
+                video_url = sel.href(item)
                 break
     
     return get_list_first(video_url)
@@ -40,16 +54,16 @@ def parse_data(movie: MovieInfo):
     if not url:
         raise MovieNotFoundError(__name__, movie.dvdid)
     html = get_html(url)
-    container = html.xpath("//div[@class='container']/div/div[@class='col']")
+    container = sel.container(html)
     if len(container) > 0:
         container = container[0]
     else:
         raise MovieNotFoundError(__name__, movie.dvdid)
     
-    title = container.xpath("//div[@class='d-flex justify-content-between align-items-start']/div/h1/text()")[0]
-    thumb_pic = container.xpath("//div[@id='player']/@data-poster")
-    plot = " ".join(container.xpath("//div[@class='description']/p/text()"))
-    magnet = container.xpath("//div[@class='magnet']/a/@href")
+    title = sel.title(container)[0]
+    thumb_pic = sel.thumb_pic(container)
+    plot = " ".join(sel.plot(container))
+    magnet = sel.magnet(container)
     real_id = None
     publish_date = None
     duration_str = None
@@ -63,26 +77,26 @@ def parse_data(movie: MovieInfo):
     actress = []
 
     detail_dic = {}
-    for item in container.xpath("//div[@class='detail-item']/div"):
-        item_title = item.xpath('span/text()')[0]
+    for item in sel.detail_items(container):
+        item_title = sel.item_title(item)[0]
         if "タグ:" in item_title:
-            genre += item.xpath("span")[1].xpath("a/text()")
+            genre += sel.links_text(sel.item_spans(item)[1])
         elif "ジャンル:" in item_title:
-            genre += item.xpath("span")[1].xpath("a/text()")
+            genre += sel.links_text(sel.item_spans(item)[1])
         elif "レーベル:" in item_title:
-            genre += item.xpath("span")[1].xpath("a/text()")    
+            genre += sel.links_text(sel.item_spans(item)[1])    
         elif "女優:" in item_title:
-            actress = item.xpath("span")[1].xpath("a/text()")
+            actress = sel.links_text(sel.item_spans(item)[1])
         elif "シリーズ:" in item_title:
-            serial = get_list_first(item.xpath("span")[1].xpath("a/text()"))
+            serial = get_list_first(sel.links_text(sel.item_spans(item)[1]))
         elif "メーカー:" in item_title:
-            producer = get_list_first(item.xpath("span")[1].xpath("a/text()"))
+            producer = get_list_first(sel.links_text(sel.item_spans(item)[1]))
         elif "コード:" in item_title:
-            real_id = get_list_first(item.xpath("span")[1].xpath("text()"))
+            real_id = get_list_first(sel.text(sel.item_spans(item)[1]))
         elif "公開日:" in item_title:
-            publish_date = get_list_first(item.xpath("span")[1].xpath("text()"))
+            publish_date = get_list_first(sel.text(sel.item_spans(item)[1]))
         elif "再生時間:" in item_title:
-            duration_str = get_list_first(item.xpath("span")[1].xpath("text()"))
+            duration_str = get_list_first(sel.text(sel.item_spans(item)[1]))
     
     # 清除标题里的番号字符
     keywords = [real_id, " "]
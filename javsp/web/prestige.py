@@ -13,6 +13,19 @@ base_url = 'https://www.prestige-av.com'
 # prestige要求访问者携带已通过R18认证的cookies才能够获得完整数据，否则会被重定向到认证页面
 # （其他多数网站的R18认证只是在网页上遮了一层，完整数据已经传回，不影响爬虫爬取）
 cookies = {'__age_auth__': 'true'}
+sel = Selectors('prestige',
+    container="//section[@class='px-4 mb-4 md:px-8 md:mb-16']",
+    title="h1/span",
+    cover="//div[@class='c-ratio-image mr-8']/picture/source/img/@src",
+    label="//p[text()=$label]",
+    field="//p[text()=$label]/following-sibling::div/p/text()",
+    field_link="//p[text()=$label]/following-sibling::div/a/text()",
+    actress="//p[text()='出演者：']/following-sibling::div/p/a/text()",
+    publish_date="//p[text()='発売日：']/following-sibling::div/a/@href",
+    genre="//p[text()='ジャンル：']/following-sibling::div/a",
+    plot="//h2[text()='商品紹介']/following-sibling::div/p",
+    preview_pics="//h2[text()='サンプル画像']/following-sibling::div/div/picture/source/img/@src",
+)
 
 
 def parse_data(movie: MovieInfo):
@@ -29,30 +42,30 @@ def parse_data(movie: MovieInfo):
         raise SiteBlocked('prestige不允许从当前IP所在地区访问，请尝试更换为日本地区代理')
     resp.raise_for_status()
     html = resp2html(resp)
-    container_tags = html.xpath("//section[@class='px-4 mb-4 md:px-8 md:mb-16']")
+    container_tags = sel.container(html)
     if not container_tags:
         raise MovieNotFoundError(__name__, movie.dvdid)
 
     container = container_tags[0]
-    title = container.xpath("h1/span")[0].tail.strip()
-    cover = container.xpath("//div[@class='c-ratio-image mr-8']/picture/source/img/@src")[0]
+    title = sel.title(container)[0].tail.strip()
+    cover = sel.cover(container)[0]
     cover = cover.split('?')[0]
-    actress = container.xpath("//p[text()='出演者：']/following-sibling::div/p/a/text()")
+    actress = sel.actress(container)
     # 移除女优名中的空格，使女优名与其他网站保持一致
     actress = [i.strip().replace(' ', '') for i in actress]
-    duration_str = container.xpath("//p[text()='収録時間：']")[0].getnext().text_content()
+    duration_str = sel.label(container, label='収録時間：')[0].getnext().text_content()
     match = re.search(r'\d+', duration_str)
     if match:
         movie.duration = match.group(0)
-    date_url = container.xpath("//p[text()='発売日：']/following-sibling::div/a/@href")[0]
+    date_url = sel.publish_date(container)[0]
     publish_date = date_url.split('?date=')[-1]
-    producer = container.xpath("//p[text()='メーカー：']/following-sibling::div/a/text()")[0].strip()
-    dvdid = container.xpath("//p[text()='品番：']/following-sibling::div/p/text()")[0]
-    genre_tags = container.xpath("//p[text()='ジャンル：']/following-sibling::div/a")
+    producer = sel.field_link(container, label='メーカー：')[0].strip()
+    dvdid = sel.field(container, label='品番：')[0]
+    genre_tags = sel.genre(container)
     genre = [tag.text.strip() for tag in genre_tags]
-    serial = container.xpath("//p[text()='レーベル：']/following-sibling::div/a/text()")[0].strip()
-    plot = container.xpath("//h2[text()='商品紹介']/following-sibling::div/p")[0].text.strip()
-    preview_pics = container.xpath("//h2[text()='サンプル画像']/following-sibling::div/div/picture/source/img/@src")
+    serial = sel.field_link(container, label='レーベル：')[0].strip()
+    plot = sel.plot(container)[0].text.strip()
+    preview_pics = sel.preview_pics(container)
     preview_pics = [i.split('?')[0] for i in preview_pics]
 
     # prestige改版后已经无法获取高清封面，此前已经获取的高清封面地址也已失效
@@ -1,40 +1,157 @@
 """获取各个网站的免代理地址"""
 import re
 import sys
+import time
+import logging
+import threading
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from javsp.web.base import is_connectable, get_html, get_resp_text, request_get
+from javsp.config import Cfg
+from javsp.store import JsonStore
+from javsp.web.base import headers, pooled_get, get_html, get_resp_text, request_get
+
+
+__all__ = ['get_proxy_free_url', 'refresh', 'start_refresher']
+
+
+logger = logging.getLogger(__name__)
+# 已找到的免代理地址: {站点名称: {'url': 地址, 'latency': 耗时, 'time': 找到的时间}}
+_store = JsonStore('proxy_free.json')
+# prefer_url比最快的可用地址慢不超过此时间（秒）时视为同样快，优先使用prefer_url
+PREFER_MARGIN = 0.1
+_refresher: threading.Thread = None
 
 
 def get_proxy_free_url(site_name: str, prefer_url=None) -> str:
     """获取指定网站的免代理地址
     Args:
         site_name (str): 站点名称
-        prefer_url (str, optional): 优先测试此url是否可用
+        prefer_url (str, optional): 与其他候选地址同时测试，延迟相同时优先使用此url
     Returns:
         str: 指定站点的免代理地址（失败时为空字符串）
     """
-    if prefer_url and is_connectable(prefer_url, timeout=5):
-        return prefer_url
-    # 当prefer_url不可用时，尝试自动获取指定网站的免代理地址
+    site_name = site_name.lower()
+    # 优先使用之前找到的且仍在有效期内的地址，否则重新获取
+    saved = _store.get(site_name)
+    if not prefer_url:
+        return saved['url'] if saved else refresh(site_name)
+    if saved:
+        result = _choose_one([prefer_url, saved['url']], site_name, prefer_url)
+        if result:
+            return result[0]
+        # 之前找到的地址也已经不可用
+        _store.delete(site_name)
+        return refresh(site_name)
+    return refresh(site_name, prefer_url)
+
+
+def refresh(site_name: str, prefer_url: str = None) -> str:
+    """重新获取指定网站的免代理地址，并保存延迟最低的可用地址（失败时返回空字符串）
+
+    prefer_url会与获取到的候选地址一起同时测试，延迟相同时优先选用
+    """
     site_name = site_name.lower()
     func_name = f'_get_{site_name}_urls'
     get_funcs = [i for i in dir(sys.modules[__name__]) if i.startswith('_get_')]
-    if func_name in get_funcs:
-        get_urls = getattr(sys.modules[__name__], func_name)
-        try:
-            urls = get_urls()
-            return _choose_one(urls)
-        except:
-            return ''
-    else:
+    if func_name not in get_funcs:
         raise Exception("Dont't know how to get proxy-free url for " + site_name)
+    get_urls = getattr(sys.modules[__name__], func_name)
+    try:
+        urls = get_urls() or []
+    except Exception as e:
+        logger.debug(f"获取{site_name}的免代理地址失败: {e!r}")
+        urls = []
+    if prefer_url:
+        urls = [prefer_url] + urls
+    result = _choose_one(urls, site_name, prefer_url)
+    if not result:
+        return ''
+    url, latency = result
+    logger.debug(f"{site_name}的免代理地址: {url} ({latency*1000:.0f}ms)")
+    ttl = Cfg().network.routing.mirror_ttl.total_seconds()
+    _store.set(site_name, {'url': url, 'latency': round(latency, 3), 'time': time.time()}, ttl=ttl)
+    return url
+
+
+def _fetch(url: str, timeout: float):
+    return pooled_get(url, headers=headers, timeout=timeout)
+
+
+def _is_valid_page(site_name: str, resp) -> bool:
+    """检查响应是否为站点的正常网页（而不是错误页、CloudFlare的验证页或者域名停放页等）"""
+    if resp.status_code != 200:
+        return False
+    text = get_resp_text(resp).lower()
+    if 'just a moment...' in text:
+        return False
+    # 站点的网页中总会包含站点的名称（如标题中的JavBus, JAVLibrary）
+    return site_name in text
+
+
+def _probe(site_name: str, url: str) -> Optional[float]:
+    """测试url是否为站点的可用地址，可用时返回耗时（秒），否则返回None"""
+    start = time.monotonic()
+    try:
+        resp = _fetch(url, Cfg().network.routing.probe_timeout.total_seconds())
+    except Exception as e:
+        logger.debug(f"Not connectable: {url}\n" + repr(e))
+        return None
+    if not _is_valid_page(site_name, resp):
+        logger.debug(f"不是{site_name}的有效网页: {url} (HTTP {resp.status_code})")
+        return None
+    return time.monotonic() - start
+
+
+def _choose_one(urls, site_name: str, prefer_url: str = None) -> Optional[Tuple[str, float]]:
+    """同时测试所有地址，返回最先返回有效网页的地址（即延迟最低的可用地址）及其耗时
+
+    prefer_url在最快的地址之后PREFER_MARGIN秒内也返回了有效网页时，改为返回prefer_url
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return None
+    executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix='javsp-mirror')
+    futures = {executor.submit(_probe, site_name, i): i for i in urls}
+    prefer = next((f for f, url in futures.items() if url == prefer_url), None)
+    try:
+        for future in as_completed(futures):
+            latency = future.result()
+            if latency is None:
+                continue
+            if prefer is not None and future is not prefer:
+                try:
+                    prefer_latency = prefer.result(timeout=PREFER_MARGIN)
+                except TimeoutError:
+                    prefer_latency = None
+                if prefer_latency is not None:
+                    return prefer_url, prefer_latency
+            return futures[future], latency
+        return None
+    finally:
+        # 不等待较慢的地址测试完成
+        executor.shutdown(wait=False)
 
 
-def _choose_one(urls) -> str:
-    for url in urls:
-        if is_connectable(url, timeout=5):
-            return url
-    return ''
+def start_refresher(interval: float = 600):
+    """启动后台线程，定期重新获取存在时间超过有效期一半的免代理地址，使长时间运行时使用的地址保持可用"""
+    global _refresher
+    if _refresher is not None:
+        return
+    half_ttl = Cfg().network.routing.mirror_ttl.total_seconds() / 2
+    def loop():
+        while True:
+            time.sleep(interval)
+            now = time.time()
+            for site_name, saved in _store.items():
+                if now - saved['time'] >= half_ttl:
+                    logger.debug(f"后台刷新{site_name}的免代理地址")
+                    try:
+                        refresh(site_name)
+                    except Exception as e:
+                        logger.debug(f"刷新{site_name}的免代理地址失败: {e!r}")
+    _refresher = threading.Thread(target=loop, name='mirror-refresher', daemon=True)
+    _refresher.start()
 
 
 def _get_avsox_urls() -> list:
@@ -0,0 +1,188 @@
+"""代理池：在多个上游代理之间分配请求，并根据健康检查和请求结果自动剔除、恢复代理"""
+import time
+import random
+import logging
+import threading
+from typing import Callable, Dict, List
+from urllib.parse import urlsplit
+
+import requests
+
+
+__all__ = ['ProxyPool', 'PoolProxies', 'make_checker']
+
+
+logger = logging.getLogger(__name__)
+# 这些状态码说明代理的出口IP被站点封禁或限流
+BANNED_STATUS = (403, 429)
+# 这些异常说明代理本身无法使用（连接到代理失败）
+PROXY_ERRORS = (requests.exceptions.ProxyError, requests.exceptions.ConnectTimeout)
+
+
+class PoolProxies(dict):
+    """read_proxy()在启用代理池时返回的proxies，实际发送请求时才会从代理池中选择代理
+
+    其本身的内容为代理池中的第一个代理，以便直接传给requests等不经过代理池的调用者时仍然可用
+    """
+
+
+class _SiteStats():
+    """某个代理访问某个站点的统计数据（指数加权平均）"""
+    ALPHA = 0.2
+
+    def __init__(self) -> None:
+        self.latency = None
+        self.ban_rate = 0.0
+
+    def update(self, latency: float = None, banned: bool = False):
+        if latency is not None:
+            self.latency = latency if self.latency is None else (1-self.ALPHA)*self.latency + self.ALPHA*latency
+        self.ban_rate = (1-self.ALPHA)*self.ban_rate + self.ALPHA*(1.0 if banned else 0.0)
+
+
+class _Proxy():
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.failures = 0           # 连续失败的次数
+        self.evicted_at = None      # 被剔除的时间（time.monotonic()），为None表示代理可用
+        self.inflight = 0
+        self.check_latency = None   # 最近一次健康检查的耗时
+        self.sites: Dict[str, _SiteStats] = {}
+
+    @property
+    def evicted(self) -> bool:
+        return self.evicted_at is not None
+
+    def site(self, host: str) -> _SiteStats:
+        stats = self.sites.get(host)
+        if stats is None:
+            stats = self.sites[host] = _SiteStats()
+        return stats
+
+
+class ProxyPool():
+    """代理池
+
+    Args:
+        proxies: 代理地址列表
+        max_failures: 连续失败多少次后剔除代理
+        cooldown: 代理被剔除后，至少经过多久（秒）才可能通过健康检查重新启用（没有健康检查时直接重新启用）
+        check: 健康检查函数check(proxy) -> 耗时（秒），代理不可用时抛出异常
+    """
+    # 被封禁的响应没有任何用处，因此被站点封禁的比例对得分的影响远大于耗时
+    BAN_PENALTY = 50
+
+    def __init__(self, proxies: List[str], max_failures: int = 3, cooldown: float = 600,
+                 check: Callable[[str], float] = None) -> None:
+        self.proxies = [_Proxy(i) for i in dict.fromkeys(proxies)]
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.check = check
+        self._lock = threading.Lock()
+        self._checker: threading.Thread = None
+        self._stop = threading.Event()
+
+    def _score(self, proxy: _Proxy, host: str) -> float:
+        """代理的得分，越小越好"""
+        stats = proxy.sites.get(host)
+        latency = stats.latency if stats and stats.latency is not None else proxy.check_latency
+        if latency is None:
+            # 还没有任何数据的代理给一个乐观的估计值，使它能尽快被选中以获得实际的耗时数据
+            latency = 0.01
+        ban_rate = stats.ban_rate if stats else 0.0
+        return latency * (1 + self.BAN_PENALTY*ban_rate) * (1 + proxy.inflight)
+
+    def choose(self, url: str) -> str:
+        """为访问url选择一个代理（在两个随机的可用代理中选择得分较好的一个，以在代理之间分散请求）"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if self.check is None:
+                self._readmit_expired()
+            available = [i for i in self.proxies if not i.evicted]
+            if not available:
+                # 所有代理都被剔除时，选择最早被剔除的那个，而不是让请求直接失败
+                available = [min(self.proxies, key=lambda i: i.evicted_at)]
+            candidates = random.sample(available, min(2, len(available)))
+            proxy = min(candidates, key=lambda i: self._score(i, host))
+            proxy.inflight += 1
+            return proxy.url
+
+    def _readmit_expired(self):
+        now = time.monotonic()
+        for proxy in self.proxies:
+            if proxy.evicted and now - proxy.evicted_at >= self.cooldown:
+                logger.debug(f"代理的停用时间已结束，重新启用: {proxy.url}")
+                proxy.evicted_at = None
+                proxy.failures = 0
+
+    def _evict(self, proxy: _Proxy, reason: str):
+        if not proxy.evicted:
+            logger.warning(f"{reason}，暂时停用代理: {proxy.url}")
+            proxy.evicted_at = time.monotonic()
+
+    def _get(self, url: str) -> _Proxy:
+        return next(i for i in self.proxies if i.url == url)
+
+    def report(self, proxy_url: str, url: str, latency: float = None, banned: bool = False, failed: bool = False):
+        """记录一次通过代理发出的请求的结果"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            proxy = self._get(proxy_url)
+            proxy.inflight = max(0, proxy.inflight - 1)
+            if failed:
+                proxy.failures += 1
+                if proxy.failures >= self.max_failures:
+                    self._evict(proxy, f"连续{proxy.failures}次通过代理连接失败")
+                return
+            proxy.failures = 0
+            proxy.site(host).update(latency, banned)
+
+    def banned_sites(self, proxy_url: str, threshold: float = 0.5) -> List[str]:
+        """代理被哪些站点封禁的比例较高"""
+        with self._lock:
+            return [k for k, v in self._get(proxy_url).sites.items() if v.ban_rate >= threshold]
+
+    def run_checks(self):
+        """对所有代理进行一次健康检查: 不可用的代理被剔除，被剔除的代理在冷却时间结束后如果检查通过则重新启用"""
+        now = time.monotonic()
+        for proxy in list(self.proxies):
+            if proxy.evicted and now - proxy.evicted_at < self.cooldown:
+                continue
+            try:
+                latency = self.check(proxy.url)
+            except Exception as e:
+                with self._lock:
+                    self._evict(proxy, f"健康检查失败({e!r})")
+                    # 重新开始计算冷却时间
+                    proxy.evicted_at = time.monotonic()
+                continue
+            with self._lock:
+                proxy.check_latency = latency
+                if proxy.evicted:
+                    logger.info(f"代理已恢复可用: {proxy.url}")
+                proxy.evicted_at = None
+                proxy.failures = 0
+
+    def start_checker(self, interval: float):
+        """启动后台健康检查线程"""
+        if self.check is None or self._checker is not None:
+            return
+        def loop():
+            while not self._stop.is_set():
+                self.run_checks()
+                self._stop.wait(interval)
+        self._checker = threading.Thread(target=loop, name='proxy-checker', daemon=True)
+        self._checker.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def make_checker(check_url: str, timeout: float) -> Callable[[str], float]:
+    """生成通过代理访问check_url来检查代理是否可用的函数"""
+    def check(proxy: str) -> float:
+        start = time.monotonic()
+        r = requests.get(check_url, proxies={'http': proxy, 'https': proxy}, timeout=timeout)
+        r.raise_for_status()
+        return time.monotonic() - start
+    return check
@@ -0,0 +1,190 @@
+"""按站点限制请求速率：每个站点使用独立的令牌桶，遇到429/503时自动降速"""
+import time
+import logging
+import threading
+from datetime import date
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from requests.models import Response
+
+from javsp.config import Cfg
+from javsp.store import JsonStore
+from javsp.web.exceptions import QuotaExceeded
+
+
+__all__ = ['TokenBucket', 'RateLimiter', 'rate_limiter', 'translator_limiter']
+
+
+logger = logging.getLogger(__name__)
+# 这些状态码表示请求过于频繁或服务器过载，需要降速
+THROTTLE_STATUS = (429, 503)
+# 翻译API有严格的QPS限制，即使配置中没有为它们设置速率（或关闭了限速）也要遵守（配置中的同名设置优先）
+BUILTIN_SITES = {
+    'api.fanyi.baidu.com': {'rate': 1, 'burst': 1, 'daily_quota': None},
+    'translate.google': {'rate': 0.25, 'burst': 1, 'daily_quota': None},
+}
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket():
+    """令牌桶: 平均每秒放行rate个请求，最多允许burst个请求的突发
+
+    速率按AIMD方式调整: 每次被限流时速率减半，之后每次成功的请求使速率增加初始值的1/10，直至恢复到初始值。
+    rate为0表示不限速（但仍会遵守服务器的Retry-After要求）
+    """
+    # 降速时最低不低于初始速率的这一比例
+    MIN_RATIO = 1 / 16
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回获得令牌前需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.rate <= 0:
+                return wait
+            self._refill(now)
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttle(self, retry_after: float = None):
+        """被服务器限流: 降低速率，并在retry_after秒内暂停发送请求"""
+        with self._lock:
+            now = time.monotonic()
+            if self.max_rate > 0:
+                self._refill(now)
+                self.rate = max(self.max_rate * self.MIN_RATIO, self.rate / 2)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def recover(self):
+        """请求成功: 逐步恢复速率"""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class RateLimiter():
+    """为每个站点（域名）维护一个令牌桶，并统计需要限制每日请求数的站点的请求次数
+
+    Args:
+        default (dict): 未单独配置的站点所使用的速率，如{'rate': 5, 'burst': 5}
+        sites (Dict[str, dict]): 各个站点的速率与每日配额，键名只要出现在网址的域名中即视为匹配（如'javdb'）
+        quota_store (JsonStore): 保存每日请求次数的存储，为None时不限制每日请求数
+    """
+    def __init__(self, default: dict, sites: Dict[str, dict] = None, quota_store: JsonStore = None) -> None:
+        self.default = default
+        self.sites = sites or {}
+        self.quota_store = quota_store
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _match(self, host: str):
+        for site, rule in self.sites.items():
+            if site.lower() in host:
+                return site, rule
+        return None, self.default
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    _, rule = self._match(host)
+                    bucket = TokenBucket(rule['rate'], rule['burst'])
+                    self._buckets[host] = bucket
+        return bucket
+
+    def _count_quota(self, url: str):
+        site, rule = self._match(urlsplit(url).netloc.lower())
+        quota = rule.get('daily_quota')
+        if not (site and quota and self.quota_store):
+            return
+        key = f"{site}:{date.today().isoformat()}"
+        with self._lock:
+            used = self.quota_store.get(key, 0)
+            if used >= quota:
+                raise QuotaExceeded(f"{site}: 已达到每日{quota}次的请求上限")
+            # 计数只需要保留到第二天
+            self.quota_store.set(key, used + 1, ttl=2*24*3600)
+
+    def acquire(self, url: str):
+        """在向url发送请求前调用，必要时阻塞直至可以发送请求"""
+        self._count_quota(url)
+        self.bucket(url).acquire()
+
+    def feedback(self, url: str, resp: Response):
+        """根据响应状态调整站点的速率"""
+        bucket = self.bucket(url)
+        if resp.status_code in THROTTLE_STATUS:
+            retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+            bucket.throttle(retry_after)
+            host = urlsplit(url).netloc
+            logger.debug(f"🐢 {host}: HTTP {resp.status_code}，降低请求速率至{bucket.rate:.2f}次/秒" +
+                         (f"，{retry_after:.0f}秒后再继续请求" if retry_after else ''))
+        else:
+            bucket.recover()
+
+
+def merge_builtin_sites(sites: Dict[str, dict]) -> Dict[str, dict]:
+    """在配置的站点之后追加配置中没有的内置站点（匹配时按顺序查找，因此配置的站点优先）"""
+    merged = dict(sites)
+    for site, rule in BUILTIN_SITES.items():
+        merged.setdefault(site, rule)
+    return merged
+
+
+def _create_limiter() -> Optional[RateLimiter]:
+    cfg = Cfg().network.rate_limit
+    if not cfg.enabled:
+        return None
+    default = cfg.default.model_dump()
+    sites = merge_builtin_sites({k: v.model_dump() for k, v in cfg.sites.items()})
+    quota_store = None
+    if any(i['daily_quota'] for i in sites.values()):
+        quota_store = JsonStore('daily_quota.json')
+    return RateLimiter(default, sites, quota_store)
+
+
+# 未启用限速时为None
+rate_limiter = _create_limiter()
+# 翻译接口使用的限速器: 未启用限速时仅对内置的翻译API站点限速，其他站点不受限制
+translator_limiter = rate_limiter or RateLimiter({'rate': 0, 'burst': 1}, dict(BUILTIN_SITES))
@@ -0,0 +1,185 @@
+"""为各个站点选择访问路线: 直连、经由代理或者使用免代理地址，选择结果会在有效期内持久保存"""
+import time
+import logging
+import threading
+import cloudscraper
+from typing import Callable, Dict, List, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from javsp.config import Cfg
+from javsp.store import JsonStore
+from javsp.web.base import headers, proxy_pool, read_proxy, session_pool
+from javsp.web.clearance import clearance_store
+
+
+__all__ = ['Route', 'RouteTable', 'route_table', 'select_route']
+
+
+logger = logging.getLogger(__name__)
+# Route.proxy取此值时表示经由代理池访问
+POOL = 'pool'
+
+
+class Route(NamedTuple):
+    """访问站点的路线: 站点地址以及使用的代理（None表示直连）"""
+    base_url: str
+    proxy: Optional[str] = None
+
+    @property
+    def proxies(self) -> dict:
+        """发送请求时应使用的proxies参数"""
+        if self.proxy is None:
+            return {}
+        if self.proxy == POOL:
+            return read_proxy()
+        return {'http': self.proxy, 'https': self.proxy}
+
+    def __str__(self) -> str:
+        return f"{self.base_url} ({'直连' if self.proxy is None else '代理: ' + self.proxy})"
+
+
+def _current_proxy() -> Optional[str]:
+    """当前配置的代理对应的Route.proxy（未配置代理时为None）"""
+    if proxy_pool is not None:
+        return POOL
+    proxies = read_proxy()
+    return proxies.get('https') if proxies else None
+
+
+def candidate_routes(permanent_url: str, mirrors: List[str] = ()) -> List[Route]:
+    """列出访问站点的所有可能路线，排在前面的是不进行测速时的默认选择（与以往的行为一致）"""
+    proxy = _current_proxy()
+    urls = list(dict.fromkeys([i.rstrip('/') for i in mirrors if i]))
+    if proxy:
+        routes = [Route(permanent_url, proxy)] + [Route(i, proxy) for i in urls]
+    else:
+        routes = []
+    routes += [Route(i) for i in urls] + [Route(permanent_url)]
+    return list(dict.fromkeys(routes))
+
+
+class RouteTable():
+    """测量各条路线的速度并选择最快的可用路线，选择结果保存在store中，在有效期内直接沿用
+
+    Args:
+        store (JsonStore): 保存选择结果的存储
+        ttl (float): 选择结果的有效期（秒）
+        probe_timeout (float): 测试每条路线时的超时时间（秒）
+        enabled (bool): 为False时不测速，总是使用默认路线
+    """
+    def __init__(self, store: JsonStore, ttl: float, probe_timeout: float, enabled=True) -> None:
+        self.store = store
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self.enabled = enabled
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _site_lock(self, site: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(site, threading.Lock())
+
+    def get(self, site: str) -> Optional[Route]:
+        saved = self.store.get(site)
+        if not saved:
+            return None
+        route = Route(*saved)
+        # 代理配置变化后，之前选择的经由代理的路线不再有效
+        if route.proxy is not None and route.proxy != _current_proxy():
+            return None
+        return route
+
+    def set(self, site: str, route: Route):
+        self.store.set(site, list(route), ttl=self.ttl)
+
+    def invalidate(self, site: str):
+        """丢弃站点的选择结果（比如路线已经无法访问），下次访问时重新测速"""
+        if site in self.store:
+            logger.debug(f"丢弃{site}的访问路线，下次访问时将重新测速")
+            self.store.delete(site)
+
+    def select(self, site: str, permanent_url: str, mirrors: List[str] = (),
+               discover: Callable[[], List[str]] = None, probe: Callable[[Route, float], bool] = None) -> Route:
+        """获取站点当前应使用的路线
+
+        Args:
+            site (str): 站点名称
+            permanent_url (str): 站点的永久地址
+            mirrors (List[str]): 站点的免代理地址
+            discover: 获取更多免代理地址的函数，仅在需要重新测速时调用
+            probe: 测试路线是否可用的函数probe(route, timeout) -> bool，默认为GET站点首页并检查是否返回200
+        """
+        if not self.enabled:
+            return candidate_routes(permanent_url, mirrors)[0]
+        route = self.get(site)
+        if route:
+            return route
+        with self._site_lock(site):
+            # 等待锁的期间其他线程可能已经完成了测速
+            route = self.get(site)
+            if route:
+                return route
+            if discover:
+                try:
+                    mirrors = list(mirrors) + list(discover() or [])
+                except Exception as e:
+                    logger.debug(f"获取{site}的免代理地址失败: {e!r}")
+            routes = candidate_routes(permanent_url, mirrors)
+            route = self._measure(site, routes, probe or default_probe)
+            if route is None:
+                logger.warning(f"{site}的所有访问路线均不可用，将使用默认路线: {routes[0]}")
+                return routes[0]
+            logger.debug(f"{site}的访问路线: {route}")
+            self.set(site, route)
+            return route
+
+    def _measure(self, site: str, routes: List[Route], probe: Callable[[Route, float], bool]) -> Optional[Route]:
+        """同时测试所有路线，最先成功响应的即为最快的可用路线"""
+        def timed_probe(route: Route):
+            start = time.monotonic()
+            ok = probe(route, self.probe_timeout)
+            return ok, time.monotonic() - start
+
+        executor = ThreadPoolExecutor(max_workers=len(routes), thread_name_prefix='javsp-route')
+        futures = {executor.submit(timed_probe, i): i for i in routes}
+        try:
+            for future in as_completed(futures):
+                route = futures[future]
+                try:
+                    ok, elapsed = future.result()
+                except Exception as e:
+                    logger.debug(f"{site}: 路线不可用: {route}: {e!r}")
+                    continue
+                if ok:
+                    logger.debug(f"{site}: 最快的路线: {route} ({elapsed*1000:.0f}ms)")
+                    return route
+                logger.debug(f"{site}: 路线不可用: {route}")
+            return None
+        finally:
+            # 不等待较慢的路线测试完成
+            executor.shutdown(wait=False)
+
+
+def default_probe(route: Route, timeout: float, use_scraper=False) -> bool:
+    """GET站点首页并检查是否返回200
+
+    测速请求直接经由Session发出，不经过网页缓存、相同请求的合并以及限速（否则测得的并不是路线本身的耗时）
+    """
+    if use_scraper:
+        session = cloudscraper.create_scraper()
+        if clearance_store is not None:
+            clearance_store.seed(session)
+    else:
+        session = session_pool.get(route.base_url, route.proxies)
+    r = session.get(route.base_url, headers=headers.copy(), proxies=route.proxies, timeout=timeout)
+    return r.status_code == 200
+
+
+def _create_table() -> RouteTable:
+    cfg = Cfg().network.routing
+    return RouteTable(JsonStore('routes.json'), cfg.ttl.total_seconds(),
+                      cfg.probe_timeout.total_seconds(), cfg.enabled)
+
+
+route_table = _create_table()
+select_route = route_table.select
@@ -0,0 +1,345 @@
+"""在单个asyncio事件循环中并发运行各个站点的抓取器"""
+import sys
+import time
+import atexit
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List
+
+import requests
+
+from javsp.config import Cfg
+from javsp.store import JsonStore
+from javsp.datatype import MovieInfo
+from javsp.web.base import CancelToken, DeadlineExceeded, cancel_scope, run_blocking
+from javsp.web.exceptions import *
+from javsp.web.route import route_table
+
+
+__all__ = ['CrawlResult', 'CrawlerRunner', 'CircuitBreaker', 'NotFoundCache', 'get_runner']
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotFoundCache():
+    """记录各个站点上不存在的影片，在有效期内不再去这些站点抓取它们
+
+    add()只修改内存中的数据，需要调用flush()才会写入文件（每部影片抓取结束时写入一次）
+    """
+    def __init__(self, store: JsonStore, expire: float) -> None:
+        self.store = store
+        self.expire = expire
+        self._dirty = False
+
+    @staticmethod
+    def _key(crawler: str, movie_id: str) -> str:
+        # crawler可以是完整的模块名，统一使用短名称作为键名
+        return crawler.split('.')[-1] + ':' + movie_id.upper()
+
+    def __contains__(self, item) -> bool:
+        crawler, movie_id = item
+        return bool(movie_id) and self._key(crawler, movie_id) in self.store
+
+    def add(self, crawler: str, movie_id: str):
+        if movie_id:
+            self.store.set(self._key(crawler, movie_id), True, ttl=self.expire, save=False)
+            self._dirty = True
+
+    def flush(self):
+        """将add()记录的数据写入文件（没有新的记录时不写入）"""
+        if self._dirty:
+            self._dirty = False
+            self.store.save()
+
+    def clear(self):
+        self._dirty = False
+        self.store.clear()
+
+
+class CircuitBreaker():
+    """按站点统计连续的访问失败（被屏蔽、超时等），达到阈值后暂停访问该站点（断路器）
+
+    断开后的站点在冷却时间内直接跳过；冷却时间结束后进入半开状态，只放行一个抓取任务进行试探:
+    试探成功则恢复正常访问，失败则重新开始冷却。cooldown为None时，断开后在本次运行中不再访问该站点。
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold: int, cooldown: float = None) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing = set()
+        self._tripped = set()
+
+    def state(self, site: str) -> str:
+        with self._lock:
+            return self._state(site)
+
+    def _state(self, site: str) -> str:
+        if site not in self._opened_at:
+            return self.CLOSED
+        if self.cooldown is None or time.monotonic() - self._opened_at[site] < self.cooldown:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow(self, site: str) -> bool:
+        """检查当前是否允许访问指定的站点"""
+        with self._lock:
+            state = self._state(site)
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and site not in self._probing:
+                logger.debug(f"🔌 {site}: 冷却结束，尝试重新访问")
+                self._probing.add(site)
+                return True
+            return False
+
+    def record_success(self, site: str):
+        with self._lock:
+            self._failures.pop(site, None)
+            self._probing.discard(site)
+            if self._opened_at.pop(site, None) is not None:
+                logger.info(f"🔌 {site}: 站点已恢复访问")
+
+    def record_failure(self, site: str):
+        with self._lock:
+            self._failures[site] = self._failures.get(site, 0) + 1
+            probing = site in self._probing
+            self._probing.discard(site)
+            if probing or self._failures[site] >= self.threshold:
+                if site not in self._opened_at or probing:
+                    if self.cooldown is None:
+                        logger.warning(f"🔌 {site}: 连续{self._failures[site]}次访问失败，本次运行中将不再访问此站点")
+                    else:
+                        logger.warning(f"🔌 {site}: 连续{self._failures[site]}次访问失败，将暂停访问此站点{self.cooldown:.0f}秒")
+                self._opened_at[site] = time.monotonic()
+                self._tripped.add(site)
+
+    def release(self, site: str):
+        """抓取任务未完成就被放弃（既不算成功也不算失败）时，释放可能占用的试探机会"""
+        with self._lock:
+            self._probing.discard(site)
+
+    @property
+    def tripped(self) -> List[str]:
+        """本次运行中曾经被断开过的站点"""
+        with self._lock:
+            return sorted(self._tripped)
+
+
+class CrawlResult:
+    """单个抓取器的抓取结果"""
+    SUCCESS = 'success'         # 抓取成功
+    NOT_FOUND = 'not_found'     # 站点上没有这部影片
+    DUPLICATE = 'duplicate'     # 站点上有多部番号相同的影片
+    BLOCKED = 'blocked'         # 被站点屏蔽或缺少权限/凭据
+    NETWORK = 'network'         # 重试多次后仍然是网络错误
+    ERROR = 'error'             # 其他未知错误
+    TIMEOUT = 'timeout'         # 超时未完成，已被取消
+    TRIPPED = 'tripped'         # 站点的断路器已断开，跳过了抓取
+    SKIPPED = 'skipped'         # 优先级更高的站点已提供了所需的全部数据，提前结束了抓取
+    # 这些结果说明站点本身当前无法正常访问，会计入断路器的失败次数
+    SITE_FAILURES = (BLOCKED, NETWORK, TIMEOUT)
+
+    def __init__(self, name: str, info: MovieInfo, status: str, error: Exception = None) -> None:
+        self.name = name
+        self.info = info
+        self.status = status
+        self.error = error
+
+    @property
+    def success(self) -> bool:
+        return self.status == self.SUCCESS
+
+    def __repr__(self) -> str:
+        return f"{__class__.__name__}('{self.name}': {self.status})"
+
+
+class CrawlerRunner:
+    """抓取器的运行器
+
+    所有影片的抓取任务都在同一个后台事件循环中调度，因此不需要为每个抓取器创建线程。
+    抓取器模块如果提供了`async def parse_data_async(movie)`，则直接在事件循环中运行它；否则通过线程池运行同步的
+    `parse_data(movie)`，以便在所有抓取器都迁移到异步实现之前保持兼容。
+
+    取消是协作式的: 超时或被跳过的异步抓取器会在其下一个await处结束；而同步的`parse_data`无法被中断，
+    运行器只是不再等待它，它会在I/O线程中继续运行，直到其下一个请求检查取消令牌时才会失败（期间仍占用一个线程）。
+    """
+    def __init__(self, not_found_cache: NotFoundCache = None, breaker: CircuitBreaker = None) -> None:
+        self._loop: asyncio.AbstractEventLoop = None
+        self._lock = threading.Lock()
+        self.not_found_cache = not_found_cache
+        self.breaker = breaker
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台运行的事件循环（首次使用时才创建）"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                th = threading.Thread(target=self._loop.run_forever, name='crawler-loop', daemon=True)
+                th.start()
+            return self._loop
+
+    def run(self, jobs: Dict[str, MovieInfo], timeout: float = None,
+            settled: Callable[[Dict[str, CrawlResult]], bool] = None) -> Dict[str, CrawlResult]:
+        """运行一组抓取器并等待它们全部结束（可以在多个线程中同时调用）
+
+        Args:
+            jobs: {抓取器模块名: 要更新的MovieInfo实例}
+            timeout: 整组任务的最长等待时间（秒），超时后未完成的抓取器将被取消
+            settled: 每当有抓取器结束时，使用已结束的抓取器的结果调用此函数，返回True时取消其余的抓取器（SKIPPED）
+
+        Returns:
+            Dict[str, CrawlResult]: 各个抓取器的抓取结果，顺序与jobs一致
+        """
+        future = asyncio.run_coroutine_threadsafe(self.crawl(jobs, timeout, settled), self.loop)
+        return future.result()
+
+    async def crawl(self, jobs: Dict[str, MovieInfo], timeout: float = None,
+                    settled: Callable[[Dict[str, CrawlResult]], bool] = None) -> Dict[str, CrawlResult]:
+        """run()的协程版本，可以在已有的事件循环中直接await"""
+        results = {}
+        tasks = {}
+        token_deadline = None if timeout is None else time.monotonic() + timeout
+        # 抓取器可能会修改info中的番号，因此记下抓取前的番号以便记录到NotFoundCache中
+        movie_ids = {name: info.dvdid or info.cid for name, info in jobs.items()}
+        for name, info in jobs.items():
+            movie_id = movie_ids[name]
+            if self.not_found_cache and (name, movie_id) in self.not_found_cache:
+                logger.debug(f"⏭️ {name}: 之前已确认站点上没有影片 '{movie_id}'，跳过抓取")
+                results[name] = CrawlResult(name, info, CrawlResult.NOT_FOUND)
+            elif self.breaker and not self.breaker.allow(name):
+                logger.debug(f"🔌 {name}: 站点的断路器已断开，跳过抓取")
+                results[name] = CrawlResult(name, info, CrawlResult.TRIPPED)
+            else:
+                tasks[name] = asyncio.create_task(self._crawl_one(name, info, CancelToken(token_deadline)), name=name)
+        pending = set(tasks.values())
+        skipped = False
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        # 没有settled时等待所有任务结束；否则每结束一个任务就检查一次是否还需要等待其余的任务
+        return_when = asyncio.FIRST_COMPLETED if settled else asyncio.ALL_COMPLETED
+        while pending:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=return_when)
+            if not done:
+                break
+            if pending and settled:
+                finished = {n: t.result() for n, t in tasks.items() if t.done()}
+                finished.update(results)
+                if settled(finished):
+                    skipped = True
+                    break
+        for task in pending:
+            if skipped:
+                logger.debug(f"⏩ {task.get_name()}: 所需的数据已全部获得，不再等待此抓取器")
+            else:
+                logger.debug(f"⏱️ {task.get_name()}: 抓取超时，已取消")
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for name, task in tasks.items():
+            if task.cancelled():
+                status = CrawlResult.SKIPPED if skipped else CrawlResult.TIMEOUT
+                results[name] = CrawlResult(name, jobs[name], status)
+            else:
+                results[name] = task.result()
+                if results[name].status == CrawlResult.NOT_FOUND and self.not_found_cache:
+                    self.not_found_cache.add(name, movie_ids[name])
+            if results[name].status in (CrawlResult.NETWORK, CrawlResult.TIMEOUT):
+                # 当前的访问路线可能已经不可用，下次访问该站点时重新选择（路线按站点的短名称保存）
+                route_table.invalidate(name.split('.')[-1])
+            if self.breaker:
+                if results[name].status in CrawlResult.SITE_FAILURES:
+                    self.breaker.record_failure(name)
+                elif results[name].status == CrawlResult.SKIPPED:
+                    self.breaker.release(name)
+                else:
+                    self.breaker.record_success(name)
+        if self.not_found_cache:
+            self.not_found_cache.flush()
+        # 保持与jobs一致的顺序（即抓取器的优先级顺序）
+        return {name: results[name] for name in jobs}
+
+    async def _crawl_one(self, name: str, info: MovieInfo, token: CancelToken) -> CrawlResult:
+        """对抓取器函数进行包装，便于记录日志和自动重试
+
+        抓取器运行期间token绑定为当前上下文的取消令牌: 任务被取消或结束后，仍在I/O线程中运行的同步抓取器
+        发出的下一个请求会立即失败，而不会继续在后台访问网络
+        """
+        try:
+            with cancel_scope(token):
+                return await self._crawl_with_retry(name, info)
+        finally:
+            token.cancel()
+
+    async def _crawl_with_retry(self, name: str, info: MovieInfo) -> CrawlResult:
+        """运行抓取器，遇到网络错误时按配置的次数重试"""
+        mod = sys.modules[name]
+        parse_async = getattr(mod, 'parse_data_async', None)
+        # TODO: 抓取器如果带有parse_data_raw，说明它已经自行进行了重试处理，此时将重试次数设置为1
+        retry = 1 if hasattr(mod, 'parse_data_raw') else Cfg().network.retry
+        result = CrawlResult(name, info, CrawlResult.ERROR)
+        for cnt in range(retry):
+            try:
+                if parse_async:
+                    await parse_async(info)
+                else:
+                    await run_blocking(mod.parse_data, info)
+                movie_id = info.dvdid or info.cid
+                logger.debug(f"🎬 {name}: 抓取成功 '{movie_id}' ✅")
+                logger.debug(f"🔗 {name}: 来源地址 '{info.url}'")
+                return CrawlResult(name, info, CrawlResult.SUCCESS)
+            except MovieNotFoundError as e:
+                logger.debug(f"⚠️ {name}: 影片未找到 - {str(e)}")
+                return CrawlResult(name, info, CrawlResult.NOT_FOUND, e)
+            except MovieDuplicateError as e:
+                logger.exception(f"⚠️ {name}: 重复影片 - {str(e)}")
+                return CrawlResult(name, info, CrawlResult.DUPLICATE, e)
+            except (SiteBlocked, SitePermissionError, CredentialError) as e:
+                logger.error(f"🚫 {name}: 站点访问受限 - {str(e)}")
+                return CrawlResult(name, info, CrawlResult.BLOCKED, e)
+            except DeadlineExceeded as e:
+                logger.debug(f"⏱️ {name}: {e}")
+                return CrawlResult(name, info, CrawlResult.TIMEOUT, e)
+            except requests.exceptions.RequestException as e:
+                logger.debug(f'🔄 {name}: 网络错误，重试中 ({cnt+1}/{retry})\n  原因: {repr(e)}')
+                result = CrawlResult(name, info, CrawlResult.NETWORK, e)
+            except Exception as e:
+                logger.exception(f"❌ {name}: 未知错误 - {str(e)}")
+                result = CrawlResult(name, info, CrawlResult.ERROR, e)
+        return result
+
+
+def _create_runner() -> CrawlerRunner:
+    cfg = Cfg().crawler.not_found_cache
+    not_found_cache = None
+    if cfg.enabled or cfg.purge:
+        not_found_cache = NotFoundCache(JsonStore('not_found.json'), cfg.expire.total_seconds())
+        if cfg.purge:
+            logger.info('已清空记录的各站点不存在的影片')
+            not_found_cache.clear()
+        if not cfg.enabled:
+            not_found_cache = None
+        else:
+            atexit.register(not_found_cache.flush)
+    cfg = Cfg().crawler.circuit_breaker
+    breaker = None
+    if cfg.enabled:
+        cooldown = cfg.cooldown.total_seconds() if cfg.cooldown else None
+        breaker = CircuitBreaker(cfg.threshold, cooldown)
+    return CrawlerRunner(not_found_cache, breaker)
+
+
+_runner = _create_runner()
+def get_runner() -> CrawlerRunner:
+    """获取全局共享的抓取器运行器"""
+    return _runner
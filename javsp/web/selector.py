@@ -0,0 +1,68 @@
+"""预编译的XPath选择器: 各个抓取器在模块加载时一次性编译所需的XPath，解析每部影片时不再重复编译"""
+from typing import Dict, Iterator
+
+from lxml import etree
+
+
+__all__ = ['Selector', 'Selectors', 'get_selector']
+
+
+# 所有已定义的选择器: {命名空间: Selectors}
+_registry: Dict[str, 'Selectors'] = {}
+
+
+class Selector():
+    """一个预编译的XPath表达式，调用方式与element.xpath()相同: sel(node, **变量)
+
+    表达式中可以使用XPath变量（如"p/span[text()=$label]"），调用时以关键字参数传入，
+    这样只是比较的文本不同的多个查询可以共用同一个编译结果
+    """
+    __slots__ = ('name', 'path', '_xpath')
+
+    def __init__(self, name: str, path: str) -> None:
+        self.name = name
+        self.path = path
+        # 抓取器只把文本结果当作str使用，不需要能够回溯到所在节点的smart string
+        self._xpath = etree.XPath(path, smart_strings=False)
+
+    def __call__(self, node, **variables) -> list:
+        return self._xpath(node, **variables)
+
+    def first(self, node, default=None, **variables):
+        """返回第一个匹配结果，没有匹配时返回default"""
+        result = self._xpath(node, **variables)
+        return result[0] if result else default
+
+    def __repr__(self) -> str:
+        return f"<Selector {self.name}: {self.path!r}>"
+
+
+class Selectors():
+    """同一个抓取器的一组选择器，按字段名称访问: sel = Selectors('javbus', title="h3/text()"); sel.title(container)
+
+    Args:
+        namespace (str): 命名空间（通常为抓取器的名称），字段的完整名称为'命名空间.字段名'
+        **paths: {字段名: XPath表达式}，表达式有语法错误时在定义时即抛出XPathSyntaxError
+    """
+    def __init__(self, namespace: str, **paths: str) -> None:
+        self.namespace = namespace
+        self._selectors = {k: Selector(f'{namespace}.{k}', v) for k, v in paths.items()}
+        _registry[namespace] = self
+
+    def __getattr__(self, name: str) -> Selector:
+        try:
+            return self.__dict__['_selectors'][name]
+        except KeyError:
+            raise AttributeError(f"'{self.namespace}'中没有定义选择器'{name}'") from None
+
+    def __iter__(self) -> Iterator[Selector]:
+        return iter(self._selectors.values())
+
+    def __len__(self) -> int:
+        return len(self._selectors)
+
+
+def get_selector(fullname: str) -> Selector:
+    """按完整名称（如'javbus.title'）查找选择器"""
+    namespace, _, name = fullname.partition('.')
+    return getattr(_registry[namespace], name)
@@ -0,0 +1,74 @@
+"""合并同时发出的相同请求：同一时刻对同一资源的多个请求只向服务器发送一次"""
+import copy
+import logging
+import threading
+from typing import Callable, Dict
+
+from requests.models import Response
+
+
+__all__ = ['SingleFlight']
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Call():
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException = None
+        self.followers = 0
+
+
+class SingleFlight():
+    """同一个key同时只有一个调用者(leader)真正执行fn，其他调用者等待并共享它的结果
+
+    Args:
+        retry_on: leader遇到这些异常时，说明失败原因只与leader自身有关（如leader的抓取任务已被取消），
+                  此时等待中的调用者不共享这个异常，而是重新发起请求
+    """
+    def __init__(self, retry_on: tuple = ()) -> None:
+        self.retry_on = retry_on
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Response], wait_timeout: Callable[[], float] = None) -> Response:
+        """执行fn或者等待正在执行的相同请求
+
+        Args:
+            wait_timeout: 返回等待时长上限的函数（秒，None表示不限），超时后抛出TimeoutError
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    call.followers += 1
+            if leader:
+                return self._lead(key, call, fn)
+            if not call.done.wait(wait_timeout() if wait_timeout else None):
+                raise TimeoutError(f"等待相同的请求完成时超时: {key}")
+            if call.error is None:
+                # 共享同一个响应体，但各自持有独立的Response对象，以免调用者修改encoding等属性时互相影响
+                return copy.copy(call.result)
+            if not isinstance(call.error, self.retry_on):
+                raise call.error
+
+    def _lead(self, key: str, call: _Call, fn: Callable[[], Response]) -> Response:
+        try:
+            call.result = fn()
+            # 在唤醒其他调用者之前读取完响应体，使它们可以直接使用
+            call.result.content
+            return copy.copy(call.result)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.followers and call.result is not None:
+                logger.debug(f"🔗 {call.followers}个相同的请求共享了同一次响应: {call.result.url}")
+            call.done.set()
@@ -1,6 +1,5 @@
 """网页翻译接口"""
-# 由于翻译服务不走代理，而且需要自己的错误处理机制，因此不通过base.py来管理网络请求
-import time
+# 由于翻译服务不走代理，而且需要自己的错误处理机制，因此不通过base.py来管理网络请求（但各翻译接口的QPS限制交由限速器统一处理）
 from typing import Union
 import uuid
 import random
@@ -15,7 +14,8 @@ __all__ = ['translate', 'translate_movie_info']
 
 from javsp.config import BaiduTranslateEngine, BingTranslateEngine, Cfg, ClaudeTranslateEngine, GoogleTranslateEngine, OpenAITranslateEngine, TranslateEngine
 from javsp.datatype import MovieInfo
-from javsp.web.base import read_proxy
+from javsp.web.base import read_proxy, rate_limited
+from javsp.web.ratelimit import translator_limiter
 
 
 logger = logging.getLogger(__name__)
@@ -145,15 +145,9 @@ def baidu_translate(texts, app_id, api_key, to='zh'):
     sign_input = app_id + texts + str(salt) + api_key
     sign = md5(sign_input.encode('utf-8')).hexdigest()
     payload = {'appid': app_id, 'q': texts, 'from': 'auto', 'to': to, 'salt': salt, 'sign': sign}
-    # 由于百度标准版限制QPS为1，连续翻译标题和简介会超限，因此需要添加延时
-    now = time.perf_counter()
-    last_access = getattr(baidu_translate, '_last_access', -1)
-    wait = 1.0 - (now - last_access)
-    if wait > 0:
-        time.sleep(wait)
-    r = requests.post(api_url, params=payload, headers=headers)
+    # 百度标准版限制QPS为1，连续翻译标题和简介会超限，因此需要限速（即使关闭了network.rate_limit也会按内置的速率限速）
+    r = rate_limited(requests.post, translator_limiter)(api_url, params=payload, headers=headers)
     result = r.json()
-    baidu_translate._last_access = time.perf_counter()
     return result
 
 
@@ -173,26 +167,25 @@ def bing_translate(texts, api_key, to='zh-Hans'):
     return result
 
 
-_google_trans_wait = 60
+_google_trans_retry = 3
 def google_trans(texts, to='zh_CN'):
     """使用Google翻译文本（默认翻译为简体中文）"""
     # API: https://www.jianshu.com/p/ce35d89c25c3
     # client参数的选择: https://github.com/lmk123/crx-selection-translate/issues/223#issue-184432017
-    global _google_trans_wait
     url = f"https://translate.google.com.hk/translate_a/single?client=gtx&dt=t&dj=1&ie=UTF-8&sl=auto&tl={to}&q={texts}"
     proxies = read_proxy()
-    r = requests.get(url, proxies=proxies)
-    while r.status_code == 429:
-        logger.warning(f"HTTP {r.status_code}: {r.reason}: Google翻译请求超限，将等待{_google_trans_wait}秒后重试")
-        time.sleep(_google_trans_wait)
-        r = requests.get(url, proxies=proxies)
-        if r.status_code == 429:
-            _google_trans_wait += random.randint(60, 90)
+    # Google翻译的API有QPS限制，由限速器控制请求间隔；遇到429时限速器会自动降速，之后的重试会相应地等待更久
+    get = rate_limited(requests.get, translator_limiter)
+    r = get(url, proxies=proxies)
+    for _ in range(_google_trans_retry):
+        if r.status_code != 429:
+            break
+        logger.warning(f"HTTP {r.status_code}: {r.reason}: Google翻译请求超限，降低请求速率后重试")
+        r = get(url, proxies=proxies)
     if r.status_code == 200:
         result = r.json()
     else:
         result = {'error_code': r.status_code, 'error_msg': r.reason}
-    time.sleep(4) # Google翻译的API有QPS限制，因此需要等待一段时间
     return result
 
 def claude_translate(texts, api_key, to="zh_CN"):
@@ -0,0 +1,77 @@
+"""启动时预热各个抓取器的网络连接: 解析域名、建立连接池中的keep-alive连接、让cloudscraper会话提前通过验证"""
+import time
+import logging
+from types import ModuleType
+from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+
+from javsp.web.base import Request, headers, pooled_head
+
+
+__all__ = ['warm_up', 'start_warm_up', 'report_unreachable']
+
+
+logger = logging.getLogger(__name__)
+
+
+def _site_url(mod: ModuleType) -> Optional[str]:
+    """获取抓取器访问的站点地址: 需要选择访问路线的抓取器（如javbus）会在此时完成路线的选择"""
+    if hasattr(mod, 'init_route'):
+        return mod.init_route().base_url
+    return getattr(mod, 'base_url', None) or getattr(mod, 'permanent_url', None)
+
+
+def _warm_up_one(mod: ModuleType) -> Optional[str]:
+    """预热一个抓取器，站点无法访问时返回原因"""
+    url = _site_url(mod)
+    if not url:
+        return None
+    request = getattr(mod, 'request', None)
+    start = time.monotonic()
+    try:
+        if isinstance(request, Request) and request.scraper is not None:
+            # 使用抓取器自己的会话，使cloudscraper在整理第一部影片前就通过验证
+            r = request.get(url, delay_raise=True)
+        elif isinstance(request, Request):
+            r = request.head(url)
+        else:
+            r = pooled_head(url, headers=headers)
+    except requests.exceptions.RequestException as e:
+        return f"{type(e).__name__}"
+    logger.debug(f"预热 {url}: HTTP {r.status_code} ({(time.monotonic()-start)*1000:.0f}ms)")
+    if r.status_code == 403 and b'>Just a moment...<' in r.content:
+        return "无法通过CloudFlare检测"
+    return None
+
+
+def warm_up(mods: List[ModuleType]) -> Dict[str, str]:
+    """同时预热所有抓取器，返回无法访问的站点: {抓取器名称: 原因}"""
+    unreachable = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(mods)), thread_name_prefix='javsp-warmup') as executor:
+        futures = {mod.__name__.split('.')[-1]: executor.submit(_warm_up_one, mod) for mod in mods}
+        for name, future in futures.items():
+            try:
+                reason = future.result()
+            except Exception as e:
+                reason = repr(e)
+            if reason:
+                unreachable[name] = reason
+    return unreachable
+
+
+def start_warm_up(mods: List[ModuleType]) -> Future:
+    """在后台线程中预热，返回可以等待预热结果的Future"""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='javsp-warmup')
+    future = executor.submit(warm_up, mods)
+    executor.shutdown(wait=False)
+    return future
+
+
+def report_unreachable(future: Future):
+    """等待预热完成，并报告无法访问的站点"""
+    unreachable = future.result()
+    if unreachable:
+        details = ', '.join(f"{k}({v})" for k, v in unreachable.items())
+        logger.warning(f"以下站点当前无法访问，相关抓取器可能无法获取数据: {details}")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+
+"""检查番号识别的准确性，并测量get_id、get_cid、guess_av_type、detect_special_attr每秒能处理的文件数
+
+使用的语料（制表符分隔，'*'表示不检查该项）:
+    unittest/testdata_avid_corpus.txt       收集的真实文件名
+    unittest/testdata_avid_synthetic.txt    按模板生成的文件名，由本工具的--generate生成，预期结果由模板决定
+每一行的各列依次为: 分类, 文件名, get_id, get_cid, guess_av_type(cid或dvdid), detect_special_attr(文件名, dvdid)，
+最后一列为known时表示已知无法正确识别（不计为错误）
+用法:
+    python tools/bench_avid.py                  检查准确性并测量速度，有识别错误时返回值为1
+    python tools/bench_avid.py --generate       重新生成合成语料（修改模板后使用）
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter, defaultdict
+
+
+file_dir = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(file_dir, '..')))
+from javsp.avid import IdEngine, get_cid, get_engine, get_ids, guess_av_type
+from javsp.lib import detect_special_attr
+
+
+corpus_dir = os.path.abspath(os.path.join(file_dir, '../unittest'))
+real_corpus = os.path.join(corpus_dir, 'testdata_avid_corpus.txt')
+synthetic_corpus = os.path.join(corpus_dir, 'testdata_avid_synthetic.txt')
+COLUMNS = ['category', 'filename', 'dvdid', 'cid', 'type', 'attr', 'known']
+ANY = '*'
+
+
+def load_corpus(path: str):
+    rows = []
+    with open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line and not line.startswith('#'):
+                rows.append(dict(zip(COLUMNS, line.split('\t'))))
+    return rows
+
+
+def save_corpus(path: str, rows, header: str):
+    with open(path, 'wt', encoding='utf-8', newline='\n') as f:
+        f.write(f'# {header}\n# ' + '\t'.join(COLUMNS) + '\n')
+        for row in rows:
+            values = [row.get(i, '') for i in COLUMNS]
+            # 只有已知无法正确识别的行才需要最后一列
+            if not values[-1]:
+                values.pop()
+            f.write('\t'.join(values) + '\n')
+
+
+# 生成合成语料使用的素材
+NORMAL_PREFIXES = ['ABP', 'SSNI', 'IPX', 'MIDE', 'STARS', 'SDMF', 'KAWD', 'PRED', 'MIDV', 'JUL', 'SSIS', 'HEYZO',
+                   'CAWD', 'WAAA', 'DASD', 'MEYD', 'ADN', 'EBOD', 'FSDSS', 'IBW']
+DOMAIN_PREFIXES = ['[thz.la]', 'hhd800.com@', 'hjd2048.com-', 'bbs2048.org@', '[98t.tv]', 'fbfb.me_', '@小飞鼠@imouser.com_']
+NOISE_SUFFIXES = ['', '', ' 1080p', '.HD', '_4K', '-cd1', '-cd2', ' 美少女の休日']
+EXTENSIONS = ['.mp4', '.mkv', '.avi', '.wmv']
+# 后缀: 预期的detect_special_attr结果
+ATTR_SUFFIXES = {'': '', '-C': 'C', '-U': 'U', '-UC': 'UC', 'C': 'C', '-uncensored': 'U', '[无码破解]': 'U'}
+
+
+def _row(category, filename, dvdid=ANY, cid='', type_='normal', attr=''):
+    return {'category': category, 'filename': filename, 'dvdid': dvdid, 'cid': cid, 'type': type_, 'attr': attr}
+
+
+def _maybe_folder(rnd: random.Random, avid: str, filename: str) -> str:
+    """部分文件放到以番号或其他名称命名的文件夹中（文件名中已有番号，文件夹不影响结果）"""
+    folder = rnd.choice(['', '', 'movies/', 'D:/Videos/', avid + '/'])
+    return folder + filename
+
+
+def generate_synthetic(count: int, seed: int = 0):
+    """按模板生成语料，每一行的预期结果都由模板决定而不是由识别函数得到"""
+    rnd = random.Random(seed)
+    def normal():
+        prefix = rnd.choice(NORMAL_PREFIXES)
+        number = f'{rnd.randint(1, 999):03d}'
+        avid = f'{prefix}-{number}'
+        # IBW的番号带有后缀z，不与其他后缀组合
+        if prefix == 'IBW':
+            avid += 'z'
+            body, attr_suffix = rnd.choice([f'{prefix}-{number}z', f'{prefix.lower()}_{number}z']), ''
+        else:
+            # 不带分隔符时使用大写，以免与cid（仅由小写字母和数字组成）混淆。
+            # 以RED结尾的PRED等系列不带分隔符时会被识别为东热的RED系列，因此总是带有分隔符
+            forms = [avid, avid.lower(), f'{prefix.lower()}_{number}']
+            body = rnd.choice(forms if prefix.endswith('RED') else forms + [f'{prefix}{number}'])
+            attr_suffix = rnd.choice(list(ATTR_SUFFIXES))
+        noise = rnd.choice(NOISE_SUFFIXES) if not attr_suffix else ''
+        filename = _maybe_folder(rnd, avid, body + attr_suffix + noise + rnd.choice(EXTENSIONS))
+        yield _row('normal', filename, avid.upper(), attr=ATTR_SUFFIXES[attr_suffix])
+    def domain():
+        prefix = rnd.choice(NORMAL_PREFIXES[:-1])
+        avid = f'{prefix}-{rnd.randint(1, 999):03d}'
+        body = rnd.choice([avid, avid.lower()])
+        yield _row('domain', rnd.choice(DOMAIN_PREFIXES) + body + rnd.choice(EXTENSIONS), avid)
+    def fc2():
+        number = str(rnd.randint(10000, 4999999))
+        fmt = rnd.choice(['FC2-PPV-{}', 'fc2-ppv-{}', 'FC2PPV-{}', 'fc2ppv_{}', 'FC2-{}', 'FC2PPV {} 【個人撮影】',
+                          '[FC2-PPV-{}]', 'fc2-ppv-{}-1', 'FC2-PPV-{}_2'])
+        filename = _maybe_folder(rnd, 'FC2-' + number, fmt.format(number) + rnd.choice(EXTENSIONS))
+        yield _row('fc2', filename, 'FC2-' + number, type_='fc2')
+    def heydouga():
+        series, number = rnd.randint(4000, 4999), rnd.randint(1, 999)
+        if rnd.random() < 0.5:
+            body = rnd.choice(['heydouga-{}-{:03d}', 'HEYDOUGA_{}_{:03d}', 'heydouga-{}-0{:03d}']).format(series, number)
+            avid = f'HEYDOUGA-{series}-{number:03d}'
+        else:
+            body = rnd.choice(['hey-{}-{:03d}', 'HEY_{}_{:03d}', 'hey-{}-0{:03d}']).format(series, number)
+            avid = f'heydouga-{series}-{number:03d}'
+        yield _row('heydouga', body + rnd.choice(EXTENSIONS), avid)
+    def getchu():
+        number = str(rnd.randint(1000, 1299999))
+        # 'getchu123456'这样不带分隔符的小写文件名符合cid的格式，会被视为cid
+        body = rnd.choice(['getchu-{}', 'GETCHU_{}', 'GETCHU{}']).format(number)
+        yield _row('getchu', body + '.mp4', 'GETCHU-' + number, type_='getchu')
+    def gyutto():
+        number = str(rnd.randint(10000, 299999))
+        body = rnd.choice(['gyutto-{}', 'GYUTTO-{}']).format(number)
+        yield _row('gyutto', body + '.mp4', 'GYUTTO-' + number, type_='gyutto')
+    def cid():
+        label = ''.join(rnd.choices('abcdefghijklmnopqrstuvwxyz', k=rnd.randint(2, 5)))
+        number = f'{rnd.randint(1, 999):05d}'
+        value = rnd.choice([f'{rnd.randint(1, 499)}{label}{number}', f'h_{rnd.randint(100, 1999)}{label}{number}',
+                            f'{label}{number}', f'{rnd.randint(100, 999)}_{rnd.randint(1000, 99999)}'])
+        if len(value) < 7:
+            value = 'h_1127' + value
+        filename = value + rnd.choice(['', '', 'cd1', '_1', '-2']) + rnd.choice(EXTENSIONS)
+        # 文件名能够匹配为cid时dvdid多半是错的，因此不检查get_id的结果
+        yield _row('cid', filename, ANY, value, 'cid')
+    def uncensored():
+        date = f'{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}{rnd.randint(10, 24):02d}'
+        sep, number = rnd.choice('-_'), f'{rnd.randint(1, 999):03d}'
+        if rnd.random() < 0.7:
+            body = rnd.choice(['{}', 'Caribbeancom_{}', 'Carib-{}', '[无码] {}']).format(date + sep + number)
+            yield _row('uncensored', body + rnd.choice(EXTENSIONS), date + sep + number)
+        else:
+            # 东热的n, k系列
+            avid = rnd.choice('nk') + f'{rnd.randint(0, 1999):04d}'
+            yield _row('uncensored', avid + rnd.choice(['', '_hd']) + '.mp4', avid.upper())
+    generators = [(normal, 10), (domain, 3), (fc2, 3), (heydouga, 1), (getchu, 1), (gyutto, 1), (cid, 3), (uncensored, 2)]
+    funcs = [g for g, weight in generators for _ in range(weight)]
+    rows, seen = [], set()
+    while len(rows) < count:
+        for row in rnd.choice(funcs)():
+            if row['filename'] not in seen:
+                seen.add(row['filename'])
+                rows.append(row)
+    return sorted(rows, key=lambda r: (r['category'], r['filename']))
+
+
+def check(rows):
+    """检查识别结果，返回[(行, 列, 预期, 实际)]（包括已知无法正确识别的行）"""
+    errors = []
+    for row in rows:
+        filename = row['filename']
+        dvdid = get_engine().get_id(filename)
+        cid = get_cid(filename)
+        actual = {'dvdid': dvdid, 'cid': cid, 'type': guess_av_type(cid or dvdid),
+                  'attr': detect_special_attr(filename, dvdid)}
+        for key, value in actual.items():
+            expected = row.get(key, ANY)
+            if expected != ANY and value != expected:
+                errors.append((row, key, expected, value))
+    return errors
+
+
+def rate(func, items, rounds: int) -> float:
+    """func处理items中的所有元素，返回每秒处理的数量（取最快的一轮）"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for i in items:
+            func(i)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def benchmark(rows, rounds: int):
+    filenames = [i['filename'] for i in rows]
+    avids = [i['cid'] or i['dvdid'] for i in rows if (i['cid'] or i['dvdid']) != ANY]
+    pairs = [(i['filename'], i['dvdid']) for i in rows if i['dvdid'] != ANY]
+    engine = IdEngine(get_engine().ignored_patterns)
+    def cold(filename):
+        # 每次识别前清空缓存，测量不利用已有识别结果时的速度
+        engine._match_norm.cache_clear()
+        return engine.get_id(filename)
+    results = {
+        'get_id': rate(get_engine().get_id, filenames, rounds),
+        'get_id (无缓存)': rate(cold, filenames, rounds),
+        'get_ids': len(filenames) / min(_timeit(get_ids, filenames) for _ in range(rounds)),
+        'get_cid': rate(get_cid, filenames, rounds),
+        'guess_av_type': rate(guess_av_type, avids, rounds),
+        'detect_special_attr': rate(lambda p: detect_special_attr(*p), pairs, rounds),
+    }
+    return results
+
+
+def _timeit(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--generate', action='store_true', help='重新生成合成语料')
+    parser.add_argument('--count', type=int, default=3000, help='合成语料的行数')
+    parser.add_argument('--seed', type=int, default=0, help='生成合成语料使用的随机种子')
+    parser.add_argument('--rounds', type=int, default=5, help='测量速度的重复次数（取最快的一次）')
+    parser.add_argument('--repeat', type=int, default=20, help='测量速度时将语料重复的次数')
+    args = parser.parse_args()
+
+    if args.generate:
+        rows = generate_synthetic(args.count, args.seed)
+        save_corpus(synthetic_corpus, rows, f'由tools/bench_avid.py --generate --count {args.count} --seed {args.seed}生成，请勿手动修改')
+        print(f'已生成{len(rows)}行合成语料: {synthetic_corpus}')
+        return 0
+
+    rows = load_corpus(real_corpus) + load_corpus(synthetic_corpus)
+    errors = check(rows)
+    total, wrong = Counter(i['category'] for i in rows), defaultdict(set)
+    for row, _, _, _ in errors:
+        wrong[row['category']].add(row['filename'])
+    print(f"{'category':<12}{'files':>7}{'accuracy':>10}")
+    for category, count in sorted(total.items()):
+        print(f'{category:<12}{count:>7}{1 - len(wrong[category]) / count:>10.2%}')
+    unexpected = [i for i in errors if not i[0].get('known')]
+    for row, key, expected, value in errors:
+        note = '（已知问题）' if row.get('known') else ''
+        print(f"  {row['filename']!r}: {key} 预期为'{expected}'，实际为'{value}'{note}")
+
+    # 语料中的文件名各不相同，重复多次以模拟扫描时同一文件夹、同一番号的多个文件
+    bench_rows = rows * args.repeat
+    print(f'\n{"function":<22}{"files/s":>12}')
+    for name, value in benchmark(bench_rows, args.rounds).items():
+        print(f'{name:<22}{value:>12,.0f}')
+    return 1 if unexpected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+"""比较网页解析的旧路径（解码为str后交给lxml，必要时对整个网页检测字符集）与新路径（原始数据直接交给lxml）的耗时
+
+默认使用unittest/data中的抓取结果生成各个站点的模拟网页（按站点的实际编码进行编码），
+也可以通过--dir指定保存了真实网页的文件夹（文件名中包含站点名称，如'javbus_ABC-123.html'）
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from glob import glob
+from html import escape
+
+import lxml.html
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+
+file_dir = os.path.dirname(__file__)
+data_dir = os.path.abspath(os.path.join(file_dir, '../unittest/data'))
+sys.path.insert(0, os.path.abspath(os.path.join(file_dir, '..')))
+from javsp.web.base import SITE_ENCODINGS, guess_encoding, parse_html
+
+
+# 模拟网页中站点的域名，用于匹配站点编码表
+SITE_HOSTS = {'dl_getchu': 'dl.getchu.com', 'gyutto': 'gyutto.com'}
+# 模拟网页的大致大小（字节），与真实的影片详情页相当
+PAGE_SIZE = 150 * 1024
+
+
+def make_resp(url: str, body: bytes, content_type: str) -> Response:
+    r = Response()
+    r.status_code, r.url, r._content = 200, url, body
+    r.headers = CaseInsensitiveDict({'Content-Type': content_type})
+    return r
+
+
+def fixture_pages():
+    """根据抓取结果生成模拟网页: 返回[(名称, Response)]"""
+    pages = []
+    for file in sorted(glob(os.path.join(data_dir, '*.json'))):
+        name = os.path.splitext(os.path.basename(file))[0]
+        site = name[name.rindex('(')+1:-1]
+        with open(file, 'rt', encoding='utf-8') as f:
+            info = json.load(f)
+        host = SITE_HOSTS.get(site, f'www.{site}.com')
+        encoding = SITE_ENCODINGS.get(host, 'utf-8')
+        links = ''.join(f'<a href="/genre/{i}">{escape(str(v))}</a>'
+                        for i, v in enumerate((info.get('genre') or []) + (info.get('actress') or [])))
+        block = (f'<div class="item"><h3>{escape(str(info.get("title")))}</h3><p>{escape(str(info.get("plot")))}</p>'
+                 f'<span class="genre">{links}</span></div>\n')
+        body = f'<html><head><title>{escape(str(info.get("title")))}</title></head><body>'
+        while len(body.encode('utf-8')) < PAGE_SIZE:
+            body += block
+        body += '</body></html>'
+        # 使用非UTF-8编码的站点通常没有在响应头中正确声明编码
+        content_type = 'text/html' if encoding != 'utf-8' else 'text/html; charset=UTF-8'
+        data = body.encode(encoding, errors='replace')
+        pages.append((name, make_resp(f'https://{host}/{info["dvdid"]}', data, content_type)))
+    return pages
+
+
+def dir_pages(folder: str):
+    pages = []
+    for file in sorted(glob(os.path.join(folder, '*.htm*'))):
+        name = os.path.basename(file)
+        site = name.split('_')[0]
+        with open(file, 'rb') as f:
+            data = f.read()
+        host = SITE_HOSTS.get(site, f'www.{site}.com')
+        pages.append((name, make_resp(f'https://{host}/', data, 'text/html')))
+    return pages
+
+
+def old_explicit(resp: Response):
+    """旧路径: 按已知编码解码为str后交给lxml"""
+    host = resp.url.split('/')[2]
+    resp.encoding = SITE_ENCODINGS.get(host, 'utf-8')
+    return lxml.html.fromstring(resp.text)
+
+
+def old_detect(resp: Response):
+    """旧路径: 未指定编码时对整个网页进行字符集检测"""
+    resp.encoding = resp.apparent_encoding
+    return lxml.html.fromstring(resp.text)
+
+
+def new_path(resp: Response):
+    return parse_html(resp.content, guess_encoding(resp))
+
+
+def bench(func, pages, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _, resp in pages:
+            func(resp)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dir', help='保存了真实网页的文件夹')
+    parser.add_argument('--rounds', type=int, default=5, help='重复次数（取最快的一次）')
+    args = parser.parse_args()
+
+    pages = dir_pages(args.dir) if args.dir else fixture_pages()
+    if not pages:
+        print('没有找到网页')
+        return
+    size = sum(len(r.content) for _, r in pages)
+    print(f'{len(pages)}个网页, 共{size/1024/1024:.1f}MiB, 重复{args.rounds}次取最快的一次\n')
+    # 检查新旧路径的解析结果一致
+    for name, resp in pages:
+        old, new = old_explicit(resp).text_content(), new_path(resp).text_content()
+        if old != new:
+            print(f'解析结果不一致: {name}')
+    paths = [('旧: 指定编码, 解码为str', old_explicit), ('旧: 检测整个网页的字符集', old_detect),
+             ('新: 原始数据直接交给lxml', new_path)]
+    baseline = None
+    for label, func in paths:
+        elapsed = bench(func, pages, args.rounds)
+        baseline = baseline or elapsed
+        print(f'{label:<24}{elapsed*1000:9.1f}ms  {elapsed/len(pages)*1000:7.2f}ms/页  x{baseline/elapsed:.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+
+"""测量各个抓取器解析每个网页的耗时和内存分配，并与保存的基准数据进行比较
+
+使用unittest/cassettes中录制的响应回放各个抓取器的parse_data（不访问网络），因此需要先录制:
+    pytest unittest/test_crawlers.py --cassette record
+测量的指标（每个网页）:
+    parse_ms        解析耗时（多轮中最快的一次，不含回放响应本身的耗时）
+    peak_kib        解析期间Python堆内存的峰值（lxml/libxml2自身分配的内存不在统计范围内）
+    allocs          解析结束时仍未释放的内存块数量，用于发现缓存无限增长或对网页的意外引用
+用法:
+    python tools/bench_parsers.py --save        测量并保存基准数据
+    python tools/bench_parsers.py               测量并与基准数据比较，有指标劣化超过阈值时返回值为1
+"""
+import os
+import gc
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from glob import glob
+
+import lxml.etree
+
+
+file_dir = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(file_dir, '..')))
+from javsp.datatype import MovieInfo
+from javsp.web.base import Cassette, use_cassette
+from javsp.web.route import route_table
+import javsp.web.base
+
+
+cassette_dir = os.path.abspath(os.path.join(file_dir, '../unittest/cassettes'))
+default_baseline = os.path.join(cassette_dir, 'baseline.json')
+# 参与比较的指标，以及判定为劣化时允许的最小绝对变化量（避免数值很小时的抖动被误判为劣化）
+METRICS = {'parse_ms': 0.5, 'peak_kib': 64, 'allocs': 50}
+
+
+def prepare_replay():
+    """回放时要保证发出的请求与录制时相同: 不使用网页缓存，不根据测速结果选择访问路线，也不进行限速等待"""
+    javsp.web.base.http_cache = None
+    route_table.enabled = False
+    if javsp.web.base.rate_limiter:
+        javsp.web.base.rate_limiter.acquire = lambda url: None
+
+
+def load_cases(crawler='*'):
+    """返回[(名称, 抓取器, 创建MovieInfo的函数, 录制文件)]，名称与unittest/data中的数据文件一致，如'IPX-177 (javbus)'"""
+    cases = []
+    for file in sorted(glob(os.path.join(cassette_dir, f'* ({crawler}).json.gz'))):
+        name = os.path.basename(file)[:-len('.json.gz')]
+        avid, site = name[:name.rindex(' (')], name[name.rindex('(')+1:-1]
+        if site == 'fanza':
+            factory = lambda avid=avid: MovieInfo(cid=avid)
+        else:
+            factory = lambda avid=avid: MovieInfo(avid)
+        cases.append((name, site, factory, file))
+    return cases
+
+
+def get_parser(crawler: str):
+    mod_name = 'javsp.web.' + crawler
+    __import__(mod_name)
+    return sys.modules[mod_name].parse_data
+
+
+def run_once(parse_data, factory, file):
+    """回放一次，返回(解析耗时（秒）, 解析时发生的异常)"""
+    cassette = Cassette(file, 'replay')
+    movie = factory()
+    error = None
+    start = time.perf_counter()
+    with use_cassette(cassette):
+        try:
+            parse_data(movie)
+        except Exception as e:
+            # 解析失败（如抓取器找不到影片）同样计入耗时，解析结果是否正确由test_crawlers.py负责
+            error = e
+    return time.perf_counter() - start - cassette.fetch_time, error
+
+
+def measure(parse_data, factory, file, rounds: int) -> dict:
+    # 先运行一次，使模块级的缓存、选择器等完成初始化，不计入测量结果
+    _, error = run_once(parse_data, factory, file)
+    parse_time = min(run_once(parse_data, factory, file)[0] for _ in range(rounds))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        before_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run_once(parse_data, factory, file)
+        _, peak = tracemalloc.get_traced_memory()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    # 只统计本次解析新增的内存块，tracemalloc自身的内存不计入
+    exclude = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(exclude).compare_to(before.filter_traces(exclude), 'lineno')
+    allocs = sum(max(0, i.count_diff) for i in stats)
+    return {
+        'parse_ms': round(parse_time * 1000, 3),
+        'peak_kib': round((peak - before_size) / 1024, 1),
+        'allocs': allocs,
+        'error': repr(error) if error else None,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """与基准数据比较，返回劣化的项目: [(名称, 指标, 基准值, 当前值)]"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, min_delta in METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new - old > max(old * threshold, min_delta):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def environment() -> dict:
+    return {'python': platform.python_version(), 'lxml': lxml.etree.__version__, 'machine': platform.machine()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('crawlers', nargs='*', help='仅测试指定的抓取器（默认为全部录制的用例）')
+    parser.add_argument('--rounds', type=int, default=5, help='测量耗时的重复次数（取最快的一次）')
+    parser.add_argument('--baseline', default=default_baseline, help='基准数据文件')
+    parser.add_argument('--save', action='store_true', help='将本次的测量结果保存为基准数据（合并到已有的基准数据中）')
+    parser.add_argument('--threshold', type=float, default=0.25, help='判定为劣化的相对变化量')
+    parser.add_argument('--json', help='将本次的测量结果另外保存到指定文件')
+    args = parser.parse_args()
+
+    cases = []
+    for crawler in (args.crawlers or ['*']):
+        cases.extend(load_cases(crawler))
+    if not cases:
+        print('没有录制的请求，请先运行: pytest unittest/test_crawlers.py --cassette record')
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'rt', encoding='utf-8') as f:
+            baseline = json.load(f)['cases']
+
+    prepare_replay()
+    results = {}
+    print(f"{'page':<32}{'parse_ms':>10}{'peak_kib':>10}{'allocs':>8}{'vs baseline':>14}")
+    for name, crawler, factory, file in cases:
+        try:
+            parse_data = get_parser(crawler)
+        except ImportError as e:
+            print(f'{name:<32}无法导入抓取器: {e}')
+            continue
+        result = results[name] = measure(parse_data, factory, file, args.rounds)
+        base = baseline.get(name)
+        change = f"{(result['parse_ms']/base['parse_ms']-1)*100:+.0f}%" if base and base['parse_ms'] else '-'
+        print(f"{name:<32}{result['parse_ms']:>10.2f}{result['peak_kib']:>10.1f}{result['allocs']:>8}{change:>14}")
+        if result['error']:
+            # 回放时缺少请求通常说明录制后抓取器发出的请求发生了变化，此时的测量结果没有参考价值
+            print(f"{'':<32}解析时出错: {result['error']}")
+
+    if args.json:
+        with open(args.json, 'wt', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'cases': results}, f, ensure_ascii=False, indent=2)
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, 'wt', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'cases': dict(sorted(baseline.items()))},
+                      f, ensure_ascii=False, indent=2)
+        print(f'\n已保存基准数据: {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f'\n以下指标比基准数据劣化超过{args.threshold:.0%}:')
+        for name, metric, old, new in regressions:
+            print(f'  {name}: {metric} {old} -> {new}')
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
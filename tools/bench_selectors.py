@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""比较预编译的XPath选择器与每次调用时重新编译XPath（即element.xpath("...")的方式）的解析耗时
+
+使用unittest/cassettes中录制的请求回放各个抓取器的解析过程，因此需要先录制:
+    pytest unittest/test_crawlers.py --only javbus --cassette record
+两种方式使用的是同一组XPath表达式，改写为相对路径带来的收益已经包含在两者之中，
+如需与改写前的代码比较，请在旧版本的代码上运行test_crawlers.py --cassette replay并对比其中的crawler stats
+"""
+import os
+import sys
+import argparse
+
+from lxml import etree
+
+
+file_dir = os.path.dirname(__file__)
+sys.path.insert(0, os.path.abspath(os.path.join(file_dir, '..')))
+from javsp.web.selector import Selector
+from bench_parsers import get_parser, load_cases, prepare_replay, run_once
+
+
+DEFAULT_CRAWLERS = ['javdb', 'javbus', 'fanza', 'mgstage']
+
+
+def recompiled_call(self: Selector, node, **variables):
+    """每次调用都重新编译XPath，与直接调用element.xpath("...")的开销相同"""
+    return etree.XPath(self.path, smart_strings=False)(node, **variables)
+
+
+def bench(parse_data, cases, rounds):
+    """回放所有用例，返回每部影片的平均耗时（取最快的一轮）"""
+    best = float('inf')
+    for _ in range(rounds):
+        elapsed = sum(run_once(parse_data, factory, file)[0] for _, _, factory, file in cases)
+        best = min(best, elapsed)
+    return best / len(cases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('crawlers', nargs='*', default=DEFAULT_CRAWLERS, help='要测试的抓取器')
+    parser.add_argument('--rounds', type=int, default=5, help='重复次数（取最快的一次）')
+    args = parser.parse_args()
+
+    prepare_replay()
+
+    compiled_call = Selector.__call__
+    for crawler in args.crawlers:
+        cases = load_cases(crawler)
+        if not cases:
+            print(f'{crawler:<10}没有录制的请求，请先运行: pytest unittest/test_crawlers.py --only {crawler} --cassette record')
+            continue
+        parse_data = get_parser(crawler)
+        Selector.__call__ = recompiled_call
+        recompiled = bench(parse_data, cases, args.rounds)
+        Selector.__call__ = compiled_call
+        compiled = bench(parse_data, cases, args.rounds)
+        print(f'{crawler:<10}{len(cases):>3}部影片  重新编译: {recompiled*1000:7.2f}ms/部  '
+              f'预编译: {compiled*1000:7.2f}ms/部  x{recompiled/compiled:.2f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -112,9 +112,6 @@ crawler:
   respect_site_avid: {yes_to_true(cfg['Crawler']['respect_site_avid'])}
   # fc2fan已关站。如果你有镜像，请设置本地镜像文件夹的路径，此文件夹内要有类似'FC2-12345.html'的网页文件
   fc2fan_local_path: '{cfg['Crawler']['fc2fan_local_path']}'
-  # 刮削一部电影后的等待时间（设置为0禁用此功能）
-  # https://en.wikipedia.org/wiki/ISO_8601#Durations
-  sleep_after_scraping: PT{cfg['Crawler']['sleep_after_scraping']}S
   # 是否使用javdb的封面（fallback/yes/no, 默认fallback: 如果能从别的站点获得封面则不用javdb的以避免水印）
   use_javdb_cover: {use_javdb_cover(cfg['Crawler']['ignore_javdb_cover'])}
   # 是否统一女优艺名。启用时会尝试将女优的多个艺名统一成一个
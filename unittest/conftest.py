@@ -11,6 +11,10 @@ def pytest_addoption(parser):
     parser.addoption(
         "--only", action="store", default="", help="仅测试指定抓取器的数据"
     )
+    parser.addoption(
+        "--cassette", action="store", default="live", choices=["live", "record", "replay"],
+        help="抓取器测试的网络模式: live-访问网络, record-访问网络并录制到unittest/cassettes, replay-回放录制的请求，不访问网络"
+    )
 
 def pytest_runtest_logreport(report):
     """定制 short test summary info 显示格式"""
@@ -29,6 +33,29 @@ def crawler(request):
     return request.config.getoption("--only")
 
 
+@pytest.fixture
+def cassette_mode(request):
+    return request.config.getoption("--cassette")
+
+
+# 各个抓取器的请求次数和解析耗时: {抓取器: [测试用例数, 请求次数, 解析耗时]}
+_crawler_stats = {}
+
+
+@pytest.fixture(scope='session')
+def crawler_stats():
+    return _crawler_stats
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _crawler_stats:
+        return
+    terminalreporter.section('crawler stats')
+    terminalreporter.write_line(f"{'crawler':<12}{'cases':>6}{'fetches':>9}{'parse(ms)':>11}{'ms/case':>9}")
+    for name, (cases, fetches, parse_time) in sorted(_crawler_stats.items()):
+        terminalreporter.write_line(f"{name:<12}{cases:>6}{fetches:>9}{parse_time*1000:>11.1f}{parse_time*1000/cases:>9.1f}")
+
+
 def pytest_generate_tests(metafunc):
     if 'crawler_params' in metafunc.fixturenames:
         # 根据测试数据文件夹中的文件生成测试数据
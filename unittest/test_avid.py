@@ -6,7 +6,9 @@ from shutil import rmtree
 
 file_dir = os.path.dirname(__file__)
 sys.path.insert(0, os.path.abspath(os.path.join(file_dir, '..')))
-from javsp.avid import get_id, get_cid
+from javsp.avid import IdEngine, get_engine, get_id, get_ids, get_cid, guess_av_type
+from javsp.lib import detect_special_attr
+from javsp.config import Cfg
 
 
 @pytest.fixture
@@ -109,3 +111,45 @@ def test_by_folder_name2(prepare_files):
 @pytest.mark.parametrize('files', [('ABC-123/CDF-456.mp4',)])
 def test_by_folder_name3(prepare_files):
     assert 'CDF-456' == get_id('ABC-123/CDF-456.mp4')
+
+
+def test_get_ids():
+    files = ['ABC-123/abc-123-C.mp4', 'fc2-ppv-123456-1.mp4', 'h_001abc00001.mp4', 'Unknown/Unknown.mp4']
+    assert ['ABC-123', 'FC2-123456', 'h_001abc00001', ''] == get_ids(files)
+    assert [(get_cid(i) or get_id(i)) for i in files] == get_ids(files)
+
+
+def test_r18():
+    assert 'R18-123' == get_id('r18-123.mp4')
+
+
+def test_engine_cache():
+    engine = IdEngine([r'\w+2048\.com'])
+    assert 'ABC-123' == engine.get_id('hjd2048.com-abc-123.mp4')
+    assert 'ABC-123' == engine.get_id('other/hjd2048.com-abc-123.mkv')
+    assert engine._match_norm.cache_info().hits >= 1
+    # 修改忽略模式后重新创建IdEngine
+    Cfg().scanner.ignored_id_pattern.append('TEST_IGNORE')
+    try:
+        assert 'TEST_IGNORE' in get_engine().ignored_patterns
+    finally:
+        Cfg().scanner.ignored_id_pattern.remove('TEST_IGNORE')
+    assert 'TEST_IGNORE' not in get_engine().ignored_patterns
+
+
+@pytest.mark.parametrize('corpus', ['testdata_avid_corpus.txt', 'testdata_avid_synthetic.txt'])
+def test_corpus(corpus):
+    """检查语料中的预期识别结果（速度的测量请使用tools/bench_avid.py）"""
+    columns = ['category', 'filename', 'dvdid', 'cid', 'type', 'attr', 'known']
+    with open(os.path.join(file_dir, corpus), 'rt', encoding='utf-8') as f:
+        rows = [dict(zip(columns, line.rstrip('\r\n').split('\t'))) for line in f if not line.startswith('#')]
+    for row in rows:
+        if row.get('known'):
+            continue
+        filename = row['filename']
+        dvdid, cid = get_id(filename), get_cid(filename)
+        actual = {'dvdid': dvdid, 'cid': cid, 'type': guess_av_type(cid or dvdid),
+                  'attr': detect_special_attr(filename, dvdid)}
+        for key, value in actual.items():
+            if row[key] != '*':
+                assert value == row[key], f"{key} not match: '{filename}'"
@@ -0,0 +1,83 @@
+import os
+import sys
+import gzip
+import threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.base import Cassette, CassetteMiss, use_cassette, pooled_get, resp2html
+
+
+class Handler(BaseHTTPRequestHandler):
+    counter = 0
+
+    def do_GET(self):
+        if self.path == '/old':
+            self.send_response(301)
+            self.send_header('Location', '/new')
+            self.end_headers()
+            return
+        Handler.counter += 1
+        body = f'<html><title>第{Handler.counter}次</title></html>'.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Encoding', 'gzip')
+        data = gzip.compress(body)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data.upper())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_record_and_replay(server, tmp_path):
+    path = str(tmp_path / 'case.json.gz')
+    Handler.counter = 0
+    with use_cassette(Cassette(path, 'record')) as cassette:
+        r1 = pooled_get(server + '/old')
+        r2 = requests.Session().get(server + '/new')
+        r3 = requests.post(server + '/echo', data={'sn': 'abc-123'})
+    assert cassette.fetch_count == 4
+    assert [i.status_code for i in r1.history] == [301]
+    titles = [resp2html(r).findtext('.//title') for r in (r1, r2)]
+    assert titles == ['第1次', '第2次']
+
+    # 回放时不访问网络: 服务器上的内容已经变化也不影响结果
+    Handler.counter = 100
+    with use_cassette(Cassette(path, 'replay')) as cassette:
+        p1 = pooled_get(server + '/old')
+        p2 = pooled_get(server + '/new')
+        p3 = requests.post(server + '/echo', data={'sn': 'abc-123'})
+        with pytest.raises(CassetteMiss):
+            requests.post(server + '/echo', data={'sn': 'xyz-999'})
+    assert p1.url == server + '/new' and [i.status_code for i in p1.history] == [301]
+    assert [resp2html(r).findtext('.//title') for r in (p1, p2)] == titles
+    assert p3.content == r3.content == b'SN=ABC-123'
+    assert cassette.fetch_count == 5
+
+
+def test_live_only_counts(server, tmp_path):
+    with use_cassette(Cassette(str(tmp_path / 'unused.json.gz'), 'live')) as cassette:
+        requests.get(server + '/new')
+    assert cassette.fetch_count == 1 and cassette.interactions == []
+    assert not os.path.exists(tmp_path / 'unused.json.gz')
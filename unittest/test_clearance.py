@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import pytest
+import requests
+from requests.models import Response
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.clearance import ClearanceStore
+
+
+UA = 'Mozilla/5.0 (solved the challenge)'
+
+
+@pytest.fixture
+def clearance(tmp_path, monkeypatch):
+    import javsp.store
+    from javsp.store import JsonStore
+    monkeypatch.setattr(javsp.store, '_cache_dir', str(tmp_path))
+    return ClearanceStore(JsonStore('cf_clearance.json'))
+
+
+def solved_response(url, user_agent=UA):
+    r = Response()
+    r.status_code, r.url = 200, url
+    r.request = requests.Request('GET', url, headers={'User-Agent': user_agent}).prepare()
+    return r
+
+
+def solve(session, domain='.javdb.com', value='token-1', expires=None):
+    """模拟会话通过了CloudFlare的验证"""
+    expires = expires or int(time.time()) + 3600
+    session.cookies.set('cf_clearance', value, domain=domain, path='/', expires=expires)
+
+
+def test_save_and_seed(clearance):
+    s1 = requests.Session()
+    solve(s1)
+    clearance.update(s1, 'https://javdb.com/search?q=ABC-123', solved_response('https://javdb.com/'))
+    domain, item = clearance.find('https://www.javdb.com/v/abc')
+    assert domain == 'javdb.com'
+    assert item['cookies'] == {'cf_clearance': 'token-1'} and item['user_agent'] == UA
+    # 新的会话（包括下次运行时）直接带上凭据
+    s2 = requests.Session()
+    clearance.seed(s2)
+    assert s2.cookies.get('cf_clearance', domain='.javdb.com') == 'token-1'
+    prepared = s2.prepare_request(requests.Request('GET', 'https://javdb.com/'))
+    assert 'cf_clearance=token-1' in prepared.headers['Cookie']
+
+
+def test_prepare_uses_paired_user_agent(clearance):
+    s1 = requests.Session()
+    solve(s1)
+    clearance.update(s1, 'https://javdb.com/', solved_response('https://javdb.com/'))
+    s2 = requests.Session()
+    headers = clearance.prepare(s2, 'https://javdb.com/', {'User-Agent': 'other', 'Accept-Language': 'zh-CN'})
+    assert headers == {'User-Agent': UA, 'Accept-Language': 'zh-CN'}
+    assert s2.cookies.get('cf_clearance', domain='.javdb.com') == 'token-1'
+    # 其他站点不受影响
+    assert clearance.prepare(s2, 'https://www.javbus.com/', {'User-Agent': 'other'}) == {'User-Agent': 'other'}
+
+
+def test_refresh_and_expire(clearance):
+    s1 = requests.Session()
+    solve(s1)
+    clearance.update(s1, 'https://javdb.com/', solved_response('https://javdb.com/'))
+    # 凭据更新后保存新的凭据
+    solve(s1, value='token-2')
+    clearance.update(s1, 'https://javdb.com/', solved_response('https://javdb.com/', 'UA 2'))
+    _, item = clearance.find('https://javdb.com/')
+    assert item['cookies'] == {'cf_clearance': 'token-2'} and item['user_agent'] == 'UA 2'
+    # 已过期的凭据不会被保存或使用
+    s2 = requests.Session()
+    s2.cookies.set('cf_clearance', 'old', domain='.javlibrary.com', path='/', expires=int(time.time()) + 1)
+    clearance.update(s2, 'https://www.javlibrary.com/', solved_response('https://www.javlibrary.com/'))
+    assert clearance.find('https://www.javlibrary.com/')[0] == 'javlibrary.com'
+    time.sleep(1.1)
+    assert clearance.find('https://www.javlibrary.com/') == (None, None)
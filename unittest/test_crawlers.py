@@ -1,28 +1,40 @@
 import os
 import sys
+import time
 import logging
+import pytest
 import requests
 from urllib.parse import urlsplit
 
 
 file_dir = os.path.dirname(__file__)
 data_dir = os.path.join(file_dir, 'data')
+cassette_dir = os.path.join(file_dir, 'cassettes')
 sys.path.insert(0, os.path.abspath(os.path.join(file_dir, '..')))
 
+import javsp.web.base
 from javsp.datatype import MovieInfo
+from javsp.web.base import Cassette, use_cassette
+from javsp.web.route import route_table
 from javsp.web.exceptions import CrawlerError, SiteBlocked
 
 
 logger = logging.getLogger(__name__)
 
 
-def test_crawler(crawler_params):
+def test_crawler(crawler_params, cassette_mode, crawler_stats, monkeypatch):
     """包装函数，便于通过参数判断测试用例生成，以及负责将参数解包后进行实际调用"""
     # crawler_params: ('ABC-123', 'javlib', 'path_to_local_json')
+    if cassette_mode != 'live':
+        # 录制和回放时要保证每次发出的请求都相同: 不使用网页缓存，不根据测速结果选择访问路线
+        monkeypatch.setattr(javsp.web.base, 'http_cache', None)
+        monkeypatch.setattr(route_table, 'enabled', False)
+    if cassette_mode == 'replay' and javsp.web.base.rate_limiter:
+        monkeypatch.setattr(javsp.web.base.rate_limiter, 'acquire', lambda url: None)
     # TODO: 在Github actions环境中总是无法通过Cloudflare的检测，因此暂时忽略需要过验证站点的失败项
     try:
         site, params = crawler_params[1], crawler_params[:2]
-        compare(*crawler_params)
+        compare(*crawler_params, cassette_mode=cassette_mode, stats=crawler_stats)
     except requests.exceptions.ReadTimeout:
         logger.warning(f"{site} 连接超时: {params}")
     except Exception as e:
@@ -31,8 +43,11 @@ def test_crawler(crawler_params):
         else:
             raise
 
-def compare(avid, scraper, file):
-    """从本地的数据文件生成Movie实例，并与在线抓取到的数据进行比较"""
+def compare(avid, scraper, file, cassette_mode='live', stats=None):
+    """从本地的数据文件生成Movie实例，并与在线抓取到的（或者回放录制的请求得到的）数据进行比较"""
+    cassette_path = os.path.join(cassette_dir, os.path.basename(file)[:-len('.json')] + '.json.gz')
+    if cassette_mode == 'replay' and not os.path.exists(cassette_path):
+        pytest.skip(f'没有录制的请求: {cassette_path}')
     local = MovieInfo(from_file=file)
     if scraper != 'fanza':
         online = MovieInfo(avid)
@@ -47,13 +62,25 @@ def compare(avid, scraper, file):
     else:
         parse_data = getattr(mod, 'parse_data')
 
+    if cassette_mode == 'record':
+        os.makedirs(cassette_dir, exist_ok=True)
+    cassette = Cassette(cassette_path, cassette_mode)
+    start = time.perf_counter()
     try:
-        parse_data(online)
+        with use_cassette(cassette):
+            parse_data(online)
     except SiteBlocked as e:
         logger.warning(e)
         return
     except (CrawlerError, requests.exceptions.ReadTimeout) as e:
         logger.info(e)
+    finally:
+        if stats is not None:
+            # 解析耗时: 抓取器的总耗时中去掉网络请求的耗时
+            item = stats.setdefault(scraper, [0, 0, 0.0])
+            item[0] += 1
+            item[1] += cassette.fetch_count
+            item[2] += time.perf_counter() - start - cassette.fetch_time
 
     try:
         # 解包数据再进行比较，以便测试不通过时快速定位不相等的键值
@@ -95,8 +122,8 @@ def compare(avid, scraper, file):
             else:
                 assert v == local_vars.get(k, None)
     except AssertionError:
-        # 本地运行时更新已有的测试数据，方便利用版本控制系统检查差异项
-        if not os.getenv('GITHUB_ACTIONS'):
+        # 本地运行时更新已有的测试数据，方便利用版本控制系统检查差异项（回放时数据不一致说明解析逻辑有问题，不更新）
+        if not os.getenv('GITHUB_ACTIONS') and cassette_mode != 'replay':
             online.dump(file)
         raise
     except Exception as e:
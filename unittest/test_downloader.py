@@ -0,0 +1,140 @@
+import os
+import sys
+import pytest
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.downloader import Downloader, DownloadError, PART_SUFFIX
+
+
+class FakeFile:
+    """支持Range（以及If-Range）请求的send函数，可以模拟在传输到指定位置时断开连接"""
+    def __init__(self, data: bytes, ranges=True, break_at=None, etag='"v1"'):
+        self.data, self.ranges, self.break_at, self.etag = data, ranges, break_at, etag
+        self.requests = []
+
+    def __call__(self, url, headers=None, stream=False, **kw):
+        rng = (headers or {}).get('Range')
+        self.requests.append(rng)
+        r = Response()
+        r.url = url
+        r.headers = CaseInsensitiveDict()
+        if self.etag:
+            r.headers['ETag'] = self.etag
+        # 资源已经变化时忽略Range，返回完整的内容
+        if rng and 'If-Range' in headers and headers['If-Range'] != self.etag:
+            rng = None
+        start, end = 0, len(self.data) - 1
+        if rng and self.ranges:
+            a, b = rng[len('bytes='):].split('-')
+            start, end = int(a), int(b) if b else len(self.data) - 1
+            if start >= len(self.data):
+                r.status_code = 416
+                r.raw = None
+                return r
+            r.status_code = 206
+            r.headers['Content-Range'] = f'bytes {start}-{end}/{len(self.data)}'
+        else:
+            r.status_code = 200
+        if self.ranges:
+            r.headers['Accept-Ranges'] = 'bytes'
+        body = self.data[start:end+1]
+        r.headers['Content-Length'] = str(len(body))
+        if self.break_at is not None and not rng:
+            body = body[:self.break_at]
+        import io
+        r.raw = io.BytesIO(body)
+        return r
+
+
+def test_download_and_resume(tmp_path):
+    data = os.urandom(300_000)
+    out = str(tmp_path / 'cover.jpg')
+    send = FakeFile(data, break_at=100_000)
+    dl = Downloader(send, segments=1)
+    with pytest.raises(DownloadError):
+        dl.fetch('http://x/cover.jpg', out)
+    # 中断后目标文件不存在，临时文件保留了已下载的部分
+    assert not os.path.exists(out)
+    assert os.path.getsize(out + PART_SUFFIX) == 100_000
+    info = dl.fetch('http://x/cover.jpg', out)
+    assert send.requests[-1] == 'bytes=100000-'
+    assert open(out, 'rb').read() == data
+    assert info['total'] == len(data) and not os.path.exists(out + PART_SUFFIX)
+
+
+def test_restart_when_resource_changed(tmp_path):
+    old, new = os.urandom(300_000), os.urandom(300_000)
+    out = str(tmp_path / 'cover.jpg')
+    send = FakeFile(old, break_at=100_000)
+    dl = Downloader(send, segments=1)
+    with pytest.raises(DownloadError):
+        dl.fetch('http://x/cover.jpg', out)
+    # 服务器上的资源变化后，If-Range使服务器返回完整的新内容，不会与旧的临时文件拼接
+    send.data, send.etag, send.break_at = new, '"v2"', None
+    dl.fetch('http://x/cover.jpg', out)
+    assert open(out, 'rb').read() == new
+    assert not os.path.exists(out + PART_SUFFIX + '.json')
+
+
+def test_discard_part_of_other_url(tmp_path):
+    data = os.urandom(300_000)
+    out = str(tmp_path / 'cover.jpg')
+    dl = Downloader(FakeFile(os.urandom(300_000), break_at=100_000), segments=1)
+    with pytest.raises(DownloadError):
+        dl.fetch('http://x/old.jpg', out)
+    # 写入同一路径的是另一个地址的封面，不能从断点处继续下载
+    send = FakeFile(data)
+    Downloader(send, segments=1).fetch('http://x/new.jpg', out)
+    assert send.requests == [None]
+    assert open(out, 'rb').read() == data
+
+
+def test_restart_when_range_not_supported(tmp_path):
+    data = os.urandom(50_000)
+    out = str(tmp_path / 'a.jpg')
+    with open(out + PART_SUFFIX, 'wb') as f:
+        f.write(b'stale')
+    Downloader(FakeFile(data, ranges=False), segments=1).fetch('http://x/a.jpg', out)
+    assert open(out, 'rb').read() == data
+
+
+def test_segmented_download(tmp_path):
+    data = os.urandom(1_000_003)
+    out = str(tmp_path / 'big.jpg')
+    send = FakeFile(data)
+    progress = []
+    Downloader(send, segments=4, segment_min_size=1000).fetch('http://x/big.jpg', out,
+                                                              progress=lambda d, t: progress.append((d, t)))
+    assert open(out, 'rb').read() == data
+    assert len([i for i in send.requests if i]) == 4
+    assert progress[-1] == (len(data), len(data))
+
+
+def test_probe_images(monkeypatch):
+    import io
+    import time
+    from PIL import Image
+    import javsp.web.base as base
+    from javsp.image import peek_pic_size
+
+    def png(w, h):
+        buf = io.BytesIO()
+        Image.new('RGB', (w, h)).save(buf, 'PNG')
+        return buf.getvalue()
+
+    files = {'http://a/small.png': FakeFile(png(80, 60)), 'http://b/big.png': FakeFile(png(800, 600))}
+    def fake_get(url, headers=None, **kw):
+        if url == 'http://dead/x.png':
+            time.sleep(5)
+        return files[url](url, headers=headers, **kw)
+
+    monkeypatch.setattr(base, 'pooled_get', fake_get)
+    start = time.time()
+    probes = base.probe_images(list(files) + ['http://dead/x.png', 'http://missing/x.png'], timeout=0.5)
+    # 无法连接的地址不会拖慢探测
+    assert time.time() - start < 2
+    assert set(probes) == set(files)
+    assert peek_pic_size(probes['http://b/big.png']['head']) == (800, 600)
+    assert probes['http://a/small.png']['size'] == len(files['http://a/small.png'].data)
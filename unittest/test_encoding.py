@@ -0,0 +1,71 @@
+import os
+import sys
+import pytest
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.base import guess_encoding, get_resp_text, parse_html, resp2html
+
+
+TITLE = '新人 専属デビュー 女優'
+
+
+def make_resp(body: bytes, url='https://www.example.com/', content_type='text/html'):
+    r = Response()
+    r.status_code, r.url, r._content = 200, url, body
+    r.headers = CaseInsensitiveDict({'Content-Type': content_type})
+    return r
+
+
+def page(encoding, meta=None):
+    head = f'<meta charset="{meta}">' if meta else ''
+    return f'<html><head>{head}<title>{TITLE}</title></head><body><a href="/v/1">{TITLE}</a></body></html>'.encode(encoding)
+
+
+@pytest.mark.parametrize('resp, expected', [
+    # 站点编码表优先于其他所有来源
+    (make_resp(page('euc-jp'), url='https://dl.getchu.com/i/item4000'), 'euc-jp'),
+    (make_resp(page('euc-jp'), url='http://gyutto.com/i/item1', content_type='text/html; charset=utf-8'), 'euc-jp'),
+    # 响应头中声明的编码
+    (make_resp(page('shift_jis'), content_type='text/html; charset=Shift_JIS'), 'shift_jis'),
+    # 网页开头<meta>中声明的编码
+    (make_resp(page('euc-jp', meta='EUC-JP')), 'euc_jp'),
+    # 没有任何声明但可以按UTF-8解码
+    (make_resp(page('utf-8')), 'utf-8'),
+    # 无法识别的声明会被忽略
+    (make_resp(page('utf-8'), content_type='text/html; charset=bogus'), 'utf-8'),
+])
+def test_guess_encoding(resp, expected):
+    assert guess_encoding(resp) == expected
+    assert TITLE in get_resp_text(resp)
+
+
+def test_detect_on_prefix_only():
+    """没有任何编码声明且不是UTF-8时，才对网页开头的一部分进行检测"""
+    body = page('shift_jis') + b'<!--' + b'x' * 1024 * 1024 + b'\xff\xfe-->'
+    resp = make_resp(body)
+    assert guess_encoding(resp) in ('shift_jis', 'cp932')
+    # 截断处不完整的UTF-8字符不影响判断
+    utf8 = TITLE.encode('utf-8') * 20000
+    assert guess_encoding(make_resp(utf8[:32 * 1024 + 1] + utf8)) == 'utf-8'
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'euc-jp', 'shift_jis'])
+def test_parse_html(encoding):
+    html = parse_html(page(encoding), encoding)
+    assert html.findtext('.//title') == TITLE
+    resp = make_resp(page(encoding), content_type=f'text/html; charset={encoding}')
+    html = resp2html(resp)
+    assert html.xpath('//a/@href') == ['https://www.example.com/v/1']
+    assert html.xpath('string(//a)') == TITLE
+
+
+def test_async_get_html_guesses_encoding(monkeypatch):
+    import asyncio
+    import javsp.web.base as base
+    async def fake_get(url, **kw):
+        return make_resp(page('euc-jp'), url=url)
+    monkeypatch.setattr(base, 'async_request_get', fake_get)
+    html = asyncio.run(base.async_get_html('https://dl.getchu.com/i/item4000'))
+    assert html.xpath('//title/text()')[0] == TITLE
@@ -0,0 +1,78 @@
+import os
+import sys
+import pytest
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.httpcache import HttpCache, CacheMiss
+
+
+class FakeServer:
+    """记录请求次数并返回预设响应的send函数"""
+    def __init__(self, status=200, body=b'<html>ok</html>', etag='"v1"'):
+        self.status, self.body, self.etag = status, body, etag
+        self.calls = []
+
+    def __call__(self, url, headers=None, cookies=None, **kw):
+        self.calls.append(dict(headers or {}))
+        r = Response()
+        r.url = url
+        r.headers = CaseInsensitiveDict({'ETag': self.etag})
+        if self.etag and headers and headers.get('If-None-Match') == self.etag:
+            r.status_code, r._content = 304, b''
+        else:
+            r.status_code, r._content = self.status, self.body
+        return r
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(str(tmp_path / 'cache.sqlite'), default_ttl=60, site_ttl={'short': 0.01})
+
+
+def test_hit_within_ttl(cache):
+    send = FakeServer()
+    url = 'https://example.com/a'
+    assert cache.fetch(url, send).content == b'<html>ok</html>'
+    r = cache.fetch(url, send)
+    assert r.content == b'<html>ok</html>' and getattr(r, 'from_cache', False)
+    assert len(send.calls) == 1
+
+
+def test_key_depends_on_cookies_and_language(cache):
+    send = FakeServer()
+    url = 'https://example.com/a'
+    cache.fetch(url, send, cookies={'age_check_done': '1'})
+    cache.fetch(url, send, cookies={})
+    cache.fetch(url, send, headers={'Accept-Language': 'ja'})
+    assert len(send.calls) == 3
+
+
+def test_revalidate_with_etag(cache):
+    import time
+    send = FakeServer()
+    url = 'https://short.example.com/a'
+    cache.fetch(url, send)
+    time.sleep(0.02)
+    r = cache.fetch(url, send)
+    assert send.calls[-1].get('If-None-Match') == '"v1"'
+    assert r.status_code == 200 and r.content == b'<html>ok</html>'
+
+
+def test_do_not_cache_errors(cache):
+    send = FakeServer(status=503)
+    url = 'https://example.com/b'
+    cache.fetch(url, send)
+    cache.fetch(url, send)
+    assert len(send.calls) == 2
+
+
+def test_offline(cache):
+    send = FakeServer()
+    cache.fetch('https://example.com/a', send)
+    cache.offline = True
+    assert cache.fetch('https://example.com/a', send).status_code == 200
+    with pytest.raises(CacheMiss):
+        cache.fetch('https://example.com/missing', send)
+    assert len(send.calls) == 1
@@ -0,0 +1,78 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.latency import LatencyHistogram, LatencyTracker
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    import javsp.store
+    from javsp.store import JsonStore
+    monkeypatch.setattr(javsp.store, '_cache_dir', str(tmp_path))
+    return JsonStore('latency.json')
+
+
+def test_histogram_quantile():
+    hist = LatencyHistogram()
+    assert hist.quantile(0.99) is None
+    for _ in range(99):
+        hist.add(0.5)
+    hist.add(8)
+    assert 0.5 <= hist.quantile(0.5) < 0.5 * LatencyHistogram.RATIO
+    assert 8 <= hist.quantile(0.999) < 8 * LatencyHistogram.RATIO
+
+
+def test_timeout_bounds(store):
+    tracker = LatencyTracker(store, default=10, factor=3, lower=2, upper=60, min_samples=3)
+    url = 'https://slow.example.com/a'
+    assert tracker.timeout_for(url) == (10, 10)
+    for _ in range(3):
+        tracker.record(url, 15)
+    connect, read = tracker.timeout_for(url)
+    # 慢但正常的站点放宽读取超时，连接超时不超过默认值
+    assert connect == 10 and 45 <= read <= 60
+    for _ in range(3):
+        tracker.record('https://fast.example.com/', 0.1)
+    assert tracker.timeout_for('https://fast.example.com/') == (2, 2)
+
+
+def test_stats_persist(store):
+    from javsp.store import JsonStore
+    tracker = LatencyTracker(store, default=10, factor=2, lower=1, upper=60, min_samples=1)
+    tracker.record('https://example.com/', 4)
+    store.save()
+    tracker = LatencyTracker(JsonStore('latency.json'), default=10, factor=2, lower=1, upper=60, min_samples=1)
+    assert tracker.timeout_for('https://example.com/')[1] >= 8
+
+
+def test_adaptive_timeout_floor_and_failures(store, monkeypatch):
+    import requests
+    import javsp.web.base as base
+    tracker = LatencyTracker(store, default=10, factor=3, lower=2, upper=60, min_samples=3)
+    monkeypatch.setattr(base, 'latency_tracker', tracker)
+    monkeypatch.setattr(base, '_timeout_floors', {})
+    timeouts = []
+    def fail(error):
+        def send(url, **kw):
+            timeouts.append(kw['timeout'])
+            raise error
+        return base.adaptive_timeout(send)
+    url = 'https://flaky.example.com/'
+    # 连接被拒绝等错误不能说明站点的快慢，不记录为样本
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            fail(requests.exceptions.ConnectionError('refused'))(url)
+    assert tracker._hist('flaky.example.com').samples == 0
+    # 超时的请求按实际耗时记录
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            fail(requests.exceptions.ReadTimeout('timeout'))(url)
+    assert tracker._hist('flaky.example.com').samples == 3
+    assert tracker.timeout_for(url) == (2, 2)
+    # 设置了下限的站点，读取超时不低于下限，连接超时不受影响
+    base.set_timeout_floor('flaky.example', 20)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        fail(requests.exceptions.ReadTimeout('timeout'))(url)
+    assert timeouts[-1] == (2, 20)
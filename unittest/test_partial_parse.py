@@ -0,0 +1,67 @@
+import os
+import sys
+import pytest
+import lxml.html
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.base import absolute_url, parse_html, parse_partial_html
+
+
+page = '''<html><head><title>搜索结果</title></head><body>
+<div class="header"><a href="/">首页</a></div>
+<div class="movie-list h cols-4">
+  <div class="item"><a class="box" href="/v/abc" title="ABC-123 标题"><div class="video-title"><strong>ABC-123</strong></div></a></div>
+  <div class="item"><a class="box" href="/v/def" title="ABC-123 其他"><div class="video-title"><strong>ABC-123</strong></div></a></div>
+</div>
+''' + '<div class="footer"><p>无关内容</p></div>\n' * 2000 + '</body></html>'
+base_url = 'https://javdb.com/search?q=ABC-123'
+
+
+def chunks_of(data: bytes, size=1024):
+    """记录已被读取的数据块，以便检查解析是否提前结束"""
+    consumed = []
+    def gen():
+        for i in range(0, len(data), size):
+            consumed.append(i)
+            yield data[i:i+size]
+    return gen(), consumed
+
+
+def test_stop_after_section():
+    data = page.encode('utf-8')
+    chunks, consumed = chunks_of(data)
+    html = parse_partial_html(chunks, 'div.movie-list', base_url=base_url)
+    # 目标区域结束后不再读取剩余的数据
+    assert len(consumed) < len(data) // 1024 // 10
+    assert len(html.xpath("//div[@class='footer']")) < 2000
+    full = parse_html(data, 'utf-8')
+    xpath = "//div[contains(@class,'movie-list')]//a[@class='box']"
+    assert [i.get('href') for i in html.xpath(xpath)] == ['/v/abc', '/v/def']
+    assert [i.get('title') for i in html.xpath(xpath)] == [i.get('title') for i in full.xpath(xpath)]
+    assert isinstance(html, lxml.html.HtmlElement)
+    assert absolute_url(html.xpath(xpath)[0], '/v/abc') == 'https://javdb.com/v/abc'
+
+
+def test_encoding():
+    data = page.replace('标题', '品番').encode('euc-jp', errors='replace')
+    chunks, _ = chunks_of(data, size=7)     # 使多字节字符被拆分到不同的数据块中
+    html = parse_partial_html(chunks, 'div.movie-list', encoding='euc-jp')
+    assert html.xpath("//a[@class='box']/@title")[0] == 'ABC-123 品番'
+
+
+def test_section_not_found():
+    data = page.encode('utf-8')
+    chunks, consumed = chunks_of(data)
+    html = parse_partial_html(chunks, 'ul#list')
+    # 没有找到目标区域时解析整个网页
+    assert len(consumed) == (len(data) + 1023) // 1024
+    assert len(html.xpath("//div[@class='footer']")) == 2000
+
+
+def test_section_syntax():
+    data = b'<html><body><ul id="list" class="a b"><li>1</li></ul><ul><li>2</li></ul></body></html>'
+    for section in ('ul#list', '#list', 'ul.b', 'ul#list.a.b'):
+        html = parse_partial_html([data], section)
+        assert html.xpath('//li/text()')[0] == '1'
+    with pytest.raises(ValueError):
+        parse_partial_html([data], 'ul > li')
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.pipeline import Pipeline, Stage
+
+
+def jitter(x):
+    time.sleep(random.random() / 100)
+    return x
+
+
+def test_keep_input_order():
+    committed = []
+    def commit(x):
+        committed.append(x)
+        return x * 10
+
+    pipeline = Pipeline([
+        Stage('a', jitter, workers=4),
+        Stage('b', jitter, workers=3),
+        Stage('commit', commit, ordered=True),
+    ], queue_size=2)
+    done = []
+    results = pipeline.run(list(range(30)), on_done=lambda item, r: done.append(item))
+    assert committed == list(range(30))
+    assert done == list(range(30))
+    assert results == [i * 10 for i in range(30)]
+
+
+def test_failure_isolated():
+    def fail_on_odd(x):
+        if x % 2:
+            raise ValueError(x)
+        return x
+
+    called = []
+    def later(x):
+        called.append(x)
+        return x
+
+    failed = []
+    pipeline = Pipeline([Stage('check', fail_on_odd, workers=2), Stage('later', later)])
+    results = pipeline.run(list(range(6)), on_fail=lambda item, e, stage: failed.append((item, stage)))
+    assert sorted(called) == [0, 2, 4]
+    assert failed == [(1, 'check'), (3, 'check'), (5, 'check')]
+    assert results == [0, None, 2, None, 4, None]
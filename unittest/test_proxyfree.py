@@ -1,7 +1,11 @@
 import os
 import sys
+import time
+import pytest
+from requests.models import Response
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import javsp.web.proxyfree as proxyfree
 from javsp.web.proxyfree import *
 
 
@@ -10,9 +14,78 @@ def test_get_url():
     assert get_proxy_free_url('javdb') != ''
 
 
-def test_get_url_with_prefer():
-    prefer_url = 'https://www.baidu.com'
-    assert prefer_url == get_proxy_free_url('javlib', prefer_url)
+class FakeSite:
+    """模拟各个地址的延迟和网页内容"""
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.fetched = []
+
+    def __call__(self, url, timeout):
+        self.fetched.append(url)
+        delay, status, text = self.pages[url]
+        time.sleep(delay)
+        r = Response()
+        r.status_code, r.url, r._content, r.encoding = status, url, text.encode('utf-8'), 'utf-8'
+        return r
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    import javsp.store
+    from javsp.store import JsonStore
+    monkeypatch.setattr(javsp.store, '_cache_dir', str(tmp_path))
+    monkeypatch.setattr(proxyfree, '_store', JsonStore('proxy_free.json'))
+    site = FakeSite({
+        'https://slow.example.com': (0.3, 200, '<title>JavBus</title>'),
+        'https://fast.example.com': (0.05, 200, '<title>JavBus</title>'),
+        'https://parked.example.com': (0.01, 200, '<title>This domain is for sale</title>'),
+        'https://challenge.example.com': (0.01, 403, '<title>Just a moment...</title>'),
+    })
+    monkeypatch.setattr(proxyfree, '_fetch', site)
+    monkeypatch.setattr(proxyfree, '_get_javbus_urls', lambda: list(site.pages))
+    return site
+
+
+def test_choose_lowest_latency_valid(fake):
+    start = time.monotonic()
+    assert get_proxy_free_url('javbus') == 'https://fast.example.com'
+    # 所有地址是同时测试的，不会等待较慢的地址
+    assert time.monotonic() - start < 0.25
+    assert set(fake.fetched) == set(fake.pages)
+
+
+def test_persist(fake):
+    assert get_proxy_free_url('javbus') == 'https://fast.example.com'
+    fake.fetched.clear()
+    # 在有效期内直接使用保存的地址，不再重新获取
+    assert get_proxy_free_url('javbus') == 'https://fast.example.com'
+    assert fake.fetched == []
+    assert proxyfree._store.get('javbus')['url'] == 'https://fast.example.com'
+
+
+def test_get_url_with_prefer(fake):
+    # prefer_url必须返回站点的有效网页才会被采用，否则使用延迟最低的可用地址
+    fake.pages['https://www.baidu.com'] = (0.01, 200, '<title>百度一下，你就知道</title>')
+    assert get_proxy_free_url('javbus', 'https://www.baidu.com') == 'https://fast.example.com'
+
+
+def test_prefer_and_no_valid(fake, monkeypatch):
+    # prefer_url与其他候选地址同时测试: 较慢时不会被采用，无法访问时也不会拖慢整个测试
+    fake.pages['https://dead.example.com'] = (1, 503, '')
+    start = time.monotonic()
+    assert get_proxy_free_url('javbus', 'https://dead.example.com') == 'https://fast.example.com'
+    assert time.monotonic() - start < 0.5
+    assert get_proxy_free_url('javbus', 'https://slow.example.com') == 'https://fast.example.com'
+    # 与最快的地址几乎同样快时优先使用prefer_url
+    fake.pages['https://near.example.com'] = (0.08, 200, '<title>JavBus</title>')
+    assert get_proxy_free_url('javbus', 'https://near.example.com') == 'https://near.example.com'
+    proxyfree._store.clear()
+    assert get_proxy_free_url('javbus', 'https://near.example.com') == 'https://near.example.com'
+    proxyfree._store.clear()
+    monkeypatch.setattr(proxyfree, '_get_javbus_urls', lambda: ['https://parked.example.com', 'https://challenge.example.com'])
+    assert get_proxy_free_url('javbus', 'https://parked.example.com') == ''
+    assert 'javbus' not in proxyfree._store
+
 
 if __name__ == "__main__":
     print(get_proxy_free_url('javlib'))
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.proxypool import ProxyPool
+
+
+P1, P2, P3 = 'http://127.0.0.1:1081', 'http://127.0.0.1:1082', 'http://127.0.0.1:1083'
+URL = 'https://javdb.com/search?q=ABC-123'
+
+
+def test_spread():
+    """没有统计数据时，请求应分散到所有代理上"""
+    pool = ProxyPool([P1, P2, P3])
+    counts = Counter()
+    for _ in range(300):
+        proxy = pool.choose(URL)
+        counts[proxy] += 1
+        pool.report(proxy, URL, latency=0.5)
+    assert set(counts) == {P1, P2, P3}
+    assert min(counts.values()) > 30
+
+
+def test_prefer_fast_and_unbanned():
+    latency = {P1: 2.0, P2: 0.2}
+    pool = ProxyPool([P1, P2])
+    counts = Counter()
+    for _ in range(20):
+        proxy = pool.choose(URL)
+        counts[proxy] += 1
+        pool.report(proxy, URL, latency=latency[proxy])
+    assert counts[P2] >= 18
+    # 在javdb上被封禁的代理不应再被选中，但不影响其他站点
+    for _ in range(10):
+        pool.report(P2, URL, latency=0.2, banned=True)
+    assert pool.banned_sites(P2) == ['javdb.com']
+    proxy = pool.choose(URL)
+    pool.report(proxy, URL, latency=latency[proxy])
+    assert proxy == P1
+    other = 'https://www.javbus.com/ABC-123'
+    pool.report(P2, other, latency=0.2)
+    pool.report(P1, other, latency=2.0)
+    assert pool.choose(other) == P2
+    assert pool.choose(other) == P2
+
+
+def test_evict_and_cooldown():
+    pool = ProxyPool([P1, P2], max_failures=2, cooldown=0.2)
+    for _ in range(2):
+        pool.choose(URL)
+        pool.report(P1, URL, failed=True)
+    assert all(pool.choose(URL) == P2 for _ in range(20))
+    time.sleep(0.25)
+    # 没有健康检查时，冷却时间结束后直接重新启用
+    assert P1 in {pool.choose(URL) for _ in range(50)}
+
+
+def test_health_check():
+    alive = {P1: True, P2: True}
+    def check(proxy):
+        if not alive[proxy]:
+            raise ConnectionError('refused')
+        return 0.1
+    pool = ProxyPool([P1, P2], cooldown=0, check=check)
+    alive[P1] = False
+    pool.run_checks()
+    assert all(pool.choose(URL) == P2 for _ in range(20))
+    # 有健康检查时，只有检查通过后才会重新启用
+    pool.run_checks()
+    assert all(pool.choose(URL) == P2 for _ in range(20))
+    alive[P1] = True
+    pool.run_checks()
+    assert P1 in {pool.choose(URL) for _ in range(50)}
+
+
+def test_all_evicted():
+    """所有代理都不可用时仍然返回一个代理，而不是让请求直接失败"""
+    pool = ProxyPool([P1], max_failures=1)
+    pool.choose(URL)
+    pool.report(P1, URL, failed=True)
+    assert pool.choose(URL) == P1
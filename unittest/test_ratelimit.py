@@ -0,0 +1,77 @@
+import os
+import sys
+import pytest
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.exceptions import QuotaExceeded
+from javsp.web.ratelimit import TokenBucket, RateLimiter, merge_builtin_sites, parse_retry_after
+
+
+def make_resp(status, headers=None):
+    r = Response()
+    r.status_code = status
+    r.headers = CaseInsensitiveDict(headers or {})
+    return r
+
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+
+
+def test_unlimited_bucket():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.reserve() == 0 for _ in range(100))
+
+
+def test_aimd():
+    bucket = TokenBucket(rate=4, burst=1)
+    bucket.throttle()
+    bucket.throttle()
+    assert bucket.rate == 1
+    for _ in range(20):
+        bucket.recover()
+    assert bucket.rate == 4
+
+
+def test_retry_after():
+    assert parse_retry_after('3') == 3
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+    assert parse_retry_after('') is None
+    limiter = RateLimiter({'rate': 0, 'burst': 1})
+    limiter.feedback('https://example.com/a', make_resp(429, {'Retry-After': '2'}))
+    assert limiter.bucket('https://example.com/b').reserve() == pytest.approx(2, abs=0.1)
+    # 其他站点不受影响
+    assert limiter.bucket('https://other.com/').reserve() == 0
+
+
+def test_site_rules_and_daily_quota(tmp_path, monkeypatch):
+    import javsp.store
+    from javsp.store import JsonStore
+    monkeypatch.setattr(javsp.store, '_cache_dir', str(tmp_path))
+    sites = {'javdb': {'rate': 0, 'burst': 1, 'daily_quota': 2}}
+    limiter = RateLimiter({'rate': 1, 'burst': 1}, sites, JsonStore('quota.json'))
+    assert limiter.bucket('https://javdb.com/').max_rate == 0
+    assert limiter.bucket('https://example.com/').max_rate == 1
+    limiter.acquire('https://javdb.com/a')
+    # 请求次数在多次运行之间累计
+    limiter = RateLimiter({'rate': 1, 'burst': 1}, sites, JsonStore('quota.json'))
+    limiter.acquire('https://javdb.com/b')
+    with pytest.raises(QuotaExceeded):
+        limiter.acquire('https://javdb.com/c')
+
+
+def test_builtin_translator_sites():
+    # 配置中没有设置时，翻译API也按内置的速率限速
+    limiter = RateLimiter({'rate': 0, 'burst': 1}, merge_builtin_sites({}))
+    assert limiter.bucket('https://api.fanyi.baidu.com/api/trans/vip/translate').max_rate == 1
+    assert limiter.bucket('https://translate.google.com.hk/translate_a/single').max_rate == 0.25
+    assert limiter.bucket('https://javdb.com/').max_rate == 0
+    # 配置中的同名设置优先
+    sites = merge_builtin_sites({'translate.google': {'rate': 2, 'burst': 1, 'daily_quota': None}})
+    limiter = RateLimiter({'rate': 0, 'burst': 1}, sites)
+    assert limiter.bucket('https://translate.google.com.hk/').max_rate == 2
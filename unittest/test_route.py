@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import javsp.web.route as route_mod
+from javsp.web.route import Route, RouteTable, candidate_routes
+
+
+PERMANENT = 'https://www.javbus.com'
+MIRROR = 'https://mirror.example.com'
+PROXY = 'http://127.0.0.1:1080'
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    import javsp.store
+    from javsp.store import JsonStore
+    monkeypatch.setattr(javsp.store, '_cache_dir', str(tmp_path))
+    return JsonStore('routes.json')
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    """模拟配置了代理"""
+    current = {'proxy': PROXY}
+    monkeypatch.setattr(route_mod, '_current_proxy', lambda: current['proxy'])
+    return current
+
+
+class Probe:
+    """按路线模拟耗时和可用性的测试函数"""
+    def __init__(self, delays: dict):
+        self.delays = delays
+        self.calls = []
+
+    def __call__(self, route, timeout):
+        self.calls.append(route)
+        delay = self.delays.get(route)
+        if delay is None:
+            raise ConnectionError('unreachable')
+        time.sleep(delay)
+        return True
+
+
+def test_candidates(proxy):
+    routes = candidate_routes(PERMANENT, [MIRROR + '/', MIRROR])
+    # 未测速时的默认路线与以往的行为一致: 设置了代理时经由代理访问永久地址
+    assert routes[0] == Route(PERMANENT, PROXY)
+    assert set(routes) == {Route(PERMANENT, PROXY), Route(MIRROR, PROXY), Route(MIRROR), Route(PERMANENT)}
+    proxy['proxy'] = None
+    assert candidate_routes(PERMANENT, [MIRROR]) == [Route(MIRROR), Route(PERMANENT)]
+
+
+def test_select_fastest_and_persist(store, proxy):
+    probe = Probe({Route(PERMANENT, PROXY): 0.3, Route(MIRROR): 0.05, Route(MIRROR, PROXY): 0.2})
+    table = RouteTable(store, ttl=3600, probe_timeout=1)
+    assert table.select('javbus', PERMANENT, [MIRROR], probe=probe) == Route(MIRROR)
+    assert len(probe.calls) == 4
+    # 选择结果被保存下来，之后（包括下次运行时）不再测速
+    store.save()
+    from javsp.store import JsonStore
+    table2 = RouteTable(JsonStore('routes.json'), ttl=3600, probe_timeout=1)
+    probe2 = Probe({})
+    assert table2.select('javbus', PERMANENT, [MIRROR], probe=probe2) == Route(MIRROR)
+    assert probe2.calls == []
+
+
+def test_invalidate_and_proxy_change(store, proxy):
+    table = RouteTable(store, ttl=3600, probe_timeout=1)
+    probe = Probe({Route(PERMANENT, PROXY): 0.01})
+    assert table.select('javbus', PERMANENT, [MIRROR], probe=probe) == Route(PERMANENT, PROXY)
+    table.invalidate('javbus')
+    probe = Probe({Route(MIRROR): 0.01})
+    assert table.select('javbus', PERMANENT, [MIRROR], probe=probe) == Route(MIRROR)
+    # 代理配置变化后，之前选择的经由代理的路线不再使用
+    table.set('javbus', Route(PERMANENT, PROXY))
+    proxy['proxy'] = 'http://127.0.0.1:1081'
+    assert table.get('javbus') is None
+
+
+def test_discover_and_all_failed(store, proxy):
+    proxy['proxy'] = None
+    table = RouteTable(store, ttl=3600, probe_timeout=1)
+    found = 'https://found.example.com'
+    probe = Probe({Route(found): 0.01})
+    route = table.select('javlib', PERMANENT, [MIRROR], discover=lambda: [found], probe=probe)
+    assert route == Route(found)
+    # 所有路线都不可用时使用默认路线，且不保存选择结果
+    probe = Probe({})
+    assert table.select('javdb', PERMANENT, [MIRROR], probe=probe) == Route(MIRROR)
+    assert table.get('javdb') is None
+
+
+def test_disabled(store, proxy):
+    table = RouteTable(store, ttl=3600, probe_timeout=1, enabled=False)
+    probe = Probe({})
+    assert table.select('javbus', PERMANENT, [MIRROR], probe=probe) == Route(PERMANENT, PROXY)
+    assert probe.calls == []
+
+
+def test_default_probe_bypasses_cache(monkeypatch):
+    """测速请求不能由网页缓存应答、与其他请求合并或者被限速"""
+    import threading
+    import javsp.web.base as base
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+        def log_message(self, *args):
+            pass
+
+    class Forbidden:
+        def __getattr__(self, name):
+            raise AssertionError(f'测速请求不应使用{name}')
+
+    monkeypatch.setattr(base, 'http_cache', Forbidden())
+    monkeypatch.setattr(base, '_single_flight', Forbidden())
+    monkeypatch.setattr(base, 'rate_limiter', Forbidden())
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        assert route_mod.default_probe(Route(f'http://127.0.0.1:{httpd.server_port}'), 5)
+    finally:
+        httpd.shutdown()
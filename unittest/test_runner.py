@@ -0,0 +1,166 @@
+import os
+import sys
+import time
+import types
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.datatype import MovieInfo
+from javsp.web.exceptions import MovieNotFoundError
+from javsp.web.runner import CrawlerRunner, CrawlResult
+
+
+def fake_crawler(name, parse_data=None, parse_data_async=None):
+    """创建一个临时的抓取器模块"""
+    mod = types.ModuleType(name)
+    if parse_data:
+        mod.parse_data = parse_data
+    if parse_data_async:
+        mod.parse_data_async = parse_data_async
+    sys.modules[name] = mod
+    return name
+
+
+def test_sync_and_async_crawlers():
+    def ok(movie: MovieInfo):
+        movie.title = 'sync'
+
+    async def ok_async(movie: MovieInfo):
+        await asyncio.sleep(0)
+        movie.title = 'async'
+
+    def not_found(movie: MovieInfo):
+        raise MovieNotFoundError(__name__, movie.dvdid)
+
+    jobs = {
+        fake_crawler('fake_sync', ok): MovieInfo('ABC-123'),
+        fake_crawler('fake_async', parse_data_async=ok_async): MovieInfo('ABC-123'),
+        fake_crawler('fake_notfound', not_found): MovieInfo('ABC-123'),
+    }
+    results = CrawlerRunner().run(jobs, timeout=5)
+    assert list(results) == list(jobs)
+    assert results['fake_sync'].success and jobs['fake_sync'].title == 'sync'
+    assert results['fake_async'].success and jobs['fake_async'].title == 'async'
+    assert results['fake_notfound'].status == CrawlResult.NOT_FOUND
+
+
+def test_timeout_cancels_slow_crawler():
+    async def slow(movie: MovieInfo):
+        await asyncio.sleep(10)
+        movie.title = 'too late'
+
+    jobs = {fake_crawler('fake_slow', parse_data_async=slow): MovieInfo('ABC-123')}
+    start = time.time()
+    results = CrawlerRunner().run(jobs, timeout=0.2)
+    assert time.time() - start < 2
+    assert results['fake_slow'].status == CrawlResult.TIMEOUT
+    assert jobs['fake_slow'].title is None
+
+
+def test_not_found_cache(tmp_path, monkeypatch):
+    import javsp.store
+    from javsp.store import JsonStore
+    from javsp.web.runner import NotFoundCache
+    monkeypatch.setattr(javsp.store, '_cache_dir', str(tmp_path))
+    calls = []
+    def not_found(movie: MovieInfo):
+        calls.append(movie.dvdid)
+        raise MovieNotFoundError(__name__, movie.dvdid)
+
+    name = fake_crawler('fake_missing', not_found)
+    runner = CrawlerRunner(NotFoundCache(JsonStore('not_found.json'), 60))
+    for _ in range(2):
+        results = runner.run({name: MovieInfo('ABC-123')}, timeout=5)
+        assert results[name].status == CrawlResult.NOT_FOUND
+    assert calls == ['ABC-123']
+    # 记录会持久化保存，且过期后失效
+    assert (name, 'abc-123') in NotFoundCache(JsonStore('not_found.json'), 60)
+    expired = NotFoundCache(JsonStore('other.json'), -1)
+    expired.add(name, 'ABC-123')
+    assert (name, 'ABC-123') not in expired
+    # add()不会立即写入文件，flush()时才写入
+    cache = NotFoundCache(JsonStore('later.json'), 60)
+    cache.add(name, 'DEF-456')
+    assert (name, 'DEF-456') not in NotFoundCache(JsonStore('later.json'), 60)
+    cache.flush()
+    assert (name, 'DEF-456') in NotFoundCache(JsonStore('later.json'), 60)
+
+
+def test_network_failure_invalidates_route(tmp_path, monkeypatch):
+    import requests
+    import javsp.store
+    import javsp.web.runner as runner_mod
+    from javsp.store import JsonStore
+    from javsp.web.route import Route, RouteTable
+    monkeypatch.setattr(javsp.store, '_cache_dir', str(tmp_path))
+    table = RouteTable(JsonStore('routes.json'), ttl=3600, probe_timeout=1)
+    monkeypatch.setattr(runner_mod, 'route_table', table)
+    def unreachable(movie: MovieInfo):
+        raise requests.exceptions.ConnectionError('unreachable')
+
+    # 抓取器以完整的模块名运行，路线则按站点的短名称保存
+    name = fake_crawler('javsp.web.fake_dead', unreachable)
+    table.set('fake_dead', Route('https://mirror.example.com'))
+    results = CrawlerRunner().run({name: MovieInfo('ABC-123')}, timeout=5)
+    assert results[name].status == CrawlResult.NETWORK
+    assert table.get('fake_dead') is None
+
+
+def test_circuit_breaker():
+    from javsp.web.exceptions import SiteBlocked
+    from javsp.web.runner import CircuitBreaker
+    calls = []
+    def blocked(movie: MovieInfo):
+        calls.append(movie.dvdid)
+        raise SiteBlocked('403')
+
+    name = fake_crawler('fake_blocked', blocked)
+    breaker = CircuitBreaker(threshold=2, cooldown=0.2)
+    runner = CrawlerRunner(breaker=breaker)
+    statuses = [runner.run({name: MovieInfo('ABC-123')})[name].status for _ in range(3)]
+    assert statuses == [CrawlResult.BLOCKED, CrawlResult.BLOCKED, CrawlResult.TRIPPED]
+    assert breaker.tripped == [name] and len(calls) == 2
+    # 冷却结束后放行一次试探，试探成功则恢复访问
+    time.sleep(0.25)
+    assert breaker.state(name) == CircuitBreaker.HALF_OPEN
+    sys.modules[name].parse_data = lambda movie: None
+    assert runner.run({name: MovieInfo('ABC-123')})[name].success
+    assert breaker.state(name) == CircuitBreaker.CLOSED
+
+
+def test_settled_skips_remaining_crawlers():
+    def fast(movie: MovieInfo):
+        movie.title = 'fast'
+
+    async def slow(movie: MovieInfo):
+        await asyncio.sleep(10)
+
+    jobs = {
+        fake_crawler('fake_fast', fast): MovieInfo('ABC-123'),
+        fake_crawler('fake_lazy', parse_data_async=slow): MovieInfo('ABC-123'),
+    }
+    settled = lambda finished: 'fake_fast' in finished and finished['fake_fast'].info.title
+    start = time.time()
+    results = CrawlerRunner().run(jobs, timeout=5, settled=settled)
+    assert time.time() - start < 2
+    assert results['fake_fast'].success
+    assert results['fake_lazy'].status == CrawlResult.SKIPPED
+
+
+def test_cancelled_crawler_stops_sending_requests():
+    from javsp.web.base import deadline_bound
+    sent = []
+    send = deadline_bound(lambda url, **kw: sent.append((url, kw.get('timeout'))))
+    def slow_sync(movie: MovieInfo):
+        send('https://example.com/1', timeout=10)
+        time.sleep(0.5)
+        # 此时任务已经超时并被取消
+        send('https://example.com/2', timeout=10)
+
+    jobs = {fake_crawler('fake_zombie', slow_sync): MovieInfo('ABC-123')}
+    results = CrawlerRunner().run(jobs, timeout=0.2)
+    assert results['fake_zombie'].status == CrawlResult.TIMEOUT
+    time.sleep(0.5)
+    assert [i[0] for i in sent] == ['https://example.com/1']
+    # 请求的超时时间不超过任务的剩余时间
+    assert sent[0][1] <= 0.2
@@ -0,0 +1,38 @@
+import os
+import sys
+import pytest
+from lxml import etree
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.base import parse_html
+from javsp.web.selector import Selector, Selectors, get_selector
+
+
+html = parse_html('''<html><body><div class="info">
+<p><span>品番:</span> ABC-123</p><p><span>長度:</span> 120分鐘</p>
+<p><a href="/genre/1">G1</a><a href="/genre/2">G2</a></p>
+</div></body></html>'''.encode('utf-8'), 'utf-8')
+
+
+def test_selectors():
+    sel = Selectors('test_sel', info="//div[@class='info']", label="p/span[text()=$label]",
+                    genre="p/a/text()", genre_url="p/a/@href")
+    info = sel.info(html)[0]
+    assert sel.label(info, label='品番:')[0].tail.strip() == 'ABC-123'
+    assert sel.label(info, label='長度:')[0].tail.strip() == '120分鐘'
+    assert sel.label(info, label='系列:') == []
+    assert sel.genre(info) == ['G1', 'G2']
+    # 文本结果为普通的str，不保留对网页节点的引用
+    assert type(sel.genre_url(info)[0]) is str
+    assert sel.genre.first(info) == 'G1'
+    assert sel.label.first(info, default='', label='系列:') == ''
+    assert len(sel) == 4 and [i.name for i in sel][0] == 'test_sel.info'
+    assert get_selector('test_sel.genre') is sel.genre
+
+
+def test_selector_errors():
+    sel = Selectors('test_sel_err', title="//h1/text()")
+    with pytest.raises(AttributeError):
+        sel.cover
+    with pytest.raises(etree.XPathSyntaxError):
+        Selector('bad', "//div[@class='x'")
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import threading
+import pytest
+from requests.models import Response
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from javsp.web.singleflight import SingleFlight
+
+
+class Upstream:
+    def __init__(self, delay=0.2, error=None):
+        self.delay, self.error = delay, error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        r = Response()
+        r.status_code, r.url, r._content = 200, 'https://example.com/', b'body'
+        return r
+
+
+def run_concurrently(func, n=5):
+    results = [None] * n
+    def target(i):
+        try:
+            results[i] = func()
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return results
+
+
+def test_concurrent_requests_share_one_fetch():
+    sf, upstream = SingleFlight(), Upstream()
+    results = run_concurrently(lambda: sf.do('k', upstream))
+    assert upstream.calls == 1
+    assert all(r.content == b'body' for r in results)
+    # 每个调用者得到独立的Response对象
+    assert len({id(r) for r in results}) == len(results)
+    # 请求完成后不再共享
+    sf.do('k', upstream)
+    assert upstream.calls == 2
+
+
+def test_errors_are_shared_unless_retryable():
+    sf, upstream = SingleFlight(), Upstream(error=ValueError('boom'))
+    results = run_concurrently(lambda: sf.do('k', upstream))
+    assert upstream.calls == 1 and all(isinstance(r, ValueError) for r in results)
+
+    sf, upstream = SingleFlight(retry_on=(KeyError,)), Upstream(error=KeyError('cancelled'))
+    results = run_concurrently(lambda: sf.do('k', upstream), n=3)
+    # leader自身的原因导致的失败，其他调用者会重新发起请求
+    assert upstream.calls > 1
+
+
+def test_follower_wait_timeout():
+    sf = SingleFlight()
+    th = threading.Thread(target=sf.do, args=('k', Upstream(delay=1)))
+    th.start()
+    time.sleep(0.05)
+    with pytest.raises(TimeoutError):
+        sf.do('k', Upstream(), wait_timeout=lambda: 0.1)
+    th.join()
+
+
+def test_cached_get_keys_on_send_and_proxy(monkeypatch):
+    import javsp.web.base as base
+    from javsp.web.proxypool import PoolProxies
+    monkeypatch.setattr(base, 'http_cache', None)
+    monkeypatch.setattr(base, '_single_flight', SingleFlight())
+    url = 'https://example.com/'
+    plain, scraper = Upstream(), Upstream()
+    send_plain = lambda url, **kw: plain()
+    send_scraper = lambda url, **kw: scraper()
+    def get(i):
+        # 交替使用两个send和两个代理
+        send = send_plain if i % 2 == 0 else send_scraper
+        proxy = 'http://127.0.0.1:1080' if i < 4 else 'http://127.0.0.1:1081'
+        return base.cached_get(send, url, proxies={'https': proxy})
+    counter = iter(range(8))
+    lock = threading.Lock()
+    def call():
+        with lock:
+            i = next(counter)
+        return get(i)
+    run_concurrently(call, n=8)
+    # 经由不同send或不同代理发出的请求不会被合并
+    assert plain.calls == 2 and scraper.calls == 2
+
+    pooled = Upstream()
+    send_pooled = lambda url, **kw: pooled()
+    run_concurrently(lambda: base.cached_get(send_pooled, url, proxies=PoolProxies({'https': 'http://127.0.0.1:1080'})), n=3)
+    # 经由代理池发出的请求在发送时才选择代理，不合并
+    assert pooled.calls == 3
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+import types
+import requests
+from requests.models import Response
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import javsp.web.warmup as warmup
+from javsp.web.route import Route
+
+
+def fake_module(name, **attrs):
+    mod = types.ModuleType('javsp.web.' + name)
+    mod.__dict__.update(attrs)
+    return mod
+
+
+def test_warm_up(monkeypatch):
+    visited = []
+    def head(url, **kw):
+        visited.append(url)
+        time.sleep(0.2)
+        if 'down' in url:
+            raise requests.exceptions.ConnectTimeout(url)
+        r = Response()
+        r.status_code, r.url = 200, url
+        return r
+    monkeypatch.setattr(warmup, 'pooled_head', head)
+    routed = []
+    def init_route():
+        routed.append(True)
+        return Route('https://mirror.example.com')
+    mods = [
+        fake_module('site1', base_url='https://site1.example.com'),
+        fake_module('site2', base_url='https://down.example.com'),
+        fake_module('site3', permanent_url='https://site3.example.com', init_route=init_route),
+        fake_module('site4'),
+    ]
+    start = time.monotonic()
+    future = warmup.start_warm_up(mods)
+    assert warmup.warm_up([]) == {}
+    unreachable = future.result()
+    # 各个站点是同时预热的
+    assert time.monotonic() - start < 0.5
+    assert unreachable == {'site2': 'ConnectTimeout'}
+    # 需要选择路线的抓取器使用选定的路线
+    assert routed and 'https://mirror.example.com' in visited
+    assert len(visited) == 3